@@ -0,0 +1,123 @@
+"""Local stand-in for the OpenRouter chat completions API.
+
+Answers every clip ranking request with the clips found in the prompt,
+scored deterministically, so benchmark runs rank the same clips every time
+without network access or an API key.
+"""
+
+import re
+import json
+import time
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CLIP_PATTERN = re.compile(r'"start":\s*([\d.]+),\s*"end":\s*([\d.]+)')
+
+
+def rank_prompt(prompt: str) -> list[dict]:
+    """Clips for every start/end pair in the prompt, with repeatable scores."""
+    clips = []
+    for index, (start, end) in enumerate(CLIP_PATTERN.findall(prompt)):
+        clips.append(
+            {
+                "name": f"Synthetic clip {float(start):.0f}",
+                "start": float(start),
+                "end": float(end),
+                "score": 10 - index % 5,
+                "factors": "synthetic benchmark audio",
+                "platforms": "all",
+            }
+        )
+    return clips
+
+
+class FakeOpenRouter(ThreadingHTTPServer):
+    """Chat completions server at http://127.0.0.1:<port>/api/v1.
+
+    `latency` seconds are added to every response, to model a remote API.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, port: int = 0, latency: float = 0.0):
+        super().__init__(("127.0.0.1", port), FakeOpenRouterHandler)
+        self.latency = latency
+        self.requests = 0
+        self.lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/api/v1"
+
+    def start(self) -> None:
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+class FakeOpenRouterHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        if not self.path.endswith("/chat/completions"):
+            self.send_error(404)
+            return
+
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        prompt = "\n".join(
+            message.get("content") or "" for message in request.get("messages", [])
+        )
+        with self.server.lock:
+            self.server.requests += 1
+        time.sleep(self.server.latency)
+
+        content = json.dumps({"clips": rank_prompt(prompt)})
+        body = json.dumps(
+            {
+                "id": f"bench-{self.server.requests}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": request.get("model", "fake"),
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": content},
+                        "finish_reason": "stop",
+                    }
+                ],
+                # Roughly four characters per token
+                "usage": {
+                    "prompt_tokens": len(prompt) // 4,
+                    "completion_tokens": len(content) // 4,
+                    "total_tokens": (len(prompt) + len(content)) // 4,
+                },
+            }
+        ).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = FakeOpenRouter(args.port, args.latency)
+    print(f"Serving fake OpenRouter at {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,350 @@
+"""End-to-end benchmark of the processing pipeline on synthetic media.
+
+Generates a VOD of the requested length from ffmpeg lavfi sources, then runs
+remux, audio feature extraction, transcription on the CPU, ranking against
+a local fake OpenRouter server and clip extraction, each stage in its own
+process. Per-stage timings and peak RSS are written to a JSON report and
+checked against regression thresholds.
+
+    python benchmarks/run.py --duration 300 --output benchmark.json
+    python benchmarks/run.py --baseline benchmark.json --output new.json
+
+Exits with 1 if a stage failed or regressed.
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import datetime
+import subprocess
+import configparser
+from pathlib import Path
+
+from fake_openrouter import FakeOpenRouter
+
+REPO = Path(__file__).resolve().parent.parent
+SRC = REPO / "src"
+THRESHOLDS = Path(__file__).resolve().parent / "thresholds.json"
+
+STAGES = ("remux", "features", "transcribe", "rank", "extract")
+AUDIO_SOURCES = ("speech", "sine", "noise")
+
+# Files of the synthetic VOD as the pipeline names them
+VOD = "vod.ts"
+VIDEO = "vod.mp4"
+AUDIO = "vod.wav"
+TRANSCRIPTION = "vod.enhanced_transcription.json"
+CLIPS = "vod.top_clips.json"
+
+
+def audio_filter(kind: str, duration: float, sample_rate: int = 48000) -> str:
+    """lavfi audio source, `speech` is a gliding tone in syllables and pauses."""
+    if kind == "sine":
+        return f"sine=frequency=220:sample_rate={sample_rate}:duration={duration}"
+    if kind == "noise":
+        return (
+            f"anoisesrc=color=pink:seed=42:amplitude=0.3"
+            f":sample_rate={sample_rate}:duration={duration}"
+        )
+    # Voice-like pitch around 150 Hz, four syllables a second, a pause every 5 s
+    expression = (
+        "0.6*sin(2*PI*(150+40*sin(2*PI*0.5*t))*t)"
+        "*(0.5+0.5*sin(2*PI*4*t))*gt(sin(2*PI*0.2*t),-0.6)"
+    )
+    return f"aevalsrc=exprs='{expression}':s={sample_rate}:d={duration}"
+
+
+def build_generate_command(
+    output_path: str,
+    duration: float,
+    audio: str = "speech",
+    size: str = "1280x720",
+    rate: int = 30,
+) -> list[str]:
+    """ffmpeg writing a synthetic MPEG-TS recording, the same for the same arguments."""
+    return [
+        "ffmpeg",
+        "-hide_banner",
+        "-loglevel",
+        "error",
+        "-y",
+        "-f",
+        "lavfi",
+        "-i",
+        f"testsrc2=size={size}:rate={rate}:duration={duration}",
+        "-f",
+        "lavfi",
+        "-i",
+        audio_filter(audio, duration),
+        "-map",
+        "0:v",
+        "-map",
+        "1:a",
+        "-c:v",
+        "libx264",
+        "-preset",
+        "ultrafast",
+        "-g",
+        str(rate * 2),
+        "-c:a",
+        "aac",
+        "-shortest",
+        "-f",
+        "mpegts",
+        output_path,
+    ]
+
+
+def write_config(workdir: Path, args, base_url: str) -> None:
+    """config.ini for the stage processes, reproducible and without side effects."""
+    config = configparser.ConfigParser()
+    config.read(REPO / "config.ini")
+    overrides = {
+        "clipception": {"enabled": "true"},
+        "clipception.transcription": {
+            "device": "cpu",
+            "engine": args.engine,
+            "model_size": args.model_size,
+        },
+        "clipception.llm": {"base_url": base_url},
+        # Every run does the full work, at full speed
+        "cache": {"enabled": "false"},
+        "governor": {"enabled": "false"},
+        "storage": {"enabled": "false"},
+        "tracing": {"enabled": "false"},
+        "processing": {"journal": "false"},
+    }
+    for section, values in overrides.items():
+        if not config.has_section(section):
+            config.add_section(section)
+        for key, value in values.items():
+            config.set(section, key, value)
+    with open(workdir / "config.ini", "w") as f:
+        config.write(f)
+
+
+def run_stage(name: str) -> bool:
+    """Run one stage in the current directory. Called in the stage's own process."""
+    sys.path.insert(0, str(SRC))
+    os.environ.setdefault("OPEN_ROUTER_KEY", "benchmark")
+    from processor import processor
+
+    start = time.perf_counter()
+    if name == "remux":
+        ok = processor._convert(VOD, AUDIO) == VIDEO and os.path.exists(AUDIO)
+    elif name == "features":
+        from audio_source import WavSource
+        from transcription import extract_audio_features
+
+        audio = WavSource(AUDIO)
+        ok = all(
+            extract_audio_features(samples, t, t + 5, audio.sample_rate)
+            for _, samples in audio.blocks(600)
+            for t in range(0, int(len(samples) / audio.sample_rate), 5)
+        )
+    elif name == "transcribe":
+        ok = processor._transcribe(VIDEO, AUDIO) is not None
+    elif name == "rank":
+        ok = processor._rank(TRANSCRIPTION) is not None
+    elif name == "extract":
+        clips_dir = processor._extract(VIDEO, CLIPS)
+        ok = bool(clips_dir and os.listdir(clips_dir))
+    else:
+        raise ValueError(f"Unknown stage {name}")
+    seconds = time.perf_counter() - start
+
+    with open(f"{name}.result.json", "w") as f:
+        json.dump({"ok": ok, "seconds": seconds}, f)
+    return ok
+
+
+def measure_stage(name: str, workdir: Path) -> dict:
+    """Run a stage in a child process and measure it, along with its subprocesses."""
+    started = time.perf_counter()
+    with open(workdir / f"{name}.log", "w") as log:
+        process = subprocess.Popen(
+            [sys.executable, str(Path(__file__).resolve()), "--stage", name],
+            cwd=workdir,
+            stdout=log,
+            stderr=subprocess.STDOUT,
+        )
+        # wait4 reports the peak RSS of the stage and the processes it waited for
+        _, status, usage = os.wait4(process.pid, 0)
+        process.returncode = os.waitstatus_to_exitcode(status)
+    wall = time.perf_counter() - started
+
+    try:
+        with open(workdir / f"{name}.result.json") as f:
+            result = json.load(f)
+    except (OSError, ValueError):
+        result = {"ok": False, "seconds": None}
+
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    scale = 1024**2 if sys.platform == "darwin" else 1024
+    return {
+        "ok": bool(result["ok"]) and process.returncode == 0,
+        "seconds": result["seconds"],
+        "wall_seconds": wall,
+        "peak_rss_mb": usage.ru_maxrss / scale,
+    }
+
+
+def check_regressions(
+    report: dict,
+    thresholds: dict,
+    baseline: dict | None = None,
+    tolerance: float = 0.25,
+) -> list[str]:
+    """Describe every stage that failed, exceeds a threshold or regressed.
+
+    Thresholds are per stage, `seconds_per_minute` of video and `peak_rss_mb`.
+    Against a baseline report a stage regresses when it takes more than
+    `tolerance` longer or uses more than `tolerance` more memory.
+    """
+    problems = []
+    minutes = report["settings"]["duration"] / 60
+    for name, stage in report["stages"].items():
+        if not stage["ok"]:
+            problems.append(f"{name}: failed")
+            continue
+
+        per_minute = stage["seconds"] / minutes
+        limit = thresholds.get(name, {})
+        if per_minute > limit.get("seconds_per_minute", float("inf")):
+            problems.append(
+                f"{name}: {per_minute:.2f}s per minute of video exceeds"
+                f" {limit['seconds_per_minute']}s"
+            )
+        if stage["peak_rss_mb"] > limit.get("peak_rss_mb", float("inf")):
+            problems.append(
+                f"{name}: peak RSS {stage['peak_rss_mb']:.0f} MB exceeds"
+                f" {limit['peak_rss_mb']} MB"
+            )
+
+        previous = (baseline or {}).get("stages", {}).get(name)
+        if not previous or not previous.get("ok"):
+            continue
+        previous_minutes = baseline["settings"]["duration"] / 60
+        previous_per_minute = previous["seconds"] / previous_minutes
+        if per_minute > previous_per_minute * (1 + tolerance):
+            problems.append(
+                f"{name}: {per_minute:.2f}s per minute of video, baseline"
+                f" {previous_per_minute:.2f}s"
+            )
+        if stage["peak_rss_mb"] > previous["peak_rss_mb"] * (1 + tolerance):
+            problems.append(
+                f"{name}: peak RSS {stage['peak_rss_mb']:.0f} MB, baseline"
+                f" {previous['peak_rss_mb']:.0f} MB"
+            )
+    return problems
+
+
+def environment() -> dict:
+    try:
+        version = subprocess.run(
+            ["ffmpeg", "-version"], capture_output=True, text=True
+        ).stdout.splitlines()[0]
+    except (OSError, IndexError):
+        version = None
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "ffmpeg": version,
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Benchmark the processing pipeline on a synthetic VOD",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument("--duration", type=float, default=300, help="VOD seconds")
+    parser.add_argument("--audio", choices=AUDIO_SOURCES, default="speech")
+    parser.add_argument("--size", default="1280x720", help="Video resolution")
+    parser.add_argument("--engine", default="faster-whisper")
+    parser.add_argument("--model-size", default="tiny")
+    parser.add_argument(
+        "--llm-latency", type=float, default=0.0, help="Seconds per fake LLM reply"
+    )
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=list(STAGES))
+    parser.add_argument("--output", default="benchmark.json", help="Report path")
+    parser.add_argument("--thresholds", default=str(THRESHOLDS))
+    parser.add_argument("--baseline", help="Earlier report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--workdir", help="Directory for the media, kept afterwards")
+    parser.add_argument("--stage", choices=STAGES, help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    if args.stage:
+        return 0 if run_stage(args.stage) else 1
+
+    workdir = Path(args.workdir or tempfile.mkdtemp(prefix="autovod-bench-"))
+    workdir.mkdir(parents=True, exist_ok=True)
+    server = FakeOpenRouter(latency=args.llm_latency)
+    server.start()
+    try:
+        write_config(workdir, args, server.base_url)
+        command = build_generate_command(
+            str(workdir / VOD), args.duration, args.audio, args.size
+        )
+        print(f"Generating a {args.duration:.0f}s synthetic VOD in {workdir}")
+        subprocess.run(command, check=True)
+
+        stages = {}
+        for name in STAGES:
+            if name not in args.stages:
+                continue
+            print(f"Running {name}...", end=" ", flush=True)
+            stages[name] = measure_stage(name, workdir)
+            print(
+                f"{stages[name]['wall_seconds']:.2f}s,"
+                f" {stages[name]['peak_rss_mb']:.0f} MB peak"
+                + ("" if stages[name]["ok"] else f", failed (see {name}.log)")
+            )
+    finally:
+        server.stop()
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "settings": {
+            "duration": args.duration,
+            "audio": args.audio,
+            "size": args.size,
+            "engine": args.engine,
+            "model_size": args.model_size,
+            "llm_latency": args.llm_latency,
+        },
+        "environment": environment(),
+        "stages": stages,
+    }
+    with open(args.thresholds) as f:
+        thresholds = json.load(f)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    report["regressions"] = check_regressions(
+        report, thresholds, baseline, args.tolerance
+    )
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Report written to {args.output}")
+    for problem in report["regressions"]:
+        print(f"REGRESSION {problem}")
+    return 1 if report["regressions"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+import os
+import json
+import shutil
+import hashlib
+import threading
+from logger import logger
+from settings import config
+
+SAMPLE_SIZE = 64 * 1024
+SAMPLE_COUNT = 16
+
+
+def fingerprint(path: str) -> str:
+    """Fast content hash of a file from its size and evenly spaced sample blocks.
+
+    Reads at most SAMPLE_COUNT * SAMPLE_SIZE bytes, so hashing a multi-hour
+    recording takes milliseconds. Files that differ only between the sampled
+    blocks get the same fingerprint, recordings never do in practice.
+    """
+    size = os.path.getsize(path)
+    digest = hashlib.blake2b(str(size).encode(), digest_size=20)
+    with open(path, "rb") as f:
+        if size <= SAMPLE_SIZE * SAMPLE_COUNT:
+            digest.update(f.read())
+        else:
+            step = (size - SAMPLE_SIZE) // (SAMPLE_COUNT - 1)
+            for index in range(SAMPLE_COUNT):
+                f.seek(index * step)
+                digest.update(f.read(SAMPLE_SIZE))
+    return digest.hexdigest()
+
+
+class ArtifactCache:
+    """Files produced from an input, keyed by the input's fingerprint and parameters.
+
+    Entries are evicted least recently used first once the cache grows past
+    `max_bytes`. A hit refreshes the entry's modification time, which is what
+    the eviction order is based on.
+    """
+
+    def __init__(
+        self,
+        directory: str = "recordings/.cache",
+        max_bytes: int = 1024**3,
+        enabled: bool = True,
+    ):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.lock = threading.Lock()
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(directory={self.directory!r}, max_bytes={self.max_bytes!r}, enabled={self.enabled!r})"
+
+    def key(self, input_path: str, **parameters) -> str | None:
+        """Cache key of `input_path` processed with `parameters`, None if unreadable."""
+        if not self.enabled:
+            return None
+        try:
+            content = fingerprint(input_path)
+        except OSError:
+            return None
+        encoded = json.dumps(parameters, sort_keys=True, default=str).encode()
+        return hashlib.blake2b(content.encode() + encoded, digest_size=20).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def restore(self, key: str | None, destination: str) -> bool:
+        """Copy the cached artifact to `destination`. Returns False on a miss."""
+        if key is None:
+            return False
+        path = self._path(key)
+        with self.lock:
+            try:
+                shutil.copyfile(path, destination)
+                os.utime(path)
+            except FileNotFoundError:
+                return False
+            except OSError:
+                logger.exception(f"Failed to restore cached artifact {key}")
+                return False
+        logger.info(f"Reusing cached {os.path.basename(destination)}")
+        return True
+
+    def store(self, key: str | None, source: str) -> None:
+        if key is None:
+            return
+        with self.lock:
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                temporary = f"{self._path(key)}.tmp"
+                shutil.copyfile(source, temporary)
+                os.replace(temporary, self._path(key))
+            except OSError:
+                logger.exception(f"Failed to cache {source}")
+                return
+            self._evict()
+
+    def _evict(self) -> None:
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.is_file() and not entry.name.endswith(".tmp"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+    def size(self) -> int:
+        try:
+            with os.scandir(self.directory) as it:
+                return sum(entry.stat().st_size for entry in it if entry.is_file())
+        except OSError:
+            return 0
+
+
+artifact_cache = ArtifactCache(
+    directory=config.get("cache", "directory", fallback="recordings/.cache"),
+    max_bytes=int(config.getfloat("cache", "max_size_mb", fallback=1024) * 1024**2),
+    enabled=config.getboolean("cache", "enabled", fallback=True),
+)
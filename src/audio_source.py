@@ -0,0 +1,188 @@
+import struct
+import subprocess
+from abc import ABC, abstractmethod
+from collections.abc import Iterator
+from pathlib import Path
+import numpy as np
+from logger import logger
+from metrics import subprocess_exits
+
+SAMPLE_RATE = 16000
+
+
+class AudioSource(ABC):
+    """Mono 16-bit audio read in consecutive blocks of bounded length.
+
+    Blocks are int16 numpy arrays, so memory use depends on the block length
+    and not on how long the recording is.
+    """
+
+    sample_rate = SAMPLE_RATE
+
+    @abstractmethod
+    def blocks(
+        self, seconds: float, overlap: float = 0.0
+    ) -> Iterator[tuple[float, np.ndarray]]:
+        """Yield the start in seconds and the samples of every block.
+
+        Blocks start every `seconds`, each also holds the first `overlap`
+        seconds of the next one.
+        """
+
+
+class WavSource(AudioSource):
+    """A 16-bit mono PCM wav, memory mapped instead of read into memory."""
+
+    def __init__(self, path: str | Path):
+        self.path = str(path)
+        offset, self.sample_rate = _wav_data(self.path)
+        length = (Path(self.path).stat().st_size - offset) // 2
+        if length > 0:
+            self.samples = np.memmap(
+                self.path, dtype="<i2", mode="r", offset=offset, shape=(length,)
+            )
+        else:
+            self.samples = np.zeros(0, dtype="<i2")
+
+    def __repr__(self):
+        return (
+            f"{self.__class__.__name__}(path={self.path!r}, duration={self.duration!r})"
+        )
+
+    @property
+    def duration(self) -> float:
+        return len(self.samples) / self.sample_rate
+
+    def blocks(
+        self, seconds: float, overlap: float = 0.0
+    ) -> Iterator[tuple[float, np.ndarray]]:
+        size = max(int(seconds * self.sample_rate), 1)
+        extra = int(overlap * self.sample_rate)
+        for start in range(0, len(self.samples), size):
+            yield start / self.sample_rate, np.asarray(
+                self.samples[start : start + size + extra]
+            )
+
+
+class FfmpegSource(AudioSource):
+    """The audio of a video decoded by ffmpeg and read from its pipe.
+
+    Nothing is written to disk, a block is decoded while the previous one is
+    being processed and ffmpeg waits while the pipe is full.
+    """
+
+    def __init__(
+        self,
+        video_path: str | Path,
+        start: float | None = None,
+        duration: float | None = None,
+    ):
+        self.video_path = str(video_path)
+        window = []
+        if start is not None:
+            window += ["-ss", str(start)]
+        if duration is not None:
+            window += ["-t", str(duration)]
+        self.command = [
+            "ffmpeg",
+            "-loglevel",
+            "error",
+            *window,
+            "-i",
+            self.video_path,
+            "-vn",
+            "-acodec",
+            "pcm_s16le",
+            "-ar",
+            str(self.sample_rate),
+            "-ac",
+            "1",
+            "-f",
+            "s16le",
+            "-",
+        ]
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(video_path={self.video_path!r})"
+
+    def blocks(
+        self, seconds: float, overlap: float = 0.0
+    ) -> Iterator[tuple[float, np.ndarray]]:
+        size = max(int(seconds * self.sample_rate), 1)
+        extra = min(int(overlap * self.sample_rate), size)
+        logger.debug(f"Executing: {' '.join(self.command)}")
+        process = subprocess.Popen(
+            self.command, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+        )
+        try:
+            # A block is yielded once the start of the next one has been read
+            position = 0
+            previous = None
+            while data := process.stdout.read(size * 2):
+                samples = np.frombuffer(data[: len(data) // 2 * 2], dtype="<i2")
+                if previous is not None:
+                    yield position / self.sample_rate, np.concatenate(
+                        [previous, samples[:extra]]
+                    )
+                    position += len(previous)
+                previous = samples
+            if previous is not None:
+                yield position / self.sample_rate, previous
+
+            error = process.stderr.read()
+            code = process.wait()
+            subprocess_exits.inc(command="ffmpeg", code=code)
+            if code != 0:
+                raise subprocess.CalledProcessError(
+                    code, self.command, stderr=error.decode(errors="replace")
+                )
+        finally:
+            # The reader stopped early or failed
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+            process.stdout.close()
+            process.stderr.close()
+
+
+def open_audio(audio: "AudioSource | str | Path") -> AudioSource:
+    """`audio` itself, or the wav at that path."""
+    if isinstance(audio, AudioSource):
+        return audio
+    return WavSource(audio)
+
+
+def resample(samples: np.ndarray, rate: int, target: int) -> np.ndarray:
+    """Linearly interpolate `samples` from `rate` to `target` Hz, keeping their scale."""
+    if rate == target or len(samples) == 0:
+        return samples.astype(np.float64)
+    length = max(int(len(samples) * target / rate), 1)
+    positions = np.arange(length) * (rate / target)
+    return np.interp(positions, np.arange(len(samples)), samples)
+
+
+def _wav_data(path: str) -> tuple[int, int]:
+    """Offset of the samples in a 16-bit mono PCM wav, and its sample rate."""
+    with open(path, "rb") as f:
+        riff, _, form = struct.unpack("<4sI4s", f.read(12))
+        if riff != b"RIFF" or form != b"WAVE":
+            raise ValueError(f"{path} is not a wav file")
+
+        sample_rate = None
+        while len(header := f.read(8)) == 8:
+            chunk, size = struct.unpack("<4sI", header)
+            if chunk == b"data":
+                if sample_rate is None:
+                    break
+                return f.tell(), sample_rate
+            if chunk == b"fmt ":
+                audio_format, channels, sample_rate, _, _, bits = struct.unpack(
+                    "<HHIIHH", f.read(16)
+                )
+                # WAVE_FORMAT_PCM or WAVE_FORMAT_EXTENSIBLE
+                if audio_format not in (1, 0xFFFE) or (channels, bits) != (1, 16):
+                    raise ValueError(f"{path} is not 16-bit mono PCM")
+                size -= 16
+            # Chunks are word aligned
+            f.seek(size + size % 2, 1)
+    raise ValueError(f"{path} has no audio data")
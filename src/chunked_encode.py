@@ -0,0 +1,202 @@
+import os
+import glob
+import shutil
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from logger import logger
+from utils import run_command
+import tracing
+
+
+def build_split_command(
+    input_path: str, chunk_pattern: str, chunk_duration: int, log_level: str = "error"
+) -> list[str]:
+    """ffmpeg cutting the video stream into keyframe-aligned chunks without re-encoding."""
+    return [
+        "ffmpeg",
+        "-hide_banner",
+        "-loglevel",
+        log_level,
+        "-i",
+        input_path,
+        "-map",
+        "0:v:0",
+        "-c",
+        "copy",
+        "-f",
+        "segment",
+        "-segment_time",
+        str(chunk_duration),
+        "-segment_format",
+        "matroska",
+        "-reset_timestamps",
+        "1",
+        "-y",
+        chunk_pattern,
+    ]
+
+
+def build_chunk_encode_command(
+    chunk_path: str, output_path: str, video_args: list[str], log_level: str = "error"
+) -> list[str]:
+    return [
+        "ffmpeg",
+        "-hide_banner",
+        "-loglevel",
+        log_level,
+        "-i",
+        chunk_path,
+        *video_args,
+        "-an",
+        "-y",
+        output_path,
+    ]
+
+
+def build_join_command(
+    list_path: str, audio_source: str, output_path: str, log_level: str = "error"
+) -> list[str]:
+    """ffmpeg joining the encoded chunks and copying the audio from the source.
+
+    Audio is never chunked, so there are no gaps at the chunk boundaries.
+    """
+    return [
+        "ffmpeg",
+        "-hide_banner",
+        "-loglevel",
+        log_level,
+        "-f",
+        "concat",
+        "-safe",
+        "0",
+        "-i",
+        list_path,
+        "-i",
+        audio_source,
+        "-map",
+        "0:v",
+        "-map",
+        "1:a?",
+        "-c",
+        "copy",
+        "-y",
+        output_path,
+    ]
+
+
+class ChunkEncoder(ABC):
+    """Encodes one chunk of video.
+
+    The chunked encode only hands out file paths and ffmpeg video options,
+    so a subclass can send chunks to another machine and fetch the result.
+    """
+
+    @abstractmethod
+    def encode(
+        self,
+        chunk_path: str,
+        output_path: str,
+        video_args: list[str],
+        log_level: str = "error",
+    ) -> bool:
+        """Encode `chunk_path` into `output_path`, returning whether it worked."""
+
+
+class LocalEncoder(ChunkEncoder):
+    """Encodes chunks with a local ffmpeg process."""
+
+    def encode(
+        self,
+        chunk_path: str,
+        output_path: str,
+        video_args: list[str],
+        log_level: str = "error",
+    ) -> bool:
+        command = build_chunk_encode_command(
+            chunk_path, output_path, video_args, log_level
+        )
+        return run_command(command).returncode == 0
+
+
+class ChunkedEncode:
+    """Re-encodes a video as chunks in parallel.
+
+    The video stream is split at keyframes into chunks of about
+    `chunk_duration` seconds, `workers` chunks are encoded at a time, and
+    the encoded chunks are joined with stream copy.
+    """
+
+    def __init__(
+        self,
+        encoder: ChunkEncoder | None = None,
+        chunk_duration: int = 120,
+        workers: int | None = None,
+    ):
+        self.encoder = encoder or LocalEncoder()
+        self.chunk_duration = chunk_duration
+        self.workers = workers or os.cpu_count() or 1
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(encoder={self.encoder.__class__.__name__}, chunk_duration={self.chunk_duration!r}, workers={self.workers!r})"
+
+    def run(
+        self,
+        input_path: str,
+        output_path: str,
+        video_args: list[str],
+        log_level: str = "error",
+    ) -> bool:
+        work_dir = f"{os.path.splitext(output_path)[0]}.chunks"
+        os.makedirs(work_dir, exist_ok=True)
+        try:
+            return self._run(input_path, output_path, video_args, log_level, work_dir)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    def _run(self, input_path, output_path, video_args, log_level, work_dir) -> bool:
+        pattern = os.path.join(work_dir, "chunk%05d.mkv")
+        command = build_split_command(
+            input_path, pattern, self.chunk_duration, log_level
+        )
+        if run_command(command).returncode != 0:
+            logger.error(f"Failed to split {input_path} into chunks")
+            return False
+
+        chunks = sorted(glob.glob(os.path.join(work_dir, "chunk*.mkv")))
+        if not chunks:
+            logger.error(f"Splitting {input_path} produced no chunks")
+            return False
+
+        outputs = [
+            os.path.join(work_dir, f"encoded_{os.path.basename(chunk)}")
+            for chunk in chunks
+        ]
+        logger.info(
+            f"Encoding {len(chunks)} chunks of {input_path} with {self.workers} workers"
+        )
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            results = list(
+                executor.map(
+                    tracing.wrap(
+                        lambda paths: self.encoder.encode(*paths, video_args, log_level)
+                    ),
+                    zip(chunks, outputs),
+                )
+            )
+
+        failed = [chunk for chunk, ok in zip(chunks, results) if not ok]
+        if failed:
+            logger.error(f"Failed to encode {len(failed)} of {len(chunks)} chunks")
+            return False
+
+        list_path = os.path.join(work_dir, "chunks.txt")
+        with open(list_path, "w", encoding="utf-8") as f:
+            for path in outputs:
+                escaped = os.path.abspath(path).replace("'", "'\\''")
+                f.write(f"file '{escaped}'\n")
+
+        command = build_join_command(list_path, input_path, output_path, log_level)
+        if run_command(command).returncode != 0:
+            logger.error(f"Failed to join the encoded chunks of {input_path}")
+            return False
+        return True
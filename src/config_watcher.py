@@ -0,0 +1,64 @@
+import os
+import glob
+import threading
+from typing import Callable
+from logger import logger
+
+
+class ConfigWatcher(threading.Thread):
+    """Polls the modification times of the *.ini files in a directory.
+
+    `on_change` is called with the names (without .ini) of every file that
+    was added, modified or deleted since the previous scan.
+    """
+
+    def __init__(
+        self,
+        on_change: Callable[[set[str]], None],
+        directory: str = ".",
+        interval: float = 5,
+    ):
+        super().__init__(name="config-watcher", daemon=True)
+        self.on_change = on_change
+        self.directory = directory
+        self.interval = interval
+        self.stop_event = threading.Event()
+        self.mtimes = self.scan()
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(directory={self.directory!r}, interval={self.interval!r})"
+
+    def scan(self) -> dict[str, int]:
+        mtimes = {}
+        for path in glob.glob(os.path.join(self.directory, "*.ini")):
+            try:
+                mtimes[os.path.basename(path)[:-4]] = os.stat(path).st_mtime_ns
+            except OSError:
+                continue  # Deleted between glob and stat
+        return mtimes
+
+    def check(self) -> set[str]:
+        """Scan once and return the names of changed files."""
+        mtimes = self.scan()
+        changed = {
+            name
+            for name in mtimes.keys() | self.mtimes.keys()
+            if mtimes.get(name) != self.mtimes.get(name)
+        }
+        self.mtimes = mtimes
+        return changed
+
+    def run(self) -> None:
+        while not self.stop_event.wait(self.interval):
+            changed = self.check()
+            if not changed:
+                continue
+
+            logger.info(f"Configuration changed: {', '.join(sorted(changed))}")
+            try:
+                self.on_change(changed)
+            except Exception:
+                logger.exception("Error applying configuration changes")
+
+    def stop(self) -> None:
+        self.stop_event.set()
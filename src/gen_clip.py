@@ -7,12 +7,21 @@ from concurrent.futures import ThreadPoolExecutor
 from settings import config, API_KEY
 from utils import run_command
 from logger import logger
+from artifact_cache import artifact_cache
+from metrics import llm_tokens, llm_seconds
+import tracing
 
 model_name = config.get(
     "clipception.llm", "model_name", fallback="deepseek/deepseek-chat"
 )
 temperature = config.getfloat("clipception.llm", "temperature", fallback=0.5)
 max_tokens = config.getint("clipception.llm", "max_tokens", fallback=4000)
+base_url = config.get(
+    "clipception.llm", "base_url", fallback="https://openrouter.ai/api/v1"
+)
+
+# Bump when the ranking prompt changes, cached rankings are keyed on it
+PROMPT_VERSION = 1
 
 
 def chunk_list(lst: list, chunk_size: int) -> list[list]:
@@ -47,7 +56,7 @@ def process_chunk(chunk_data: tuple[list[dict], int]) -> list[dict]:
 
 def rank_clips_chunk(clips: list[dict]) -> str:
     client = OpenAI(
-        base_url="https://openrouter.ai/api/v1",
+        base_url=base_url,
         api_key=API_KEY,
         default_headers={"HTTP-Referer": "http://localhost", "X-Title": "Py-AutoVod"},
     )
@@ -83,25 +92,46 @@ def rank_clips_chunk(clips: list[dict]) -> str:
     """
 
     for attempt in range(max_retries):
+        start = time.monotonic()
         try:
-            completion = client.chat.completions.create(
-                model=model_name,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a helpful assistant that ranks video clips. Keep explanations brief and focused on virality potential. Follow the format exactly.",
-                    },
-                    {"role": "user", "content": prompt},
-                ],
-                response_format={"type": "json_object"},
-                temperature=temperature,
-                max_tokens=max_tokens,
-            )
+            with tracing.span(
+                "llm_request", model=model_name, attempt=attempt + 1, clips=len(clips)
+            ) as span:
+                completion = client.chat.completions.create(
+                    model=model_name,
+                    messages=[
+                        {
+                            "role": "system",
+                            "content": "You are a helpful assistant that ranks video clips. Keep explanations brief and focused on virality potential. Follow the format exactly.",
+                        },
+                        {"role": "user", "content": prompt},
+                    ],
+                    response_format={"type": "json_object"},
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                )
+                usage = getattr(completion, "usage", None)
+                if span is not None and usage is not None:
+                    span.set(
+                        prompt_tokens=usage.prompt_tokens,
+                        completion_tokens=usage.completion_tokens,
+                    )
+            llm_seconds.observe(time.monotonic() - start, model=model_name, result="ok")
+            if usage is not None:
+                llm_tokens.inc(
+                    usage.prompt_tokens or 0, model=model_name, kind="prompt"
+                )
+                llm_tokens.inc(
+                    usage.completion_tokens or 0, model=model_name, kind="completion"
+                )
 
             if completion and completion.choices:
                 return completion.choices[0].message.content
 
         except Exception as e:
+            llm_seconds.observe(
+                time.monotonic() - start, model=model_name, result="error"
+            )
             if attempt < max_retries - 1:
                 logger.warning(
                     f"Attempt {attempt + 1} failed. Retrying in {retry_delay} seconds..."
@@ -132,7 +162,9 @@ def rank_all_clips_parallel(
 
     # Use ThreadPoolExecutor for parallel API calls
     with ThreadPoolExecutor(max_workers=num_processes) as executor:
-        futures = [executor.submit(process_chunk, data) for data in chunk_data]
+        futures = [
+            executor.submit(tracing.wrap(process_chunk), data) for data in chunk_data
+        ]
 
         for future in futures:
             try:
@@ -196,12 +228,27 @@ def generate_clips(
     num_processes=None,
 ):
     start_time = time.time()
+    cache_key = artifact_cache.key(
+        clips_json_path,
+        kind="ranking",
+        model_name=model_name,
+        temperature=temperature,
+        max_tokens=max_tokens,
+        prompt_version=PROMPT_VERSION,
+        num_clips=num_clips,
+        chunk_size=chunk_size,
+    )
+    if artifact_cache.restore(cache_key, output_file):
+        return
+
     clips: list[dict] = load_clips(clips_json_path)
 
     try:
         ranked_clips = rank_all_clips_parallel(clips, chunk_size, num_processes)
 
         save_top_clips_json(ranked_clips, output_file, num_clips)
+        if ranked_clips:
+            artifact_cache.store(cache_key, output_file)
 
         logger.info(f"Successfully saved top {num_clips} clips to {output_file}")
         logger.info(f"Total processing time: {time.time() - start_time:.2f} seconds")
@@ -241,7 +288,8 @@ def extract_clip(input_file, output_dir, clip_data):
             output_file,
         ]
 
-        result = run_command(cmd)
+        with tracing.span("extract_clip", name=clip_data["name"], start=start, end=end):
+            result = run_command(cmd)
 
         # Check if ffmpeg succeeded
         if result.returncode == 0 and os.path.exists(output_file):
@@ -0,0 +1,201 @@
+import os
+import time
+import threading
+from contextlib import contextmanager
+from logger import logger
+from settings import config
+from throughput import throughput
+from metrics import metrics
+import tracing
+
+SECTOR_SIZE = 512  # /proc/diskstats always counts 512 byte sectors
+
+
+def read_available_memory(path: str = "/proc/meminfo") -> int | None:
+    """Bytes of memory available for new work, None where /proc is missing."""
+    try:
+        with open(path) as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def read_disk_written(
+    path: str = "/proc/diskstats", sys_block: str = "/sys/block"
+) -> int | None:
+    """Bytes written to physical disks since boot, None where /proc is missing.
+
+    Only whole physical disks are counted, partitions and device-mapper or
+    loop devices would count the same writes twice.
+    """
+    try:
+        disks = {
+            name
+            for name in os.listdir(sys_block)
+            if os.path.exists(os.path.join(sys_block, name, "device"))
+        }
+        written = 0
+        with open(path) as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) > 9 and fields[2] in disks:
+                    written += int(fields[9]) * SECTOR_SIZE
+        return written
+    except (OSError, ValueError):
+        return None
+
+
+class ResourceGovernor:
+    """Admission control and a lower scheduling class for heavy processing.
+
+    Heavy work (encoding, transcription, clip extraction) only starts while
+    the load per core, available memory and disk write rate are within
+    limits, waiting up to `max_wait` seconds for them. It then runs niced
+    and kept off `reserve_cores` CPU cores per active recording, so the
+    recorders always have cores to themselves.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        max_load: float = 0.8,
+        min_free_memory: int = 1024**3,
+        max_disk_write: float = 200 * 1024**2,
+        reserve_cores: int = 1,
+        niceness: int = 10,
+        max_wait: float = 900,
+        poll_interval: float = 5,
+    ):
+        self.enabled = enabled
+        self.max_load = max_load
+        self.min_free_memory = min_free_memory
+        self.max_disk_write = max_disk_write
+        self.reserve_cores = reserve_cores
+        self.niceness = niceness
+        self.max_wait = max_wait
+        self.poll_interval = poll_interval
+        self.active = 0  # heavy jobs running now
+        self.lock = threading.Lock()
+        self.disk_sample: tuple[float, int] | None = None
+        self.disk_rate = 0.0
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(enabled={self.enabled!r}, max_load={self.max_load!r}, active={self.active!r})"
+
+    def _disk_write_rate(self) -> float:
+        """Bytes per second written since the previous call (at most once a second)."""
+        with self.lock:
+            now = time.monotonic()
+            if self.disk_sample is not None and now - self.disk_sample[0] < 1:
+                return self.disk_rate
+            written = read_disk_written()
+            if written is None:
+                return 0.0
+            if self.disk_sample is not None:
+                elapsed = now - self.disk_sample[0]
+                self.disk_rate = max(written - self.disk_sample[1], 0) / elapsed
+            self.disk_sample = (now, written)
+            return self.disk_rate
+
+    def check(self) -> str | None:
+        """Return why heavy work can't start right now, None if it can."""
+        try:
+            load = os.getloadavg()[0] / (os.cpu_count() or 1)
+        except OSError:
+            load = 0.0
+        if load > self.max_load:
+            return f"load {load:.2f} per core"
+
+        memory = read_available_memory()
+        if memory is not None and memory < self.min_free_memory:
+            return f"{memory / 1024**2:.0f} MB memory available"
+
+        rate = self._disk_write_rate()
+        if rate > self.max_disk_write:
+            return f"writing {rate / 1024**2:.0f} MB/s to disk"
+        return None
+
+    def admit(self, name: str = "") -> bool:
+        """Wait until heavy work may start. Returns False if `max_wait` ran out."""
+        if not self.enabled:
+            return True
+
+        deadline = time.monotonic() + self.max_wait
+        reason = self.check()
+        if reason is not None:
+            logger.info(f"Holding back {name or 'heavy work'}: {reason}")
+        while reason is not None:
+            if time.monotonic() >= deadline:
+                logger.warning(
+                    f"Starting {name or 'heavy work'} after waiting {self.max_wait:.0f}s: {reason}"
+                )
+                return False
+            time.sleep(self.poll_interval)
+            reason = self.check()
+        return True
+
+    def allowed_cores(self) -> set[int] | None:
+        """CPU cores heavy work may use, None where affinity is not supported."""
+        if not self.enabled or not hasattr(os, "sched_getaffinity"):
+            return None
+        # The main thread is never pinned, its cores are the ones the process may use
+        cores = sorted(os.sched_getaffinity(os.getpid()))
+        reserved = min(self.reserve_cores * throughput.active_count(), len(cores) - 1)
+        # Recorders keep the first cores, heavy work gets the rest
+        return set(cores[max(reserved, 0) :])
+
+    def _lower(self, target: int, cores: set[int] | None) -> None:
+        """Nice `target` (0 for the calling process) and pin it to `cores`."""
+        try:
+            os.setpriority(os.PRIO_PROCESS, target, self.niceness)
+        except (OSError, AttributeError):
+            pass
+        if cores is not None:
+            try:
+                os.sched_setaffinity(target, cores)
+            except OSError:
+                pass
+
+    @contextmanager
+    def heavy(self, name: str = ""):
+        """Run the enclosed work, in the current thread, as heavy work.
+
+        The thread stays niced afterwards, unprivileged processes can't undo
+        it, and commands it starts inherit its class. Only use this in threads
+        dedicated to processing.
+        """
+        with tracing.span("wait_for_resources") as span:
+            admitted = self.admit(name)
+            if span is not None:
+                span.set(admitted=admitted)
+        if self.enabled:
+            self._lower(threading.get_native_id(), self.allowed_cores())
+        with self.lock:
+            self.active += 1
+        try:
+            yield
+        finally:
+            with self.lock:
+                self.active -= 1
+
+
+governor = ResourceGovernor(
+    enabled=config.getboolean("governor", "enabled", fallback=True),
+    max_load=config.getfloat("governor", "max_load", fallback=0.8),
+    min_free_memory=int(
+        config.getfloat("governor", "min_free_memory_mb", fallback=1024) * 1024**2
+    ),
+    max_disk_write=config.getfloat("governor", "max_disk_write_mb", fallback=200)
+    * 1024**2,
+    reserve_cores=config.getint("governor", "reserve_cores_per_recording", fallback=1),
+    niceness=config.getint("governor", "niceness", fallback=10),
+    max_wait=config.getfloat("governor", "max_wait", fallback=900),
+    poll_interval=config.getfloat("governor", "poll_interval", fallback=5),
+)
+
+metrics.gauge(
+    "heavy_jobs", "Heavy processing jobs running now.", function=lambda: governor.active
+)
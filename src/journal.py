@@ -0,0 +1,143 @@
+import os
+import time
+import sqlite3
+import threading
+from logger import logger
+from pipeline import Job
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    source_path TEXT NOT NULL,
+    streamer_name TEXT,
+    video_path TEXT NOT NULL,
+    transcription_path TEXT,
+    clips_path TEXT,
+    completed_stage TEXT,
+    finished INTEGER NOT NULL DEFAULT 0,
+    created REAL NOT NULL,
+    updated REAL NOT NULL,
+    audio_path TEXT,
+    duration REAL
+)
+"""
+
+
+class JobJournal:
+    """On-disk record of every queued recording and the stages it completed.
+
+    Each stage checkpoint stores the job's artifacts, so after a restart a
+    job resumes at its first incomplete stage with the files the earlier
+    stages already produced. The database is opened on first use, so
+    creating a journal touches nothing on disk.
+    """
+
+    def __init__(self, path: str = "recordings/jobs.db", enabled: bool = True):
+        self.path = path
+        self.enabled = enabled
+        self.failed = False  # opening failed, don't retry on every query
+        self.lock = threading.Lock()
+        self.connection: sqlite3.Connection | None = None
+
+    def __repr__(self):
+        return (
+            f"{self.__class__.__name__}(path={self.path!r}, enabled={self.enabled!r})"
+        )
+
+    def _open(self) -> bool:
+        """Connect to the database unless connected. Called with the lock held."""
+        if self.connection is not None:
+            return True
+        if not self.enabled or self.failed:
+            return False
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self.connection = sqlite3.connect(self.path, check_same_thread=False)
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute(SCHEMA)
+            self.connection.commit()
+            return True
+        except sqlite3.Error:
+            logger.exception(
+                f"Failed to open job journal {self.path}, jobs are not saved"
+            )
+            self.failed = True
+            self.connection = None
+            return False
+
+    def _execute(self, query: str, parameters: tuple = ()) -> sqlite3.Cursor | None:
+        with self.lock:
+            if not self._open():
+                return None
+            try:
+                cursor = self.connection.execute(query, parameters)
+                self.connection.commit()
+                return cursor
+            except sqlite3.Error:
+                logger.exception(f"Job journal query failed: {query.split()[0]}")
+                return None
+
+    def add(self, job: Job) -> None:
+        now = time.time()
+        cursor = self._execute(
+            "INSERT INTO jobs (source_path, streamer_name, video_path, duration,"
+            " created, updated) VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                job.source_path,
+                job.streamer_name,
+                job.video_path,
+                job.duration,
+                now,
+                now,
+            ),
+        )
+        if cursor is not None:
+            job.id = cursor.lastrowid
+
+    def checkpoint(self, job: Job, stage: str, finished: bool = False) -> None:
+        """Record that `job` completed `stage`, along with its current artifacts."""
+        if job.id is None:
+            return
+        self._execute(
+            "UPDATE jobs SET video_path = ?, audio_path = ?, transcription_path = ?,"
+            " clips_path = ?, completed_stage = ?, finished = ?, updated = ?"
+            " WHERE id = ?",
+            (
+                job.video_path,
+                job.audio_path,
+                job.transcription_path,
+                job.clips_path,
+                stage,
+                int(finished),
+                time.time(),
+                job.id,
+            ),
+        )
+
+    def pending(self) -> list[tuple[Job, str | None]]:
+        """Unfinished jobs in queue order, each with the last stage it completed.
+
+        Jobs are returned without their streamer config, the caller loads it.
+        """
+        cursor = self._execute(
+            "SELECT id, source_path, streamer_name, video_path, transcription_path,"
+            " clips_path, completed_stage, audio_path, duration FROM jobs"
+            " WHERE finished = 0 ORDER BY id"
+        )
+        if cursor is None:
+            return []
+
+        jobs = []
+        for row in cursor.fetchall():
+            job = Job(row[1], row[2], None, duration=row[8])
+            job.id = row[0]
+            job.video_path, job.transcription_path, job.clips_path = row[3:6]
+            job.audio_path = row[7]
+            jobs.append((job, row[6]))
+        return jobs
+
+    def close(self) -> None:
+        if self.connection is not None:
+            with self.lock:
+                self.connection.close()
+                self.connection = None
@@ -0,0 +1,183 @@
+import os
+import json
+import time
+import threading
+from logger import logger
+from settings import CLIPCEPTION_ENABLED
+import transcription
+from transcription import transcribe_with_features, loaded_model
+from audio_source import FfmpegSource
+from model_pool import transcription_worker
+from gen_clip import rank_all_clips_parallel, extract_clip, save_top_clips_json
+
+
+def live_clipping_enabled(streamer_config) -> bool:
+    """Whether clips are made while recording instead of after the stream ends.
+
+    Split recordings are already processed part by part, so they keep the
+    regular clipception step.
+    """
+    return (
+        CLIPCEPTION_ENABLED
+        and streamer_config.getboolean("clipception", "enabled", fallback=False)
+        and streamer_config.getboolean("clipception", "live", fallback=False)
+        and not streamer_config.getboolean("video", "split_into_parts", fallback=False)
+    )
+
+
+class LiveClipper(threading.Thread):
+    """Clips a recording while it is still being written.
+
+    Every `window` seconds of recording the newest window of audio is
+    transcribed and appended to the transcription, then the segments from the
+    last `horizon` seconds are ranked and clips scoring at least `min_score`
+    are extracted. A window is only read once the recording is `lag` seconds
+    past its end, so the muxer has flushed it to disk.
+    """
+
+    def __init__(
+        self,
+        video_path: str,
+        streamer_name: str,
+        window: float = 300,
+        horizon: float = 900,
+        min_score: float = 7,
+        lag: float = 30,
+        chunk_size: int = 10,
+    ):
+        super().__init__(name=f"clip-{streamer_name}", daemon=True)
+        self.video_path = video_path
+        self.streamer_name = streamer_name
+        self.window = window
+        self.horizon = horizon
+        self.min_score = min_score
+        self.lag = lag
+        self.chunk_size = chunk_size
+
+        base = os.path.splitext(video_path)[0]
+        self.transcription_path = f"{base}.enhanced_transcription.json"
+        self.clips_path = f"{base}.top_clips.json"
+        self.clips_dir = os.path.join(os.path.dirname(video_path), "clips")
+
+        self.device = "cpu"
+        self.segments: list[dict] = []
+        self.clips: list[dict] = []  # clips extracted so far
+        self.processed = 0.0  # seconds of recording already transcribed
+        self.started: float | None = None  # when the recording got its first bytes
+        self.stop_event = threading.Event()
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(video_path={self.video_path!r}, processed={self.processed!r}, clips={len(self.clips)!r})"
+
+    def _transcribe(self, audio: FfmpegSource, start: float) -> list[dict]:
+        # The model stays loaded in the pool between windows
+        self.device = transcription.device if transcription.check_cuda() else "cpu"
+        with loaded_model(self.device) as model:
+            return transcribe_with_features(model, audio, self.device, offset=start)
+
+    @classmethod
+    def from_config(cls, video_path: str, streamer_name: str, streamer_config):
+        return cls(
+            video_path,
+            streamer_name,
+            window=streamer_config.getfloat("clipception", "live_window", fallback=300),
+            horizon=streamer_config.getfloat(
+                "clipception", "live_horizon", fallback=900
+            ),
+            min_score=streamer_config.getfloat(
+                "clipception", "live_min_score", fallback=7
+            ),
+            lag=streamer_config.getfloat("clipception", "live_lag", fallback=30),
+        )
+
+    def elapsed(self) -> float:
+        if self.started is None:
+            return 0.0
+        return time.monotonic() - self.started
+
+    def _wait_for_recording(self) -> bool:
+        while not self.stop_event.is_set():
+            try:
+                if os.path.getsize(self.video_path) > 0:
+                    self.started = time.monotonic()
+                    return True
+            except OSError:
+                pass
+            self.stop_event.wait(1)
+        return False
+
+    def run(self) -> None:
+        if not self._wait_for_recording():
+            return
+
+        while not self.stop_event.wait(1):
+            if self.elapsed() >= self.processed + self.window + self.lag:
+                self._step(self.window)
+
+        # The recording ended, pick up whatever is left after the last window
+        remaining = self.elapsed() - self.processed
+        if remaining >= 1:
+            self._step(remaining)
+
+        logger.info(
+            f"Live clipping of {self.streamer_name} finished with {len(self.clips)} clips"
+        )
+
+    def _step(self, duration: float) -> None:
+        try:
+            self.process_window(self.processed, duration)
+        except Exception:
+            logger.exception(f"Live clipping failed for {self.video_path}")
+        self.processed += duration
+
+    def process_window(self, start: float, duration: float) -> list[dict]:
+        """Transcribe `duration` seconds from `start`, then rank and extract clips.
+
+        Returns the clips extracted from this window.
+        """
+        logger.info(
+            f"Live clipping {self.streamer_name} {start:.0f}s-{start + duration:.0f}s"
+        )
+        # Decoded straight from the recording, no temporary wav
+        audio = FfmpegSource(self.video_path, start, duration)
+        segments = transcription_worker.call(self._transcribe, audio, start)
+        self.segments.extend(segments)
+        with open(self.transcription_path, "w", encoding="utf-8") as f:
+            json.dump(self.segments, f, indent=2, ensure_ascii=False)
+
+        candidates = [
+            segment
+            for segment in self.segments
+            if segment["end"] >= start + duration - self.horizon
+        ]
+        if not candidates:
+            return []
+
+        ranked = rank_all_clips_parallel(candidates, self.chunk_size)
+        extracted = []
+        for clip in ranked:
+            if float(clip["score"]) < self.min_score or self._overlaps(clip):
+                continue
+            success, _ = extract_clip(self.video_path, self.clips_dir, clip)
+            if success:
+                self.clips.append(clip)
+                extracted.append(clip)
+
+        if extracted:
+            save_top_clips_json(self.clips, self.clips_path, len(self.clips))
+        return extracted
+
+    def _overlaps(self, clip: dict) -> bool:
+        """Whether the clip overlaps one that was already extracted.
+
+        A moment stays in the horizon for several windows, it is clipped once.
+        """
+        start, end = float(clip["start"]), float(clip["end"])
+        return any(
+            start < float(other["end"]) and float(other["start"]) < end
+            for other in self.clips
+        )
+
+    def stop(self) -> None:
+        """Stop after processing the rest of the recording."""
+        self.stop_event.set()
@@ -0,0 +1,299 @@
+import os
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from logger import logger
+from settings import config
+from utils import StreamPlatform
+from rate_limit import limiter
+
+TWITCH_GQL_URL = "https://gql.twitch.tv/gql"
+# Public web client id, the same one streamlink uses for anonymous GQL access.
+# Overridden by [live_status] twitch_client_id or the TWITCH_CLIENT_ID variable.
+TWITCH_CLIENT_ID = "kimne78kx3ncx6brgo4mv6wki5h1ko"
+TWITCH_BATCH_SIZE = 100  # GQL users(logins:) limit
+KICK_API_URL = "https://kick.com/api/v2"
+KICK_WORKERS = 16  # concurrent Kick requests, one per pooled connection
+
+
+class LiveStatusService:
+    """Checks the live status of many channels per request, batched per platform.
+
+    Monitors register their channel once. The first monitor to ask for a stale
+    result refreshes every stale channel of that platform in one batch, the
+    others are answered from the cache or wait for the refresh already
+    checking their channel. A failed Twitch batch is retried one channel at a
+    time, so one bad channel doesn't hide the status of the others. Platforms
+    without an API checker (or a failed request) return None so callers can
+    fall back to streamlink.
+    """
+
+    def __init__(
+        self,
+        ttl: float = 60,
+        enabled: bool = True,
+        twitch_gql_url: str = TWITCH_GQL_URL,
+        kick_api_url: str = KICK_API_URL,
+        timeout: float = 10,
+        twitch_client_id: str = TWITCH_CLIENT_ID,
+    ):
+        self.ttl = ttl
+        self.enabled = enabled
+        self.twitch_gql_url = twitch_gql_url
+        self.kick_api_url = kick_api_url.rstrip("/")
+        self.timeout = timeout
+        self.twitch_client_id = twitch_client_id
+
+        # One pooled session, connections are kept alive between refreshes
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=KICK_WORKERS)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({"User-Agent": "Py-AutoVod"})
+
+        self.channels: dict[StreamPlatform, set[str]] = {}
+        self.results: dict[tuple[StreamPlatform, str], tuple[float, bool, dict]] = {}
+        self.lock = threading.Lock()
+        # Channels being checked right now, set once their result is stored
+        self.refreshing: dict[tuple[StreamPlatform, str], threading.Event] = {}
+        self.checkers = {
+            StreamPlatform.TWITCH: self._check_twitch,
+            StreamPlatform.KICK: self._check_kick,
+        }
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(enabled={self.enabled!r}, ttl={self.ttl!r})"
+
+    def supports(self, platform: StreamPlatform | None) -> bool:
+        return self.enabled and platform in self.checkers
+
+    def register(self, platform: StreamPlatform | None, name: str) -> None:
+        if not self.supports(platform):
+            return
+        with self.lock:
+            self.channels.setdefault(platform, set()).add(name.strip().lower())
+
+    def unregister(self, platform: StreamPlatform | None, name: str) -> None:
+        name = name.strip().lower()
+        with self.lock:
+            self.channels.get(platform, set()).discard(name)
+            self.results.pop((platform, name), None)
+
+    def is_live(self, platform: StreamPlatform | None, name: str) -> bool | None:
+        """Return the cached live status, refreshing the whole platform batch if stale."""
+        if not self.supports(platform):
+            return None
+
+        name = name.strip().lower()
+        self.register(platform, name)
+
+        cached = self.results.get((platform, name))
+        if self._fresh(cached, time.monotonic()):
+            return cached[1]
+
+        self.refresh(platform, name)
+        cached = self.results.get((platform, name))
+        return cached[1] if cached else None
+
+    def _fresh(self, cached: tuple | None, now: float) -> bool:
+        return cached is not None and now - cached[0] < self.ttl
+
+    def check_now(self, platform: StreamPlatform | None, name: str) -> bool | None:
+        """Check one channel right away, bypassing and updating the cache."""
+        if not self.supports(platform):
+            return None
+
+        name = name.strip().lower()
+        status = self.check_many(platform, [name]).get(name)
+        if status is None:
+            return None
+        live, metadata = status
+        self.results[(platform, name)] = (time.monotonic(), live, metadata)
+        return live
+
+    def get_metadata(self, platform: StreamPlatform | None, name: str) -> dict:
+        cached = self.results.get((platform, name.strip().lower()))
+        return dict(cached[2]) if cached else {}
+
+    def refresh(self, platform: StreamPlatform, name: str | None = None) -> None:
+        """Check the stale channels of `platform` nobody is checking yet.
+
+        If another thread is already checking `name`, wait for its result
+        instead. No lock is held while the checks wait for the rate limiter.
+        """
+        now = time.monotonic()
+        done = threading.Event()
+        with self.lock:
+            names = [
+                channel
+                for channel in sorted(self.channels.get(platform, set()))
+                if (platform, channel) not in self.refreshing
+                and not self._fresh(self.results.get((platform, channel)), now)
+            ]
+            for channel in names:
+                self.refreshing[(platform, channel)] = done
+            pending = self.refreshing.get((platform, name)) if name else None
+
+        if pending is not None and pending is not done:
+            pending.wait(self.timeout + limiter.max_wait)
+        if not names:
+            return
+
+        try:
+            statuses = self.check_many(platform, names)
+            now = time.monotonic()
+            with self.lock:
+                for channel, status in statuses.items():
+                    if status is None:
+                        self.results.pop((platform, channel), None)
+                        continue
+                    live, metadata = status
+                    self.results[(platform, channel)] = (now, live, metadata)
+        finally:
+            with self.lock:
+                for channel in names:
+                    self.refreshing.pop((platform, channel), None)
+            done.set()
+
+    def check_many(
+        self, platform: StreamPlatform, names: list[str]
+    ) -> dict[str, tuple[bool, dict] | None]:
+        """Check several channels of one platform. None marks an unknown status."""
+        checker = self.checkers.get(platform)
+        if not checker:
+            return {name: None for name in names}
+
+        start = time.monotonic()
+        try:
+            statuses = checker(names)
+        except (requests.RequestException, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"{platform.value} live status check failed: {e}")
+            return {name: None for name in names}
+
+        logger.debug(
+            f"Checked {len(names)} {platform.value} channels in {time.monotonic() - start:.2f}s"
+        )
+        return statuses
+
+    def _check_twitch(self, names: list[str]) -> dict[str, tuple[bool, dict] | None]:
+        statuses: dict[str, tuple[bool, dict] | None] = {}
+        for i in range(0, len(names), TWITCH_BATCH_SIZE):
+            batch = names[i : i + TWITCH_BATCH_SIZE]
+            try:
+                statuses.update(self._check_twitch_batch(batch))
+            except (requests.RequestException, ValueError, KeyError, TypeError) as e:
+                if len(batch) == 1:
+                    raise
+                logger.warning(
+                    f"Twitch live status check of {len(batch)} channels failed, "
+                    f"checking them one by one: {e}"
+                )
+                for name in batch:
+                    statuses[name] = self._check_twitch_channel(name)
+        return statuses
+
+    def _check_twitch_channel(self, name: str) -> tuple[bool, dict] | None:
+        try:
+            return self._check_twitch_batch([name])[name]
+        except (requests.RequestException, ValueError, KeyError, TypeError) as e:
+            logger.debug(f"Twitch live status check failed for {name}: {e}")
+            return None
+
+    def _check_twitch_batch(
+        self, batch: list[str]
+    ) -> dict[str, tuple[bool, dict] | None]:
+        limiter.acquire(StreamPlatform.TWITCH)
+        query = (
+            "query { users(logins: %s) { login stream { id title type game { name } } } }"
+            % json.dumps(batch)
+        )
+        response = self.session.post(
+            self.twitch_gql_url,
+            json={"query": query},
+            headers={
+                "Client-ID": self.twitch_client_id,
+                "Content-Type": "application/json",
+            },
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        users = response.json()["data"]["users"]
+
+        statuses: dict[str, tuple[bool, dict] | None] = {}
+        found = {user["login"].lower(): user for user in users if user}
+        for name in batch:
+            user = found.get(name)
+            stream = user.get("stream") if user else None
+            if not stream or stream.get("type", "live") != "live":
+                statuses[name] = (False, {})
+                continue
+            game = stream.get("game") or {}
+            statuses[name] = (
+                True,
+                {
+                    "id": stream.get("id"),
+                    "title": stream.get("title") or "",
+                    "author": user.get("login"),
+                    "category": game.get("name"),
+                },
+            )
+        return statuses
+
+    def _check_kick(self, names: list[str]) -> dict[str, tuple[bool, dict] | None]:
+        # Kick has no anonymous batch endpoint, check the channels side by side
+        # on the pooled session
+        with ThreadPoolExecutor(
+            max_workers=min(len(names), KICK_WORKERS), thread_name_prefix="kick"
+        ) as executor:
+            return dict(zip(names, executor.map(self._check_kick_channel, names)))
+
+    def _check_kick_channel(self, name: str) -> tuple[bool, dict] | None:
+        # Unknown rather than wait long for a slot, the next refresh retries it
+        if not limiter.acquire(StreamPlatform.KICK, limiter.max_wait):
+            return None
+        try:
+            response = self.session.get(
+                f"{self.kick_api_url}/channels/{name}", timeout=self.timeout
+            )
+            if response.status_code == 404:
+                return (False, {})
+            response.raise_for_status()
+            livestream = response.json().get("livestream")
+        except (requests.RequestException, ValueError) as e:
+            logger.debug(f"Kick live status check failed for {name}: {e}")
+            return None
+
+        if not livestream or not livestream.get("is_live", True):
+            return (False, {})
+        categories = livestream.get("categories") or [{}]
+        return (
+            True,
+            {
+                "id": str(livestream.get("id", "")) or None,
+                "title": livestream.get("session_title") or "",
+                "author": name,
+                "category": categories[0].get("name"),
+            },
+        )
+
+
+# Results only need to live for half of the shortest poll interval
+_poll_interval = config.getint("general", "retry_delay", fallback=120)
+if config.getboolean("polling", "adaptive", fallback=False):
+    _poll_interval = min(
+        _poll_interval, config.getfloat("polling", "min_delay", fallback=30)
+    )
+
+live_status = LiveStatusService(
+    ttl=max(_poll_interval / 2, 1),
+    enabled=config.getboolean("live_status", "enabled", fallback=True),
+    twitch_gql_url=config.get("live_status", "twitch_gql_url", fallback=TWITCH_GQL_URL),
+    kick_api_url=config.get("live_status", "kick_api_url", fallback=KICK_API_URL),
+    timeout=config.getfloat("live_status", "timeout", fallback=10),
+    twitch_client_id=os.getenv("TWITCH_CLIENT_ID")
+    or config.get("live_status", "twitch_client_id", fallback="")
+    or TWITCH_CLIENT_ID,
+)
@@ -5,7 +5,8 @@ import sys
 import argparse
 from logger import logger
 from utils import get_version_from_toml
-from settings import CLIPCEPTION_ENABLED
+from settings import config, CLIPCEPTION_ENABLED
+from metrics import metrics, MetricsExporter
 from stream_manager import StreamManager
 
 
@@ -41,6 +42,13 @@ def main() -> int:
 
     logger.info(f"Clipception Enabled: {CLIPCEPTION_ENABLED}")
 
+    if config.getboolean("metrics", "enabled", fallback=False):
+        MetricsExporter(
+            metrics,
+            config.get("metrics", "host", fallback="127.0.0.1"),
+            config.getint("metrics", "port", fallback=9464),
+        ).start()
+
     manager = StreamManager()
     manager.start(args.name) if args.name else manager.start()
     manager.wait()
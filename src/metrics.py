@@ -0,0 +1,305 @@
+import math
+import time
+import threading
+from collections.abc import Callable
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from logger import logger
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds, from a quick probe to a multi-hour transcription
+DEFAULT_BUCKETS = (0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 300, 900, 1800, 3600, 7200)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values))
+    return f"{{{pairs}}}"
+
+
+def _format_value(value: float) -> str:
+    # Prometheus text format spellings, int() would raise on these
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Metric:
+    """A named metric with a value per combination of label values.
+
+    Instead of being updated, a metric can read its values from `function`
+    when scraped, which returns one value, or a dict from label value tuples
+    to values.
+    """
+
+    type = "untyped"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: tuple[str, ...] = (),
+        function: Callable[[], float | dict[tuple, float]] | None = None,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self.function = function
+        self.values: dict[tuple[str, ...], float] = {}
+        self.lock = threading.Lock()
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(name={self.name!r}, labels={self.label_names!r})"
+
+    def _key(self, labels: dict) -> tuple[str, ...]:
+        if set(labels) != set(self.label_names):
+            raise ValueError(
+                f"{self.name} takes labels {self.label_names}, got {tuple(labels)}"
+            )
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def samples(self) -> list[tuple[str, tuple[str, ...], float]]:
+        """(suffix, label values, value) of every sample, for rendering."""
+        if self.function is not None:
+            try:
+                values = self.function()
+            except Exception:
+                logger.exception(f"Failed to collect metric {self.name}")
+                return []
+            if not isinstance(values, dict):
+                values = {(): values}
+            return [
+                ("", tuple(str(v) for v in key), value) for key, value in values.items()
+            ]
+        with self.lock:
+            return [("", key, value) for key, value in sorted(self.values.items())]
+
+    def render(self) -> list[str]:
+        lines = [
+            f"# HELP {self.name} {_escape(self.documentation)}",
+            f"# TYPE {self.name} {self.type}",
+        ]
+        for suffix, key, value in self.samples():
+            names = self.label_names
+            if suffix == "_bucket":
+                names = (*names, "le")
+            labels = _format_labels(names, key)
+            lines.append(f"{self.name}{suffix}{labels} {_format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def get(self, **labels) -> float:
+        with self.lock:
+            return self.values.get(self._key(labels), 0)
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        with self.lock:
+            self.values[self._key(labels)] = value
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labels)
+        self.buckets = (*sorted(buckets), math.inf)
+        # label values -> (bucket counts, sum)
+        self.observations: dict[tuple[str, ...], tuple[list[int], float]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self.lock:
+            counts, total = self.observations.get(key, ([0] * len(self.buckets), 0.0))
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+            self.observations[key] = (counts, total + value)
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe how long the enclosed block takes."""
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(time.monotonic() - start, **labels)
+
+    def count(self, **labels) -> int:
+        with self.lock:
+            counts, _ = self.observations.get(self._key(labels), ([0], 0.0))
+            return counts[-1]
+
+    def samples(self) -> list[tuple[str, tuple[str, ...], float]]:
+        samples = []
+        with self.lock:
+            for key, (counts, total) in sorted(self.observations.items()):
+                for bound, count in zip(self.buckets, counts):
+                    samples.append(("_bucket", (*key, _format_value(bound)), count))
+                samples.append(("_sum", key, total))
+                samples.append(("_count", key, counts[-1]))
+        return samples
+
+
+class MetricsRegistry:
+    """All metrics of the process, rendered in the Prometheus text format."""
+
+    def __init__(self, prefix: str = "autovod_"):
+        self.prefix = prefix
+        self.metrics: dict[str, Metric] = {}
+        self.lock = threading.Lock()
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(metrics={len(self.metrics)!r})"
+
+    def _register(self, metric: Metric) -> Metric:
+        with self.lock:
+            # Registering twice returns the first metric, modules may be reloaded
+            return self.metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, documentation: str, labels=(), function=None):
+        return self._register(
+            Counter(self.prefix + name, documentation, labels, function)
+        )
+
+    def gauge(self, name: str, documentation: str, labels=(), function=None):
+        return self._register(
+            Gauge(self.prefix + name, documentation, labels, function)
+        )
+
+    def histogram(
+        self, name: str, documentation: str, labels=(), buckets=DEFAULT_BUCKETS
+    ):
+        return self._register(
+            Histogram(self.prefix + name, documentation, labels, buckets)
+        )
+
+    def render(self) -> str:
+        with self.lock:
+            metrics = list(self.metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class MetricsExporter:
+    """Serves the registry at /metrics from a background HTTP server."""
+
+    def __init__(self, registry: MetricsRegistry, host="127.0.0.1", port=9464):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self.server: ThreadingHTTPServer | None = None
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(host={self.host!r}, port={self.port!r})"
+
+    def start(self) -> None:
+        registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = registry.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        try:
+            self.server = ThreadingHTTPServer((self.host, self.port), Handler)
+        except OSError:
+            logger.exception(f"Failed to serve metrics on {self.host}:{self.port}")
+            return
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        threading.Thread(
+            target=self.server.serve_forever, name="metrics", daemon=True
+        ).start()
+        logger.info(f"Serving metrics at http://{self.host}:{self.port}/metrics")
+
+    def stop(self) -> None:
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+
+metrics = MetricsRegistry()
+
+probes = metrics.counter(
+    "probes_total",
+    "Liveness probes by platform, method and result.",
+    ("platform", "method", "result"),
+)
+probe_seconds = metrics.histogram(
+    "probe_duration_seconds",
+    "Duration of liveness probes.",
+    ("platform", "method"),
+    buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+go_live_seconds = metrics.histogram(
+    "go_live_to_first_byte_seconds",
+    "Time from detecting a stream to its first recorded byte.",
+    ("platform",),
+    buckets=(0.5, 1, 2, 5, 10, 20, 30, 60),
+)
+stage_seconds = metrics.histogram(
+    "stage_duration_seconds",
+    "Time a recording spends in each processing stage.",
+    ("stage",),
+)
+stage_wait_seconds = metrics.histogram(
+    "stage_wait_seconds",
+    "Time a recording waits in the queue of each processing stage.",
+    ("stage",),
+)
+subprocess_exits = metrics.counter(
+    "subprocess_exits_total",
+    "Exit codes of ffmpeg and streamlink processes.",
+    ("command", "code"),
+)
+llm_tokens = metrics.counter(
+    "llm_tokens_total", "Tokens used by clip ranking requests.", ("model", "kind")
+)
+llm_seconds = metrics.histogram(
+    "llm_request_duration_seconds",
+    "Duration of clip ranking requests.",
+    ("model", "result"),
+    buckets=(0.5, 1, 2.5, 5, 10, 20, 30, 60, 120),
+)
@@ -0,0 +1,187 @@
+import gc
+import time
+import queue
+import threading
+from collections.abc import Callable
+from contextlib import contextmanager, nullcontext
+from concurrent.futures import Future
+from logger import logger
+from settings import config
+
+# (engine, model_size, device, compute_type)
+ModelKey = tuple[str, str, str, str]
+
+
+class PooledModel:
+    def __init__(self):
+        self.model = None
+        self.users = 0  # callers holding the model right now
+        self.last_used = time.monotonic()
+        self.lock = threading.Lock()  # held while the model loads
+        self.busy = threading.Lock()  # held by exclusive users of the model
+
+
+class ModelPool:
+    """Transcription models kept loaded across jobs.
+
+    A model is loaded by the first `acquire` of its key and shared by every
+    later one. Once nobody holds it for `ttl` seconds it is dropped, with a
+    ttl of 0 it is dropped as soon as it is released.
+    """
+
+    def __init__(self, ttl: float = 900):
+        self.ttl = ttl
+        self.models: dict[ModelKey, PooledModel] = {}
+        self.lock = threading.Lock()
+        self.reaper: threading.Thread | None = None
+        self.on_evict: Callable[[ModelKey], None] | None = None
+
+    def __repr__(self):
+        return (
+            f"{self.__class__.__name__}(ttl={self.ttl!r}, models={list(self.models)!r})"
+        )
+
+    def acquire(self, key: ModelKey, load: Callable[[], object]):
+        """The model for `key`, loaded with `load` if it isn't yet.
+
+        Every acquire must be paired with a `release` of the same key.
+        """
+        with self.lock:
+            entry = self.models.setdefault(key, PooledModel())
+            entry.users += 1
+
+        # Loading holds only this key, other models are handed out meanwhile
+        with entry.lock:
+            if entry.model is None:
+                try:
+                    entry.model = load()
+                except BaseException:
+                    with self.lock:
+                        entry.users -= 1
+                        if entry.users == 0 and self.models.get(key) is entry:
+                            del self.models[key]
+                    raise
+            else:
+                logger.debug(f"Reusing loaded {key[0]} {key[1]} model on {key[2]}")
+
+        self._start_reaper()
+        return entry.model
+
+    @contextmanager
+    def use(self, key: ModelKey, load: Callable[[], object], exclusive: bool = False):
+        """Hold the model for `key` for the enclosed block.
+
+        With `exclusive` callers take turns, for models that can't run two
+        inferences at once.
+        """
+        model = self.acquire(key, load)
+        try:
+            with self.models[key].busy if exclusive else nullcontext():
+                yield model
+        finally:
+            self.release(key)
+
+    def release(self, key: ModelKey) -> None:
+        with self.lock:
+            entry = self.models.get(key)
+            if entry is None:
+                return
+            entry.users = max(entry.users - 1, 0)
+            entry.last_used = time.monotonic()
+        if self.ttl <= 0:
+            self.evict_idle()
+
+    def evict_idle(self, now: float | None = None) -> list[ModelKey]:
+        """Drop the models nobody held for `ttl` seconds and return their keys."""
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            evicted = [
+                key
+                for key, entry in self.models.items()
+                if entry.users == 0
+                and entry.model is not None
+                and now - entry.last_used >= self.ttl
+            ]
+            for key in evicted:
+                del self.models[key]
+
+        if evicted:
+            gc.collect()
+        for key in evicted:
+            logger.info(f"Unloaded idle {key[0]} {key[1]} model on {key[2]}")
+            if self.on_evict is not None:
+                self.on_evict(key)
+        return evicted
+
+    def clear(self) -> None:
+        """Drop every model nobody holds, regardless of the ttl."""
+        self.evict_idle(now=float("inf"))
+
+    def _start_reaper(self) -> None:
+        with self.lock:
+            if self.ttl <= 0 or (self.reaper and self.reaper.is_alive()):
+                return
+            self.reaper = threading.Thread(
+                target=self._reap, name="model-reaper", daemon=True
+            )
+            self.reaper.start()
+
+    def _reap(self) -> None:
+        interval = min(max(self.ttl / 4, 1), 60)
+        while True:
+            time.sleep(interval)
+            self.evict_idle()
+            with self.lock:
+                if not self.models:
+                    self.reaper = None
+                    return
+
+
+class TranscriptionWorker(threading.Thread):
+    """A long-lived thread running every transcription submitted to it.
+
+    Processing stages and live clippers hand their transcriptions to this
+    one thread instead of running them side by side, so they share one warm
+    model and never compete for the GPU.
+    """
+
+    def __init__(self, enabled: bool = False):
+        super().__init__(name="transcription", daemon=True)
+        self.enabled = enabled
+        self.queue: queue.Queue = queue.Queue()
+        self.start_lock = threading.Lock()
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(enabled={self.enabled!r}, queued={self.queue.qsize()!r})"
+
+    def submit(self, function: Callable, *args, **kwargs) -> Future:
+        future = Future()
+        with self.start_lock:
+            if not self.is_alive():
+                self.start()
+        self.queue.put((future, function, args, kwargs))
+        return future
+
+    def call(self, function: Callable, *args, **kwargs):
+        """Run `function` on the worker and wait for it, or right here if disabled."""
+        if not self.enabled:
+            return function(*args, **kwargs)
+        return self.submit(function, *args, **kwargs).result()
+
+    def run(self) -> None:
+        while True:
+            future, function, args, kwargs = self.queue.get()
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(function(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+
+
+model_pool = ModelPool(
+    ttl=config.getfloat("clipception.transcription", "model_ttl", fallback=900)
+)
+transcription_worker = TranscriptionWorker(
+    enabled=config.getboolean("clipception.transcription", "worker", fallback=False)
+)
@@ -0,0 +1,260 @@
+import time
+import queue
+import threading
+from collections.abc import Callable
+from logger import logger
+from metrics import stage_seconds, stage_wait_seconds
+
+
+class Job:
+    """A recording on its way through the processing stages."""
+
+    def __init__(
+        self,
+        video_path: str,
+        streamer_name: str | None,
+        streamer_config,
+        duration: float | None = None,
+    ):
+        self.source_path = video_path  # the file as it was recorded
+        self.video_path = video_path  # the newest version of the video
+        self.streamer_name = streamer_name
+        self.streamer_config = streamer_config
+        self.audio_path: str | None = None  # wav written while preparing the video
+        self.transcription_path: str | None = None
+        self.clips_path: str | None = None
+        self.created = time.monotonic()
+        self.id: int | None = None  # set once the job is in the journal
+        self.duration = duration  # seconds of recording, if known
+        self.waits: dict[str, float] = {}  # seconds spent queued for each stage
+        self.trace = None  # tracing.Trace collecting the job's spans, if traced
+
+    @property
+    def priority(self) -> float:
+        """Weight of the streamer from its config, higher is served sooner."""
+        if self.streamer_config is None:
+            return 1.0
+        weight = self.streamer_config.getfloat("processing", "priority", fallback=1)
+        return max(weight, 0.01)
+
+    @property
+    def wait_time(self) -> float:
+        return sum(self.waits.values())
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(video_path={self.video_path!r}, streamer_name={self.streamer_name!r})"
+
+
+class JobQueue(queue.Queue):
+    """Queue handing out the job with the lowest score instead of the oldest.
+
+    A job scores `(served + 1) / priority`, where `served` counts the jobs of
+    the same streamer this queue already handed out, so streamers share the
+    stage in proportion to their priority. Every hour a job waits lowers its
+    score by `aging`, so low priority jobs still get their turn. With
+    `shortest_job_first` the recording's duration in hours is added.
+    """
+
+    def __init__(
+        self,
+        name: str = "",
+        maxsize: int = 0,
+        aging: float = 1.0,
+        shortest_job_first: bool = False,
+    ):
+        self.name = name
+        self.aging = aging
+        self.shortest_job_first = shortest_job_first
+        super().__init__(maxsize)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(name={self.name!r}, queued={self.qsize()!r})"
+
+    # queue.Queue calls these with its lock held
+    def _init(self, maxsize: int) -> None:
+        self.entries: list[tuple[int, float, Job]] = []  # (sequence, queued at, job)
+        self.served: dict[str | None, int] = {}
+        self.sequence = 0
+
+    def _qsize(self) -> int:
+        return len(self.entries)
+
+    def _put(self, job: Job) -> None:
+        # A streamer joining the queue starts level with the others instead of
+        # being owed everything it did not use while it had nothing queued
+        name = job.streamer_name
+        queued = {entry[2].streamer_name for entry in self.entries}
+        if name not in queued and queued:
+            floor = min(self.served.get(other, 0) for other in queued)
+            self.served[name] = max(self.served.get(name, 0), floor)
+
+        self.entries.append((self.sequence, time.monotonic(), job))
+        self.sequence += 1
+
+    def score(self, job: Job, queued_at: float, now: float) -> float:
+        score = (self.served.get(job.streamer_name, 0) + 1) / job.priority
+        score -= self.aging * (now - queued_at) / 3600
+        if self.shortest_job_first and job.duration:
+            score += job.duration / 3600
+        return score
+
+    def _get(self) -> Job:
+        now = time.monotonic()
+        entry = min(
+            self.entries,
+            key=lambda entry: (self.score(entry[2], entry[1], now), entry[0]),
+        )
+        self.entries.remove(entry)
+        _, queued_at, job = entry
+
+        job.waits[self.name] = job.waits.get(self.name, 0) + now - queued_at
+        stage_wait_seconds.observe(now - queued_at, stage=self.name)
+        self.served[job.streamer_name] = self.served.get(job.streamer_name, 0) + 1
+        if not self.entries:
+            self.served.clear()
+        return job
+
+
+class Stage:
+    """One step of the pipeline, run by `workers` threads.
+
+    `handler` takes a job and returns it to pass it on to the next stage, or
+    None to drop it. Jobs wait in a JobQueue holding at most `queue_size`
+    jobs (0 for no limit), a full queue holds up the stage feeding it.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        handler: Callable[[Job], Job | None],
+        workers: int = 1,
+        queue_size: int = 0,
+        aging: float = 1.0,
+        shortest_job_first: bool = False,
+    ):
+        self.name = name
+        self.handler = handler
+        self.workers = max(workers, 1)
+        self.queue = JobQueue(name, queue_size, aging, shortest_job_first)
+        self.next: Stage | None = None
+        self.active = 0  # jobs being handled right now
+        self.lock = threading.Lock()
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(name={self.name!r}, workers={self.workers!r}, queued={self.queue.qsize()!r})"
+
+
+class Pipeline:
+    """Stages connected by queues, so a slow stage only delays the jobs it holds.
+
+    A stage that raises is logged and the job moves on as it is, the same
+    way a failed step never stopped the rest of the processing. After every
+    stage `on_checkpoint(job, stage_name, finished)` is called, with
+    `finished` set once the job leaves the pipeline.
+    """
+
+    def __init__(
+        self,
+        stages: list[Stage],
+        on_checkpoint: Callable[[Job, str, bool], None] | None = None,
+    ):
+        self.stages = stages
+        self.on_checkpoint = on_checkpoint
+        for stage, following in zip(stages, stages[1:]):
+            stage.next = following
+        self.threads: list[threading.Thread] = []
+        self.stop_event = threading.Event()
+        self.jobs: dict[int, Job] = {}  # submitted jobs that have not finished
+        self.jobs_lock = threading.Lock()
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(stages={[stage.name for stage in self.stages]!r})"
+
+    def start(self) -> None:
+        for stage in self.stages:
+            for index in range(stage.workers):
+                thread = threading.Thread(
+                    target=self._work,
+                    args=(stage,),
+                    name=f"{stage.name}-{index}",
+                    daemon=True,
+                )
+                thread.start()
+                self.threads.append(thread)
+
+    def submit(self, job: Job, stage: str | None = None) -> None:
+        """Queue a job at the first stage, or at the stage named `stage`."""
+        # The first queue is never full, recording threads must not wait on it
+        target = self.stages[0]
+        if stage is not None:
+            target = next(s for s in self.stages if s.name == stage)
+        with self.jobs_lock:
+            self.jobs[id(job)] = job
+        target.queue.put(job)
+
+    def stage_after(self, completed: str | None) -> str | None:
+        """Name of the stage following `completed`, None after the last one."""
+        names = [stage.name for stage in self.stages]
+        index = names.index(completed) + 1 if completed is not None else 0
+        return names[index] if index < len(names) else None
+
+    def _forward(self, stage: Stage, job: Job) -> None:
+        while not self.stop_event.is_set():
+            try:
+                stage.queue.put(job, timeout=1)
+                return
+            except queue.Full:
+                continue
+
+    def _work(self, stage: Stage) -> None:
+        while not self.stop_event.is_set():
+            try:
+                job = stage.queue.get(timeout=1)
+            except queue.Empty:
+                continue
+
+            with stage.lock:
+                stage.active += 1
+            try:
+                with stage_seconds.time(stage=stage.name):
+                    result = stage.handler(job)
+            except Exception:
+                logger.exception(f"Stage {stage.name} failed for {job.video_path}")
+                result = job
+
+            try:
+                finished = result is None or stage.next is None
+                if self.on_checkpoint is not None:
+                    self.on_checkpoint(job, stage.name, finished)
+                if finished:
+                    with self.jobs_lock:
+                        self.jobs.pop(id(job), None)
+                else:
+                    self._forward(stage.next, result)
+            finally:
+                with stage.lock:
+                    stage.active -= 1
+                stage.queue.task_done()
+
+    def pending(self) -> dict[str, int]:
+        """Jobs waiting in or handled by each stage."""
+        result = {}
+        for stage in self.stages:
+            with stage.lock:
+                result[stage.name] = stage.queue.qsize() + stage.active
+        return result
+
+    def in_flight(self) -> list[Job]:
+        """Jobs submitted to the pipeline that have not finished yet."""
+        with self.jobs_lock:
+            return list(self.jobs.values())
+
+    def join(self) -> None:
+        """Wait until every submitted job went through all stages."""
+        for stage in self.stages:
+            stage.queue.join()
+
+    def stop(self) -> None:
+        self.stop_event.set()
+        for thread in self.threads:
+            thread.join()
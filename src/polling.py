@@ -0,0 +1,119 @@
+import os
+import json
+import time
+import threading
+from logger import logger
+
+WEEK = 7 * 24 * 3600
+MAX_HISTORY = 200  # go-live timestamps kept per streamer
+
+
+class PollingPolicy:
+    """Adaptive poll interval learned from a streamer's go-live history.
+
+    Go-live times are stored per streamer on disk and folded into a weekly
+    schedule. Near a usual start time the monitor polls at `min_delay`,
+    outside of it the delay grows to `off_schedule_factor * base_delay`, and
+    channels without a go-live for `dormant_days` are polled at `max_delay`,
+    including channels watched that long without ever going live. Otherwise,
+    until `min_samples` go-lives are known the base delay is used unchanged.
+    """
+
+    def __init__(
+        self,
+        streamer_name: str,
+        base_delay: float,
+        history_dir: str = "recordings/.schedules",
+        enabled: bool = True,
+        min_delay: float = 30,
+        max_delay: float = 1800,
+        window_minutes: float = 60,
+        off_schedule_factor: float = 5,
+        dormant_days: float = 14,
+        min_samples: int = 3,
+    ):
+        self.streamer_name = streamer_name
+        self.base_delay = base_delay
+        self.enabled = enabled
+        self.min_delay = min(min_delay, base_delay)
+        self.max_delay = max(max_delay, base_delay)
+        self.window = window_minutes * 60
+        self.off_schedule_factor = off_schedule_factor
+        self.dormant = dormant_days * 24 * 3600
+        self.min_samples = min_samples
+        self.history_path = os.path.join(history_dir, f"{streamer_name}.json")
+        self.lock = threading.Lock()
+        self.history: list[float] = []
+        self.watched_since = time.time()  # first time this channel was monitored
+        if enabled:
+            self._load_history()
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(streamer_name={self.streamer_name!r}, enabled={self.enabled!r}, samples={len(self.history)!r})"
+
+    def _load_history(self) -> None:
+        data = {}
+        if os.path.exists(self.history_path):
+            try:
+                with open(self.history_path, "r") as f:
+                    data = json.load(f)
+                # Older files hold only the go-live list
+                if isinstance(data, list):
+                    data = {"history": data}
+                self.history = sorted(float(t) for t in data["history"])[-MAX_HISTORY:]
+            except (OSError, ValueError, TypeError, KeyError):
+                logger.warning(
+                    f"Ignoring unreadable schedule history {self.history_path}"
+                )
+                data = {}
+
+        if "watched_since" in data:
+            self.watched_since = float(data["watched_since"])
+        else:
+            # Start counting towards dormancy from now
+            self._save()
+
+    def _save(self) -> None:
+        with self.lock:
+            data = {"watched_since": self.watched_since, "history": list(self.history)}
+        try:
+            os.makedirs(os.path.dirname(self.history_path), exist_ok=True)
+            with open(self.history_path, "w") as f:
+                json.dump(data, f)
+        except OSError:
+            logger.exception(f"Failed to save schedule history {self.history_path}")
+
+    def record_go_live(self, when: float | None = None) -> None:
+        if not self.enabled:
+            return
+
+        when = time.time() if when is None else when
+        with self.lock:
+            self.history = (self.history + [when])[-MAX_HISTORY:]
+        self._save()
+
+    def _near_usual_start(self, now: float) -> bool:
+        # Compare local wall-clock times so schedules survive daylight saving changes
+        position = (now + time.localtime(now).tm_gmtoff) % WEEK
+        for start in self.history:
+            start_position = (start + time.localtime(start).tm_gmtoff) % WEEK
+            distance = abs(position - start_position)
+            if min(distance, WEEK - distance) <= self.window:
+                return True
+        return False
+
+    def next_delay(self, now: float | None = None) -> float:
+        """Seconds to wait before the next liveness check."""
+        now = time.time() if now is None else now
+        with self.lock:
+            if not self.enabled:
+                return self.base_delay
+
+            last_seen = self.history[-1] if self.history else self.watched_since
+            if now - last_seen > self.dormant:
+                return self.max_delay
+            if len(self.history) < self.min_samples:
+                return self.base_delay
+            if self._near_usual_start(now):
+                return self.min_delay
+            return min(self.base_delay * self.off_schedule_factor, self.max_delay)
@@ -8,31 +8,33 @@ from processor import processor
 
 def main():
     parser = argparse.ArgumentParser(
-        description="Process a video to generate clips based on transcription analysis.",
+        description="Process videos to generate clips based on transcription analysis.",
         formatter_class=argparse.ArgumentDefaultsHelpFormatter,
     )
 
     parser.add_argument(
-        "video_path", nargs="?", help="Path to the input video file", default=None
+        "video_paths",
+        nargs="*",
+        help="Paths to the input video files, processed one after the other with the same loaded model",
     )
 
     args = parser.parse_args()
 
-    video_path = ""
-    if args.video_path:
-        video_path = args.video_path
-    else:
+    if not args.video_paths:
         logger.error("No video path provided")
         parser.print_help()
         sys.exit(1)
 
-    # Check if the video file exists
-    if not os.path.exists(video_path):
+    # Check if the video files exist
+    missing = [path for path in args.video_paths if not os.path.exists(path)]
+    for video_path in missing:
         logger.error(f"Video file {video_path} not found")
+    if missing:
         sys.exit(1)
 
-    # Use the processor's existing method to process the video
-    processor._process_single_file(video_path, None, False)
+    # Use the processor's existing method to process the videos
+    for video_path in args.video_paths:
+        processor._process_single_file(video_path, None, False)
 
 
 if __name__ == "__main__":
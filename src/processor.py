@@ -1,14 +1,21 @@
-import queue
-import threading
 import os
 from logger import logger
 from settings import config, CLIPCEPTION_ENABLED
-from utils import run_command
+from utils import run_command, load_config
+from pipeline import Pipeline, Stage, Job
+from journal import JobJournal
+from chunked_encode import ChunkedEncode
+from governor import governor
+from storage import storage
+from metrics import metrics
+import tracing
 from uploader import upload_youtube
 
 # clipception
 from transcription import process_video, MIN_DURATION
+from model_pool import transcription_worker
 from gen_clip import generate_clips, process_clips
+from live_clipper import live_clipping_enabled
 
 
 class Processor:
@@ -21,87 +28,215 @@ class Processor:
 
     def __init__(self):
         if not hasattr(self, "initialized"):
-            self.queue = queue.Queue()
-            self.worker_thread = threading.Thread(
-                target=self._process_queue, daemon=True
+            queue_size = config.getint("processing", "queue_size", fallback=4)
+            aging = config.getfloat("processing", "aging", fallback=1)
+            shortest_job_first = config.getboolean(
+                "processing", "shortest_job_first", fallback=False
             )
-            self.processing_event = threading.Event()
-            self.stop_event = threading.Event()
+            self.journal = JobJournal(
+                config.get("processing", "journal_path", fallback="recordings/jobs.db"),
+                enabled=config.getboolean("processing", "journal", fallback=True),
+            )
+            self.profiler = tracing.Profiler(
+                config.get("tracing", "profiler", fallback="off"),
+                config.getint("tracing", "py_spy_rate", fallback=100),
+            )
+            self.pipeline = Pipeline(
+                [
+                    Stage(
+                        name,
+                        self._traced(name, handler),
+                        config.getint(
+                            "processing", f"{name}_workers", fallback=workers
+                        ),
+                        # Nothing waits on the first stage, the recordings must not block
+                        0 if name == "convert" else queue_size,
+                        aging,
+                        shortest_job_first,
+                    )
+                    for name, handler, workers in (
+                        ("convert", self._convert_stage, 2),
+                        ("encode", self._encode_stage, 1),
+                        ("transcribe", self._transcribe_stage, 1),
+                        ("rank", self._rank_stage, 4),
+                        ("extract", self._extract_stage, 2),
+                        ("upload", self._upload_stage, 2),
+                    )
+                ],
+                on_checkpoint=self._checkpoint,
+            )
+            # Never evict files a queued recording still needs
+            storage.protected = self._protected_paths
+            metrics.gauge(
+                "queued_jobs",
+                "Recordings waiting in or handled by each processing stage.",
+                ("stage",),
+                function=lambda: {
+                    (stage,): count for stage, count in self.pipeline.pending().items()
+                },
+            )
+            self.started = False
             self.initialized = True
 
-            self.worker_thread.start()
+    def start(self) -> None:
+        """Start the stage workers and resume the jobs of a previous run.
+
+        Only the recorder does this, importing the processor (process_vid.py,
+        benchmarks, tests) neither opens the journal nor picks up its jobs.
+        """
+        if self.started:
+            return
+        self.started = True
+        self.pipeline.start()
+        self._resume()
 
-    def process(self, video_path, streamer_name, streamer_config):
-        """Add a ts file to the queue to be processed with clipception."""
+    def process(self, video_path, streamer_name, streamer_config, duration=None):
+        """Add a ts file to the pipeline to be processed with clipception.
+
+        `duration` is the length of the recording in seconds, if known.
+        """
         if not os.path.exists(video_path):
             logger.warning(f"Can't queue video. Path {video_path} does not exist.")
             return
 
         logger.debug(f"Queuing video: {video_path}")
-        self.queue.put((video_path, streamer_name, streamer_config))
+        job = Job(video_path, streamer_name, streamer_config, duration)
+        job.trace = self._new_trace(job)
+        self.journal.add(job)
+        self.pipeline.submit(job)
 
-    def _process_queue(self):
-        """Process queue continuously."""
-        while not self.stop_event.is_set():
-            try:
-                item = self.queue.get(timeout=3)
-            except queue.Empty:
+    def _new_trace(self, job: Job) -> tracing.Trace | None:
+        if not config.getboolean("tracing", "enabled", fallback=True):
+            return None
+        return tracing.Trace(
+            os.path.splitext(job.source_path)[0] + ".trace.jsonl",
+            streamer=job.streamer_name,
+            source=job.source_path,
+        )
+
+    def _traced(self, name, handler):
+        """Run a stage handler as a span of the job's trace, profiled if enabled."""
+
+        def handle(job: Job) -> Job | None:
+            profile = f"{os.path.splitext(job.source_path)[0]}.{name}"
+            with (
+                tracing.activate(job.trace),
+                tracing.span(name, video=job.video_path),
+                self.profiler.profile(profile),
+            ):
+                return handler(job)
+
+        return handle
+
+    def _checkpoint(self, job: Job, stage: str, finished: bool) -> None:
+        self.journal.checkpoint(job, stage, finished)
+        for path in (job.source_path, job.video_path, job.audio_path):
+            storage.track(path)
+        if finished:
+            storage.check()
+
+    def _protected_paths(self) -> set[str]:
+        paths = set()
+        for job in self.pipeline.in_flight():
+            paths.update((job.source_path, job.video_path, job.audio_path))
+        return paths
+
+    def _resume(self):
+        """Queue the jobs left unfinished by a previous run at their next stage."""
+        for job, completed in self.journal.pending():
+            stage = self.pipeline.stage_after(completed)
+            job.streamer_config = load_config(job.streamer_name) or load_config(
+                "default"
+            )
+            if stage is None or job.streamer_config is None:
+                self.journal.checkpoint(job, completed, finished=True)
+                continue
+            if not os.path.exists(job.video_path):
+                logger.warning(f"Dropping resumed job, {job.video_path} is gone")
+                self.journal.checkpoint(job, completed, finished=True)
                 continue
 
-            video_path, streamer_name, streamer_config = item
-            new_video_path = video_path
-            self.processing_event.set()
-            logger.info(f"Processing video: {video_path}")
-
+            logger.info(f"Resuming {job.video_path} at the {stage} stage")
+            job.trace = self._new_trace(job)
+            self.pipeline.submit(job, stage)
+
+    def _convert_stage(self, job: Job) -> Job:
+        logger.info(f"Processing video: {job.video_path}")
+        audio_path = None
+        if self._clipception_enabled(job.streamer_config):
+            audio_path = os.path.splitext(job.source_path)[0] + ".wav"
+        with governor.heavy(f"converting {job.video_path}"):
+            job.video_path = self._convert(job.video_path, audio_path)
+        if audio_path and os.path.exists(audio_path):
+            job.audio_path = audio_path
+        return job
+
+    def _encode_stage(self, job: Job) -> Job:
+        if job.streamer_config.getboolean("encoding", "re_encode"):
+            # Keep the remuxed video if encoding fails
+            with governor.heavy(f"encoding {job.video_path}"):
+                job.video_path = (
+                    self._encode(job.video_path, job.streamer_config) or job.video_path
+                )
+        logger.debug(f"Video saved locally: {job.video_path}")
+        return job
+
+    def _clipception_enabled(self, streamer_config) -> bool:
+        # Process with clipception, unless it already ran during the recording
+        if live_clipping_enabled(streamer_config):
+            return False
+        return CLIPCEPTION_ENABLED and streamer_config.getboolean(
+            "clipception", "enabled"
+        )
+
+    def _transcribe_stage(self, job: Job) -> Job:
+        if self._clipception_enabled(job.streamer_config):
+            with governor.heavy(f"transcribing {job.video_path}"):
+                job.transcription_path = self._transcribe(
+                    job.video_path, job.audio_path
+                )
+        elif live_clipping_enabled(job.streamer_config):
+            logger.debug(f"Clips for {job.video_path} were made while recording")
+        return job
+
+    def _rank_stage(self, job: Job) -> Job:
+        if job.transcription_path:
+            job.clips_path = self._rank(job.transcription_path)
+        return job
+
+    def _extract_stage(self, job: Job) -> Job:
+        if job.clips_path:
+            with governor.heavy(f"extracting clips of {job.video_path}"):
+                self._extract(job.video_path, job.clips_path)
+        return job
+
+    def _upload_stage(self, job: Job) -> Job:
+        upload = job.streamer_config.getboolean("upload", "upload")
+        if upload:
             try:
-                # Convert and re-encode if needed
-                new_video_path = self._convert(video_path)
-
-                if streamer_config.getboolean("encoding", "re_encode"):
-                    new_video_path = self._encode(new_video_path, streamer_config)
-
-                if new_video_path:
-                    logger.debug(f"Video saved locally: {new_video_path}")
+                logger.info("Uploading video.")
+                upload_youtube(os.path.abspath(job.video_path))
             except Exception:
-                logger.exception("Error encoding/saving video locally")
+                logger.exception("Upload failed")
 
-            # Process with clipception
-            if CLIPCEPTION_ENABLED and streamer_config.getboolean(
-                "clipception", "enabled"
-            ):
-                self._process_single_file(
-                    new_video_path, streamer_name, upload_video=False
-                )
+        logger.info(
+            f"Finished processing: {job.video_path} "
+            f"(queued for {job.wait_time:.0f}s in total)"
+        )
 
-            # Upload
-            upload = streamer_config.getboolean("upload", "upload")
-            if upload:
-                try:
-                    logger.info("Uploading video.")
-                    upload_youtube(os.path.abspath(new_video_path))
-                except Exception:
-                    logger.exception("Upload failed")
+        # Delete files after upload if not set to save locally
+        save_locally = job.streamer_config.getboolean(
+            "local", "save_locally", fallback=True
+        )
 
-            logger.info(f"Finished processing: {new_video_path}")
-
-            # Delete files after upload if not set to save locally
-            save_locally = streamer_config.getboolean(
-                "local", "save_locally", fallback=True
-            )
-
-            if not save_locally:
-                logger.info(
-                    "Deleting video files after upload (save_locally is disabled)"
-                )
-                self._delete_video_files(video_path, new_video_path)
-
-            self.queue.task_done()
-            self.processing_event.clear()
+        if not save_locally:
+            logger.info("Deleting video files after upload (save_locally is disabled)")
+            self._delete_video_files(job.source_path, job.video_path)
+        return job
 
     def stop(self):
-        """Signal the worker thread to stop"""
-        self.stop_event.set()
-        self.worker_thread.join()
+        """Signal the stage workers to stop"""
+        self.pipeline.stop()
 
     def _delete_video_files(self, ts_path, mp4_path):
         try:
@@ -118,41 +253,55 @@ class Processor:
         except Exception:
             logger.exception("Error deleting video files")
 
-    def _convert(self, input_path: str) -> str:
-        """Converts a file to a new format using ffmpeg."""
+    def _convert(self, input_path: str, audio_path: str | None = None) -> str:
+        """Prepare a recording for processing in a single ffmpeg pass.
+
+        One read of the input produces the mp4 remux, the 9:16 shorts render
+        and, if `audio_path` is given, the 16 kHz mono wav for transcription.
+        """
 
         output_path = os.path.splitext(input_path)[0] + ".mp4"
+        outputs = []
 
-        command = [
-            "ffmpeg",
-            "-i",
-            input_path,
-            "-c",
-            "copy",
-            output_path,
-            "-loglevel",
-            "error",
-        ]
-        run_command(command)
+        # Recordings made as fragmented MP4 are already in their final container
+        if output_path == input_path:
+            logger.debug(f"{input_path} is already an mp4, skipping remux")
+        else:
+            outputs += ["-c", "copy", output_path]
 
-        # Shorts video format
+        # Shorts video format, filtering needs a re-encode
         if MIN_DURATION < 130:
             output_dir = os.path.dirname(output_path)
             shorts_filename = f"shorts_{os.path.basename(output_path)}"
             shorts_output_path = os.path.join(output_dir, shorts_filename)
-            command = [
-                "ffmpeg",
-                "-i",
-                output_path,
+            outputs += [
                 "-vf",
                 "scale=1080:1920:force_original_aspect_ratio=decrease,"
                 "pad=1080:1920:(ow-iw)/2:(oh-ih)/2:color=black,setsar=1",
-                "-c",
-                "copy",
+                "-c:v",
+                "libx264",
+                "-preset",
+                "veryfast",
+                "-c:a",
+                "aac",
                 shorts_output_path,
-                "-loglevel",
-                "error",
             ]
+
+        # Audio for transcription
+        if audio_path:
+            outputs += [
+                "-vn",
+                "-acodec",
+                "pcm_s16le",
+                "-ar",
+                "16000",
+                "-ac",
+                "1",
+                audio_path,
+            ]
+
+        if outputs:
+            command = ["ffmpeg", "-i", input_path, *outputs, "-loglevel", "error"]
             run_command(command)
 
         return output_path
@@ -167,6 +316,11 @@ class Processor:
             preset = streamer_config.get("encoding", "preset", fallback="medium")
             log_level = streamer_config.get("encoding", "log", fallback="error")
 
+            if streamer_config.getboolean("encoding", "chunked", fallback=False):
+                return self._encode_chunked(
+                    input_path, output_path, codec, crf, preset, streamer_config
+                )
+
             # Build FFmpeg command
             ffmpeg_cmd = [
                 "ffmpeg",
@@ -200,72 +354,111 @@ class Processor:
             logger.exception("Error encoding/saving video locally")
             return None
 
-    def _process_single_file(self, video_path, streamer_name, upload_video=False):
-        """Process a video file with clipception to generate clips."""
-        try:
-            num_clips = config.getint("clipception", "num_clips", fallback=10)
-            min_score = 0  # Default minimum score threshold
-            chunk_size = 10
+    def _encode_chunked(
+        self, input_path, output_path, codec, crf, preset, streamer_config
+    ):
+        """Encode the video in chunks on several ffmpeg processes at once."""
+        encode = ChunkedEncode(
+            chunk_duration=streamer_config.getint(
+                "encoding", "chunk_duration", fallback=120
+            ),
+            workers=streamer_config.getint("encoding", "workers", fallback=0) or None,
+        )
+        logger.info(f"Re-encoding video in chunks: {encode}")
+        if not encode.run(
+            input_path,
+            output_path,
+            ["-c:v", codec, "-crf", crf, "-preset", preset],
+            streamer_config.get("encoding", "log", fallback="error"),
+        ):
+            logger.error(f"Chunked encoding failed for {input_path}")
+            return None
 
-            logger.info(f"Processing video: {video_path}")
+        logger.success(f"Video saved locally: {output_path}")
+        return output_path
 
-            # Ensure the video file exists
-            if not os.path.exists(video_path):
-                logger.error(f"Error: Video file {video_path} not found")
-                return
+    def _transcribe(self, video_path: str, audio_path: str | None = None) -> str | None:
+        """Run the enhanced transcription and return the path of its json file."""
+        logger.info("STEP 1: Generating enhanced transcription...")
+
+        try:
+            transcription_worker.call(process_video, video_path, audio_path)
+        except Exception:
+            logger.exception("Error during transcription")
+            return None
 
-            # Get file information
-            filename_without_ext = os.path.splitext(os.path.basename(video_path))[0]
-            output_dir = os.path.dirname(video_path)
+        filename_without_ext = os.path.splitext(os.path.basename(video_path))[0]
+        transcription_json = os.path.join(
+            os.path.dirname(video_path),
+            f"{filename_without_ext}.enhanced_transcription.json",
+        )
+        if not os.path.exists(transcription_json):
+            logger.error(
+                f"Error: Expected transcription file {transcription_json} was not generated"
+            )
+            return None
+        return transcription_json
 
-            # Step 1: Run enhanced transcription
-            logger.info("STEP 1: Generating enhanced transcription...")
+    def _rank(self, transcription_json: str) -> str | None:
+        """Rank the transcription with the LLM and return the path of the top clips."""
+        logger.info("STEP 2: Processing transcription for clip selection...")
+        num_clips = config.getint("clipception", "num_clips", fallback=10)
+        chunk_size = 10
 
-            try:
-                process_video(video_path)
-            except Exception:
-                logger.exception("Error during transcription")
-                return
+        # Named after the video, several videos of a stream can be ranked at once
+        output_file = transcription_json.replace(
+            ".enhanced_transcription.json", ".top_clips.json"
+        )
 
-            transcription_json = os.path.join(
-                output_dir, f"{filename_without_ext}.enhanced_transcription.json"
+        try:
+            generate_clips(
+                transcription_json,
+                output_file,
+                num_clips=num_clips,
+                chunk_size=chunk_size,
             )
-            if not os.path.exists(transcription_json):
-                logger.error(
-                    f"Error: Expected transcription file {transcription_json} was not generated"
-                )
-                return
+        except Exception:
+            logger.exception("Error during clip generation")
+            return None
 
-            # Step 2: Generate clips JSON using GPU acceleration
-            logger.info("STEP 2: Processing transcription for clip selection...")
+        if not os.path.exists(output_file):
+            logger.error(f"Error: Top clips file {output_file} was not generated")
+            return None
+        return output_file
 
-            output_file = os.path.join(output_dir, "top_clips_one.json")
+    def _extract(self, video_path: str, clips_json: str) -> str | None:
+        """Cut the top clips out of the video and return the clips directory."""
+        logger.info("STEP 3: Extracting clips...")
+        min_score = 0  # Default minimum score threshold
+        clips_output_dir = os.path.join(os.path.dirname(video_path), "clips")
 
-            try:
-                generate_clips(
-                    transcription_json,
-                    output_file,
-                    num_clips=num_clips,
-                    chunk_size=chunk_size,
-                )
-            except Exception:
-                logger.exception("Error during clip generation")
+        try:
+            process_clips(video_path, clips_output_dir, clips_json, min_score=min_score)
+        except Exception:
+            logger.exception("Error during clip extraction")
+            return None
+        return clips_output_dir
+
+    def _process_single_file(self, video_path, streamer_name, upload_video=False):
+        """Process a video file with clipception to generate clips."""
+        try:
+            logger.info(f"Processing video: {video_path}")
+
+            # Ensure the video file exists
+            if not os.path.exists(video_path):
+                logger.error(f"Error: Video file {video_path} not found")
                 return
 
-            if not os.path.exists(output_file):
-                logger.error(f"Error: Top clips file {output_file} was not generated")
+            transcription_json = self._transcribe(video_path)
+            if not transcription_json:
                 return
 
-            # Step 3: Extract video clips
-            logger.info("STEP 3: Extracting clips...")
-            clips_output_dir = os.path.join(output_dir, "clips")
+            output_file = self._rank(transcription_json)
+            if not output_file:
+                return
 
-            try:
-                process_clips(
-                    video_path, clips_output_dir, output_file, min_score=min_score
-                )
-            except Exception:
-                logger.exception("Error during clip extraction")
+            clips_output_dir = self._extract(video_path, output_file)
+            if not clips_output_dir:
                 return
 
             logger.success("All processing completed successfully! Generated files:")
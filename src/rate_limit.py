@@ -0,0 +1,150 @@
+import time
+import random
+import threading
+from logger import logger
+from settings import config
+from utils import StreamPlatform
+from metrics import metrics
+
+
+class TokenBucket:
+    """Token bucket refilled at `rate` tokens per second, holding at most `burst`."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.capacity = max(burst, 1)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def __repr__(self):
+        return (
+            f"{self.__class__.__name__}(rate={self.rate!r}, capacity={self.capacity!r})"
+        )
+
+    def reserve(self, max_wait: float | None = None) -> float | None:
+        """Take a token and return how long to wait before using it.
+
+        Returns None, without taking a token, if the wait would exceed `max_wait`.
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(
+                self.capacity, self.tokens + (now - self.updated) * self.rate
+            )
+            self.updated = now
+
+            wait = max(1 - self.tokens, 0) / self.rate
+            if max_wait is not None and wait > max_wait:
+                return None
+            self.tokens -= 1
+            return wait
+
+
+class RateLimiter:
+    """Shared per-platform probe limiter with start staggering and jitter.
+
+    Every request to a platform takes a token from that platform's bucket.
+    Callers that had to wait are counted as throttled, callers that gave up
+    because the wait exceeded their `max_wait` are counted as deferred.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        rate: float = 2,
+        burst: float = 10,
+        jitter: float = 0.1,
+        stagger: float = 60,
+        max_wait: float = 30,
+        rates: dict[StreamPlatform, float] | None = None,
+    ):
+        self.enabled = enabled
+        self.rate = rate
+        self.burst = burst
+        self.jitter_ratio = jitter
+        self.stagger = stagger
+        self.max_wait = max_wait  # default for callers that may defer their probe
+        self.rates = rates or {}
+        self.buckets: dict[StreamPlatform, TokenBucket] = {}
+        self.throttled: dict[StreamPlatform, int] = {p: 0 for p in StreamPlatform}
+        self.deferred: dict[StreamPlatform, int] = {p: 0 for p in StreamPlatform}
+        self.lock = threading.Lock()
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(enabled={self.enabled!r}, rate={self.rate!r}, burst={self.burst!r})"
+
+    def _bucket(self, platform: StreamPlatform) -> TokenBucket:
+        with self.lock:
+            if platform not in self.buckets:
+                rate = self.rates.get(platform, self.rate)
+                self.buckets[platform] = TokenBucket(rate, self.burst)
+            return self.buckets[platform]
+
+    def acquire(
+        self, platform: StreamPlatform | None, max_wait: float | None = None
+    ) -> bool:
+        """Wait for a probe slot. Returns False if the probe should be deferred."""
+        if not self.enabled or platform is None:
+            return True
+
+        wait = self._bucket(platform).reserve(max_wait)
+        if wait is None:
+            with self.lock:
+                self.deferred[platform] += 1
+            logger.debug(f"Deferred {platform.value} probe, rate limit reached")
+            return False
+
+        if wait > 0:
+            with self.lock:
+                self.throttled[platform] += 1
+            time.sleep(wait)
+        return True
+
+    def jitter(self, delay: float) -> float:
+        if not self.enabled or not self.jitter_ratio:
+            return delay
+        return delay * random.uniform(1 - self.jitter_ratio, 1 + self.jitter_ratio)
+
+    def stagger_delay(self, index: int, count: int, window: float) -> float:
+        """Start offset for the `index`-th of `count` monitors, spread over the window."""
+        window = min(window, self.stagger)
+        if not self.enabled or count <= 1 or window <= 0:
+            return 0.0
+        return window * (index + random.random()) / count
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        with self.lock:
+            return {
+                platform.value: {
+                    "throttled": self.throttled[platform],
+                    "deferred": self.deferred[platform],
+                }
+                for platform in StreamPlatform
+            }
+
+
+limiter = RateLimiter(
+    enabled=config.getboolean("rate_limit", "enabled", fallback=True),
+    rate=config.getfloat("rate_limit", "rate", fallback=2),
+    burst=config.getfloat("rate_limit", "burst", fallback=10),
+    jitter=config.getfloat("rate_limit", "jitter", fallback=0.1),
+    stagger=config.getfloat("rate_limit", "stagger", fallback=60),
+    max_wait=config.getfloat("rate_limit", "max_wait", fallback=30),
+    rates={
+        platform: config.getfloat("rate_limit", f"{platform.value}_rate")
+        for platform in StreamPlatform
+        if config.has_option("rate_limit", f"{platform.value}_rate")
+    },
+)
+
+metrics.counter(
+    "rate_limited_probes_total",
+    "Probes that waited for (throttled) or gave up on (deferred) a rate limit slot.",
+    ("platform", "outcome"),
+    function=lambda: {
+        (platform, outcome): count
+        for platform, counts in limiter.stats().items()
+        for outcome, count in counts.items()
+    },
+)
@@ -0,0 +1,243 @@
+import os
+import csv
+import shlex
+
+# Command construction for recording livestreams
+FMP4_MOVFLAGS = "+frag_keyframe+empty_moov+default_base_moof"
+
+
+def split_flags(flags: list[str]) -> list[str]:
+    """Streamlink flags from the config as argv tokens, `--key value` becomes two."""
+    return [token for flag in flags for token in shlex.split(flag)]
+
+
+def build_streamlink_command(
+    stream_url: str, quality: str, flags: list[str], output_path: str | None = None
+) -> list[str]:
+    """streamlink writing to `output_path`, or to stdout when it is None."""
+    output = ["-o", output_path] if output_path else ["-O"]
+    return ["streamlink", *output, stream_url, quality, *split_flags(flags)]
+
+
+def build_fmp4_mux_command(output_path: str, log_level: str = "error") -> list[str]:
+    """ffmpeg reading MPEG-TS from stdin and stream-copying it into a fragmented MP4.
+
+    Every fragment is self-contained, so the file stays playable while it is
+    being written and after an abrupt stop, and needs no remux afterwards.
+    """
+    return [
+        "ffmpeg",
+        "-hide_banner",
+        "-loglevel",
+        log_level,
+        "-i",
+        "pipe:0",
+        "-map",
+        "0:v?",
+        "-map",
+        "0:a?",
+        "-c",
+        "copy",
+        "-movflags",
+        FMP4_MOVFLAGS,
+        "-f",
+        "mp4",
+        "-y",
+        output_path,
+    ]
+
+
+def parse_duration(value: str) -> int:
+    """Parse a HH:MM:SS (or MM:SS, or SS) duration into seconds."""
+    seconds = 0
+    for part in value.strip().split(":"):
+        seconds = seconds * 60 + int(part)
+    return seconds
+
+
+def build_segment_mux_command(
+    output_pattern: str,
+    segment_list: str,
+    segment_time: int,
+    fmp4: bool = False,
+    log_level: str = "error",
+    start_number: int = 0,
+) -> list[str]:
+    """ffmpeg reading MPEG-TS from stdin and splitting it into parts of `segment_time`.
+
+    With stream copy the segment muxer can only cut on keyframes, so every
+    part starts with one. Each finished part is appended to `segment_list`.
+    Numbering starts at `start_number`, so a resumed recording continues it.
+    """
+    command = [
+        "ffmpeg",
+        "-hide_banner",
+        "-loglevel",
+        log_level,
+        "-i",
+        "pipe:0",
+        "-map",
+        "0:v?",
+        "-map",
+        "0:a?",
+        "-c",
+        "copy",
+        "-f",
+        "segment",
+        "-segment_time",
+        str(segment_time),
+        "-segment_start_number",
+        str(start_number),
+        "-reset_timestamps",
+        "1",
+        "-segment_list",
+        segment_list,
+        "-segment_list_type",
+        "csv",
+    ]
+    if fmp4:
+        command += [
+            "-segment_format",
+            "mp4",
+            "-segment_format_options",
+            f"movflags={FMP4_MOVFLAGS}",
+        ]
+    return command + ["-y", output_pattern]
+
+
+class SegmentWatcher:
+    """Follows the segment list ffmpeg writes to find finished parts.
+
+    Parts of `<name>.<ext>` are written as `<name>_part000.<ext>`, ... and
+    listed in `<name>.parts.csv` once they are complete.
+    """
+
+    def __init__(self, output_path: str):
+        base, extension = os.path.splitext(output_path)
+        self.directory = os.path.dirname(output_path)
+        self.pattern = f"{base}_part%03d{extension}"
+        self.list_path = f"{base}.parts.csv"
+        self.finished: list[str] = []
+        self.finished_bytes = 0
+        self.offset = 0
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(pattern={self.pattern!r}, finished={len(self.finished)!r})"
+
+    def poll(self) -> list[str]:
+        """Return the parts finished since the previous poll."""
+        try:
+            with open(self.list_path, "rb") as f:
+                f.seek(self.offset)
+                data = f.read()
+        except OSError:
+            return []
+
+        # Only consume complete lines, ffmpeg may be halfway through one
+        complete = data[: data.rfind(b"\n") + 1]
+        self.offset += len(complete)
+
+        parts = []
+        for row in csv.reader(complete.decode("utf-8", "replace").splitlines()):
+            if not row or not row[0].strip():
+                continue
+            path = os.path.join(self.directory, os.path.basename(row[0].strip()))
+            parts.append(path)
+            self.finished.append(path)
+            try:
+                self.finished_bytes += os.path.getsize(path)
+            except OSError:
+                pass
+        return parts
+
+    def resume(self) -> None:
+        """Prepare for a new ffmpeg process continuing the same parts.
+
+        The new process starts a fresh segment list, the old one is removed
+        first so its entries are not read twice.
+        """
+        try:
+            os.remove(self.list_path)
+        except OSError:
+            pass
+        self.offset = 0
+
+    def current_part(self) -> str:
+        return self.pattern % len(self.finished)
+
+    def total_bytes(self) -> int:
+        try:
+            return self.finished_bytes + os.path.getsize(self.current_part())
+        except OSError:
+            return self.finished_bytes
+
+
+def build_concat_command(
+    list_path: str, output_path: str, log_level: str = "error"
+) -> list[str]:
+    """ffmpeg joining the files listed in `list_path` without re-encoding."""
+    return [
+        "ffmpeg",
+        "-hide_banner",
+        "-loglevel",
+        log_level,
+        "-f",
+        "concat",
+        "-safe",
+        "0",
+        "-i",
+        list_path,
+        "-map",
+        "0",
+        "-c",
+        "copy",
+        "-y",
+        output_path,
+    ]
+
+
+class RecordingSession:
+    """One live stream, recorded over one or more connections.
+
+    The first connection writes `<name>.<ext>`, each reconnect a new
+    `<name>_resume01.<ext>`, ... part. Once the stream has ended the parts
+    are joined back into `<name>.<ext>`.
+    """
+
+    def __init__(self, output_path: str):
+        self.output_path = output_path
+        self.base, self.extension = os.path.splitext(output_path)
+        self.list_path = f"{self.base}.concat.txt"
+        self.stitched_path = f"{self.base}.stitched{self.extension}"
+        self.parts: list[str] = []
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(output_path={self.output_path!r}, parts={len(self.parts)!r})"
+
+    def next_part(self) -> str:
+        index = len(self.parts)
+        path = (
+            self.output_path
+            if index == 0
+            else f"{self.base}_resume{index:02d}{self.extension}"
+        )
+        self.parts.append(path)
+        return path
+
+    def recorded_parts(self) -> list[str]:
+        """Parts that contain data, in recording order."""
+        parts = []
+        for path in self.parts:
+            try:
+                if os.path.getsize(path) > 0:
+                    parts.append(path)
+            except OSError:
+                pass
+        return parts
+
+    def write_concat_list(self, parts: list[str]) -> str:
+        with open(self.list_path, "w", encoding="utf-8") as f:
+            for path in parts:
+                escaped = os.path.abspath(path).replace("'", "'\\''")
+                f.write(f"file '{escaped}'\n")
+        return self.list_path
@@ -0,0 +1,172 @@
+import asyncio
+import heapq
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from logger import logger
+from stream_monitor import StreamMonitor
+
+
+class MonitorScheduler:
+    """Runs many stream monitors on a single asyncio event loop.
+
+    Offline channels are only entries in a timer heap. Probes run on a small
+    shared thread pool and only live recordings hold a thread (and their
+    streamlink subprocess), so resources grow with live streams instead of
+    watched streams. A channel going live while `max_recordings` streams are
+    already being recorded is refused and probed again later, never queued
+    behind the running recordings.
+    """
+
+    def __init__(self, probe_workers: int = 8, max_recordings: int = 64):
+        self.monitors: dict[str, StreamMonitor] = {}
+        self.recording: set[str] = set()
+        self.max_recordings = max_recordings
+        self.running = False
+
+        # (due time, sequence, streamer name); stale entries are skipped
+        self.heap: list[tuple[float, int, str]] = []
+        self.due: dict[str, int] = {}
+        self.counter = itertools.count()
+
+        self.probe_executor = ThreadPoolExecutor(
+            max_workers=probe_workers, thread_name_prefix="probe"
+        )
+        self.record_executor = ThreadPoolExecutor(
+            max_workers=max_recordings, thread_name_prefix="rec"
+        )
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self.thread: threading.Thread | None = None
+        self.wakeup: asyncio.Event | None = None
+        self.ready = threading.Event()
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(running={self.running!r}, monitors={len(self.monitors)!r}, recording={len(self.recording)!r})"
+
+    def start(self) -> None:
+        if self.running:
+            return
+
+        self.running = True
+        self.thread = threading.Thread(
+            target=self._run_loop, name="scheduler", daemon=True
+        )
+        self.thread.start()
+        self.ready.wait()
+
+    def stop(self) -> None:
+        if not self.running:
+            return
+
+        self.running = False
+        for monitor in list(self.monitors.values()):
+            monitor.stop()
+        self.monitors.clear()
+
+        if self.loop:
+            self.loop.call_soon_threadsafe(self.wakeup.set)
+        if self.thread:
+            self.thread.join(timeout=5)
+
+        self.probe_executor.shutdown(wait=False, cancel_futures=True)
+        self.record_executor.shutdown(wait=False, cancel_futures=True)
+
+    def add(self, monitor: StreamMonitor, delay: float = 0) -> bool:
+        """Start watching a monitor, first probe after `delay` seconds."""
+        if not monitor.start_monitoring():
+            return False
+
+        self.monitors[monitor.streamer_name] = monitor
+        self._call_soon(self._schedule, monitor.streamer_name, delay)
+        return True
+
+    def remove(self, streamer_name: str) -> None:
+        monitor = self.monitors.pop(streamer_name, None)
+        if monitor:
+            monitor.stop()
+        self._call_soon(self.due.pop, streamer_name, None)
+
+    def _call_soon(self, callback, *args) -> None:
+        if self.loop and self.loop.is_running():
+            self.loop.call_soon_threadsafe(callback, *args)
+        else:
+            callback(*args)
+
+    def _schedule(self, streamer_name: str, delay: float) -> None:
+        seq = next(self.counter)
+        self.due[streamer_name] = seq
+        heapq.heappush(self.heap, (self._now() + delay, seq, streamer_name))
+        if self.wakeup:
+            self.wakeup.set()
+
+    def _now(self) -> float:
+        return self.loop.time() if self.loop else 0.0
+
+    def _run_loop(self) -> None:
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_until_complete(self._run())
+        finally:
+            self.loop.close()
+
+    async def _run(self) -> None:
+        self.wakeup = asyncio.Event()
+
+        # Entries added before the loop existed were scheduled relative to 0
+        now = self._now()
+        self.heap = [(now + due, seq, name) for due, seq, name in self.heap]
+        heapq.heapify(self.heap)
+        self.ready.set()
+
+        tasks: set[asyncio.Task] = set()
+        while self.running:
+            now = self._now()
+            while self.heap and self.heap[0][0] <= now:
+                _, seq, name = heapq.heappop(self.heap)
+                if self.due.get(name) != seq or name not in self.monitors:
+                    continue
+                del self.due[name]
+                task = asyncio.create_task(self._poll(self.monitors[name]))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+
+            timeout = self.heap[0][0] - now if self.heap else None
+            self.wakeup.clear()
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+        for task in tasks:
+            task.cancel()
+
+    async def _poll(self, monitor: StreamMonitor) -> None:
+        name = monitor.streamer_name
+        try:
+            live = await self.loop.run_in_executor(
+                self.probe_executor, monitor.check_live
+            )
+            # A full record pool would only queue the recording, refuse it instead
+            refused = live and len(self.recording) >= self.max_recordings
+            if refused:
+                logger.error(
+                    f"{name} is live but {len(self.recording)} streams are already "
+                    f"being recorded (max_recordings), retrying in {monitor.retry_delay:.0f} seconds"
+                )
+            elif live and monitor.running:
+                self.recording.add(name)
+                await self.loop.run_in_executor(
+                    self.record_executor, monitor.record_stream
+                )
+            delay = monitor.retry_delay if refused else monitor.next_delay()
+            if not live:
+                logger.info(f"{name} is offline. Retrying in {delay:.0f} seconds..")
+        except Exception:
+            logger.exception(f"Error monitoring {name}")
+            delay = monitor.retry_delay
+        finally:
+            self.recording.discard(name)
+
+        if self.running and self.monitors.get(name) is monitor:
+            self._schedule(name, delay)
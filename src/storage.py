@@ -0,0 +1,259 @@
+import os
+import time
+import shutil
+import threading
+from collections.abc import Callable
+from logger import logger
+from settings import config
+from metrics import metrics
+
+
+def _is_wav(path: str) -> bool:
+    return path.endswith(".wav")
+
+
+def _is_remuxed_ts(path: str) -> bool:
+    # A .ts is only a spare copy once its .mp4 exists
+    return path.endswith(".ts") and os.path.exists(path[:-3] + ".mp4")
+
+
+def _is_vod(path: str) -> bool:
+    return path.endswith((".mp4", ".mkv", ".ts")) and (
+        os.path.basename(os.path.dirname(path)) != "clips"
+    )
+
+
+# Artifact classes that can be evicted, in the order of the eviction_order setting
+ARTIFACT_CLASSES: dict[str, Callable[[str], bool]] = {
+    "wav": _is_wav,
+    "ts": _is_remuxed_ts,
+    "vod": _is_vod,
+}
+
+
+class StorageManager:
+    """Keeps the disk holding the recordings from filling up.
+
+    Sizes of the files under `root` are kept in an index that is updated as
+    files are written instead of walking the tree on every check, with a
+    full rescan every `rescan_interval` seconds to pick up anything missed.
+    Once the disk is more than `high_watermark` percent full, files are
+    evicted by class in `eviction_order`, oldest first, until it is back
+    under `low_watermark`. Dot directories (schedules, cache), the job
+    journal, files younger than `min_age` seconds and paths returned by
+    `protected` are never evicted. Recorded videos (the `vod` class) are
+    only evicted when they are listed in `eviction_order`, which they are
+    not by default.
+    """
+
+    def __init__(
+        self,
+        root: str = "recordings",
+        enabled: bool = True,
+        high_watermark: float = 90,
+        low_watermark: float = 80,
+        min_free: int = 5 * 1024**3,
+        eviction_order: list[str] | None = None,
+        min_age: float = 3600,
+        rescan_interval: float = 3600,
+        check_interval: float = 30,
+        disk_usage: Callable = shutil.disk_usage,
+    ):
+        self.root = root
+        self.enabled = enabled
+        self.high_watermark = high_watermark
+        self.low_watermark = min(low_watermark, high_watermark)
+        self.min_free = min_free
+        self.eviction_order = [
+            name
+            for name in (eviction_order or ["wav", "ts"])
+            if name in ARTIFACT_CLASSES
+        ]
+        self.min_age = min_age
+        self.rescan_interval = rescan_interval
+        self.check_interval = check_interval
+        self.disk_usage = disk_usage
+        self.protected: Callable[[], set[str]] | None = None
+        self.index: dict[str, tuple[int, float]] = {}  # path -> (size, mtime)
+        self.scanned: float | None = None  # monotonic time of the last scan
+        self.checked: float | None = None
+        self.evicted = 0  # bytes deleted so far
+        self.lock = threading.RLock()
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(root={self.root!r}, files={len(self.index)!r}, high_watermark={self.high_watermark!r})"
+
+    @staticmethod
+    def _excluded(relative: str) -> bool:
+        parts = relative.split(os.sep)
+        return any(part.startswith(".") for part in parts) or parts[-1].startswith(
+            "jobs.db"
+        )
+
+    def scan(self) -> None:
+        """Rebuild the index with a walk over the whole tree."""
+        index = {}
+        for directory, _, files in os.walk(self.root):
+            for name in files:
+                path = os.path.join(directory, name)
+                if self._excluded(os.path.relpath(path, self.root)):
+                    continue
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                index[path] = (stat.st_size, stat.st_mtime)
+        with self.lock:
+            self.index = index
+            self.scanned = time.monotonic()
+
+    def track(self, path: str | None) -> None:
+        """Add or update a file in the index after it was written."""
+        if not path or self._excluded(os.path.relpath(path, self.root)):
+            return
+        try:
+            stat = os.stat(path)
+        except OSError:
+            self.forget(path)
+            return
+        with self.lock:
+            self.index[path] = (stat.st_size, stat.st_mtime)
+
+    def forget(self, path: str) -> None:
+        with self.lock:
+            self.index.pop(path, None)
+
+    def total_size(self) -> int:
+        with self.lock:
+            return sum(size for size, _ in self.index.values())
+
+    def used_percent(self) -> float:
+        usage = self.disk_usage(self.root)
+        return 100 * usage.used / usage.total
+
+    def free_bytes(self) -> int:
+        return self.disk_usage(self.root).free
+
+    def _candidates(self) -> list[str]:
+        """Evictable files, most evictable first."""
+        now = time.time()
+        protected = self.protected() if self.protected else set()
+        with self.lock:
+            files = sorted(self.index.items(), key=lambda item: item[1][1])
+
+        candidates = []
+        for name in self.eviction_order:
+            matches = ARTIFACT_CLASSES[name]
+            for path, (_, mtime) in files:
+                if (
+                    path not in candidates
+                    and path not in protected
+                    and now - mtime >= self.min_age
+                    and matches(path)
+                ):
+                    candidates.append(path)
+        return candidates
+
+    def evict(
+        self, target_percent: float | None = None, target_free: int | None = None
+    ) -> int:
+        """Evict files until `target_free` bytes are free, or without one until
+        the disk is at most `target_percent` full.
+
+        Returns the bytes freed.
+        """
+        target = self.low_watermark if target_percent is None else target_percent
+        freed = 0
+        for path in self._candidates():
+            if target_free is not None:
+                if self.free_bytes() >= target_free:
+                    break
+            elif self.used_percent() <= target:
+                break
+            with self.lock:
+                size = self.index.get(path, (0, 0))[0]
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError:
+                logger.exception(f"Failed to evict {path}")
+                continue
+            self.forget(path)
+            freed += size
+            self.evicted += size
+            logger.info(f"Evicted {path} ({size / 1024**2:.0f} MB) to free disk space")
+        return freed
+
+    def check(self, force: bool = False) -> None:
+        """Evict above the high watermark. Cheap enough to call often."""
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        if (
+            not force
+            and self.checked is not None
+            and now - self.checked < self.check_interval
+        ):
+            return
+        self.checked = now
+
+        try:
+            if self.scanned is None or now - self.scanned >= self.rescan_interval:
+                self.scan()
+            used = self.used_percent()
+        except OSError:
+            return
+        if used > self.high_watermark:
+            logger.warning(
+                f"Disk is {used:.0f}% full, evicting down to {self.low_watermark:.0f}%"
+            )
+            self.evict()
+
+    def ensure_free_space(self) -> bool:
+        """Make room before a recording starts. Returns False if there is none."""
+        if not self.enabled:
+            return True
+        try:
+            self.check(force=True)
+            if self.free_bytes() >= self.min_free:
+                return True
+            # Under the minimum free space while under the watermark, evict anyway
+            self.evict(target_free=self.min_free)
+            if self.free_bytes() >= self.min_free:
+                return True
+            free = self.free_bytes()
+        except OSError:
+            return True
+        logger.error(
+            f"Only {free / 1024**3:.1f} GB free for recordings, "
+            f"{self.min_free / 1024**3:.1f} GB needed"
+        )
+        return False
+
+
+storage = StorageManager(
+    enabled=config.getboolean("storage", "enabled", fallback=True),
+    high_watermark=config.getfloat("storage", "high_watermark", fallback=90),
+    low_watermark=config.getfloat("storage", "low_watermark", fallback=80),
+    min_free=int(config.getfloat("storage", "min_free_gb", fallback=5) * 1024**3),
+    eviction_order=[
+        name.strip()
+        for name in config.get("storage", "eviction_order", fallback="wav, ts").split(
+            ","
+        )
+    ],
+    min_age=config.getfloat("storage", "min_age_minutes", fallback=60) * 60,
+    rescan_interval=config.getfloat("storage", "rescan_interval", fallback=3600),
+)
+
+metrics.gauge(
+    "stored_bytes",
+    "Size of the artifacts under recordings.",
+    function=storage.total_size,
+)
+metrics.counter(
+    "evicted_bytes_total",
+    "Bytes of artifacts deleted to free disk space.",
+    function=lambda: storage.evicted,
+)
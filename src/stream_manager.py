@@ -4,7 +4,12 @@ import signal
 from logger import logger
 from settings import config
 from stream_monitor import StreamMonitor
-from utils import get_size
+from scheduler import MonitorScheduler
+from rate_limit import limiter
+from throughput import throughput
+from config_watcher import ConfigWatcher
+from utils import load_config
+from processor import processor
 from tqdm import tqdm
 
 
@@ -16,6 +21,10 @@ class StreamManager:
         self.running = False
 
         self.retry_delay = config.getint("general", "retry_delay", fallback=120)
+        # threads: one thread per streamer, asyncio: one event loop for all streamers
+        self.scheduler_mode = config.get("general", "scheduler", fallback="threads")
+        self.scheduler: MonitorScheduler | None = None
+        self.watcher: ConfigWatcher | None = None
 
         signal.signal(signal.SIGINT, self._signal_handler)
         signal.signal(signal.SIGTERM, self._signal_handler)
@@ -28,12 +37,13 @@ class StreamManager:
         self.stop()
         sys.exit(0)
 
-    def get_streamers_list(self) -> list[str]:
-        if not config or not config.has_section("streamers"):
+    def get_streamers_list(self, main_config=None) -> list[str]:
+        main_config = main_config or config
+        if not main_config or not main_config.has_section("streamers"):
             logger.warning("No streamers section in configuration")
             return []
 
-        streamers_str = config.get("streamers", "streamers", fallback="")
+        streamers_str = main_config.get("streamers", "streamers", fallback="")
         if not streamers_str.strip():
             return []
 
@@ -47,7 +57,11 @@ class StreamManager:
             return
 
         self.running = True
+        processor.start()
         streamers: list[str] = []
+        watch = not streamer_name and config.getboolean(
+            "general", "watch_config", fallback=False
+        )
 
         if streamer_name:
             streamers = [streamer_name]
@@ -55,31 +69,102 @@ class StreamManager:
             streamers = self.get_streamers_list()
             if not streamers:
                 logger.warning("No streamers to monitor")
-                return
+                if not watch:
+                    return
 
         logger.info(
             f"Starting to monitor {len(streamers)} streamers: {', '.join(streamers)}"
         )
 
-        # Create and start a monitor for each streamer
-        for name in streamers:
-            monitor = StreamMonitor(name, self.retry_delay)
-            self.monitors[name] = monitor
-            monitor.daemon = True  # Set as daemon so they exit when main thread exits
-            monitor.start()
+        if self.scheduler_mode == "asyncio":
+            self.scheduler = MonitorScheduler(
+                probe_workers=config.getint("general", "probe_workers", fallback=8),
+                max_recordings=config.getint("general", "max_recordings", fallback=64),
+            )
+            self.scheduler.start()
+
+        # Create and start a monitor for each streamer, with staggered first checks
+        for index, name in enumerate(streamers):
+            self._add_monitor(
+                name, limiter.stagger_delay(index, len(streamers), self.retry_delay)
+            )
+
+        if watch:
+            self.watcher = ConfigWatcher(
+                self._on_config_change,
+                interval=config.getfloat(
+                    "general", "watch_config_interval", fallback=5
+                ),
+            )
+            self.watcher.start()
 
         logger.success("Stream manager started successfully")
 
+    def _add_monitor(self, name: str, start_delay: float = 0) -> None:
+        monitor = StreamMonitor(name, self.retry_delay)
+        monitor.start_delay = start_delay
+        self.monitors[name] = monitor
+        if self.scheduler:
+            self.scheduler.add(monitor, start_delay)
+            return
+        monitor.daemon = True  # Set as daemon so they exit when main thread exits
+        monitor.start()
+
+    def _remove_monitor(self, name: str) -> None:
+        monitor = self.monitors.pop(name, None)
+        if not monitor:
+            return
+        if self.scheduler:
+            self.scheduler.remove(monitor.streamer_name)
+        else:
+            monitor.stop()
+
+    def _on_config_change(self, changed: set[str]) -> None:
+        """Apply changed config files without touching unaffected monitors."""
+        if "config" in changed:
+            main_config = load_config("config")
+            if main_config:
+                self._sync_streamers(self.get_streamers_list(main_config))
+
+        # Per-streamer files, default.ini affects every streamer without its own file
+        changed = {name.lower() for name in changed}
+        for monitor in list(self.monitors.values()):
+            if monitor.streamer_name in changed or "default" in changed:
+                monitor.reload_pending = True
+
+    def _sync_streamers(self, streamers: list[str]) -> None:
+        added = [name for name in streamers if name not in self.monitors]
+        removed = [name for name in self.monitors if name not in streamers]
+
+        for name in removed:
+            logger.info(f"Stopped monitoring {name}, removed from configuration")
+            self._remove_monitor(name)
+
+        for index, name in enumerate(added):
+            logger.info(f"Monitoring {name}, added to configuration")
+            self._add_monitor(
+                name, limiter.stagger_delay(index, len(added), self.retry_delay)
+            )
+
     def stop(self) -> None:
         if not self.running:
             return
 
         logger.info("Stopping all streamer monitors..")
 
+        if self.watcher:
+            self.watcher.stop()
+            self.watcher = None
+
+        if self.scheduler:
+            self.scheduler.stop()
+            self.scheduler = None
+
         # Stop all monitors
         for streamer_name, monitor in self.monitors.items():
             monitor.stop()
-            monitor.join(timeout=0.02)
+            if monitor.is_alive():
+                monitor.join(timeout=0.02)
 
         self.monitors.clear()
         self.running = False
@@ -88,10 +173,8 @@ class StreamManager:
         return list(self.monitors.keys())
 
     def wait(self) -> None:
-        recordings_dir = "recordings"
-        prev_size = get_size(recordings_dir)
-        total = 0
         time.sleep(3)
+        throughput.sample()
 
         with tqdm(
             desc="Downloading",
@@ -101,15 +184,18 @@ class StreamManager:
         ) as pbar:
             try:
                 while self.running:
-                    cur_size = get_size(recordings_dir)
-                    speed = cur_size - prev_size
-                    prev_size = cur_size
-                    speed = max(speed, 0)
-                    total += speed
-
-                    # Set postfix to current speed
-                    pbar.set_postfix_str(f"{speed:.3f} MB/s")
-                    pbar.n = total
+                    total, speeds = throughput.sample()
+                    speed = sum(speeds.values()) / 1_000_000
+
+                    # Set postfix to current speed, with a breakdown per streamer
+                    postfix = f"{speed:.3f} MB/s"
+                    if len(speeds) > 1:
+                        postfix += " | " + ", ".join(
+                            f"{name}: {value / 1_000_000:.2f} MB/s"
+                            for name, value in sorted(speeds.items())
+                        )
+                    pbar.set_postfix_str(postfix)
+                    pbar.n = total / 1_000_000
                     pbar.refresh()
                     time.sleep(1)
             except KeyboardInterrupt:
@@ -4,15 +4,34 @@ import time
 import threading
 import subprocess
 import datetime
+import json
 from logger import logger
 from utils import (
     determine_source,
-    check_stream_live,
+    probe_stream,
     load_config,
     fetch_metadata,
     StreamPlatform,
 )
+from settings import config
 from processor import processor
+from live_status import live_status
+from polling import PollingPolicy
+from rate_limit import limiter
+from throughput import throughput
+from storage import storage
+from metrics import probes, probe_seconds, go_live_seconds, subprocess_exits
+from recorder import (
+    build_streamlink_command,
+    build_fmp4_mux_command,
+    build_segment_mux_command,
+    build_concat_command,
+    parse_duration,
+    SegmentWatcher,
+    RecordingSession,
+)
+from live_clipper import LiveClipper, live_clipping_enabled
+from streamlink_backend import streamlink_backend, StreamlinkError, READ_SIZE
 
 
 class StreamMonitor(threading.Thread):
@@ -25,10 +44,29 @@ class StreamMonitor(threading.Thread):
         self.retry_delay = retry_delay
         self.running = False
         self.config = None
+        self.reload_pending = False  # Set when the config file changed on disk
         self.stream_metadata = {}
         self.stream_source_url = None
         self.stream_platform: StreamPlatform | None = None
         self.current_process = None  # Store the running streamlink subprocess
+        self.current_stream = None  # Stream opened through the streamlink API
+        self.start_delay = 0.0  # Seconds to wait before the first check
+        self.resolved_url: str | None = None  # Stream URL resolved by the last probe
+        self.live_since: float | None = None  # When the last probe saw the stream live
+        self.first_byte_latency: float | None = None
+        self.parts_queued = 0  # Parts of a split recording handed to the processor
+        self.polling = PollingPolicy(
+            self.streamer_name,
+            retry_delay,
+            enabled=config.getboolean("polling", "adaptive", fallback=False),
+            min_delay=config.getfloat("polling", "min_delay", fallback=30),
+            max_delay=config.getfloat("polling", "max_delay", fallback=1800),
+            window_minutes=config.getfloat("polling", "window_minutes", fallback=60),
+            off_schedule_factor=config.getfloat(
+                "polling", "off_schedule_factor", fallback=5
+            ),
+            dormant_days=config.getfloat("polling", "dormant_days", fallback=14),
+        )
         self._load_configuration()
 
     def _load_configuration(self) -> bool:
@@ -55,8 +93,25 @@ class StreamMonitor(threading.Thread):
 
         return True
 
+    def apply_pending_configuration(self) -> None:
+        """Reload a changed config file. Only called between recordings, so the
+        new settings apply to the next recording."""
+        if not self.reload_pending:
+            return
+
+        self.reload_pending = False
+        platform = self.stream_platform
+        if not self._load_configuration():
+            return
+
+        logger.info(f"Reloaded configuration for {self.streamer_name}")
+        if platform != self.stream_platform:
+            live_status.unregister(platform, self.streamer_name)
+            live_status.register(self.stream_platform, self.streamer_name)
+
     def _get_youtube_stream_url(self, url: str) -> str | None:
         """Use yt-dlp to get the direct stream URL for YouTube live streams."""
+        limiter.acquire(StreamPlatform.YOUTUBE)
         try:
             result = subprocess.run(
                 ["yt-dlp", url, "--get-url", "-f", "best"],
@@ -78,16 +133,207 @@ class StreamMonitor(threading.Thread):
             logger.exception("Error running yt-dlp")
             return None
 
-    def download_video(self) -> tuple[bool, str]:
+    def check_live(self) -> bool:
+        """Check the batched live status, falling back to a single streamlink probe.
+
+        Metadata and the resolved stream URL found by the probe are kept for
+        the recording, so going live never needs a second probe.
+        """
+        self.apply_pending_configuration()
+        return self._check_status(fresh=False)
+
+    def check_reconnect(self) -> bool:
+        """Check whether a dropped stream is back, during a recording session.
+
+        Unlike check_live the status is fetched fresh instead of from the
+        batched cache, which still says live right after the stream ended,
+        and pending configuration is left for the next recording.
+        """
+        return self._check_status(fresh=True)
+
+    def _check_status(self, fresh: bool) -> bool:
+        self.stream_metadata = {}
+        self.resolved_url = None
+        platform = self.stream_platform.value if self.stream_platform else "unknown"
+
+        start = time.monotonic()
+        if fresh:
+            live = live_status.check_now(self.stream_platform, self.streamer_name)
+        else:
+            live = live_status.is_live(self.stream_platform, self.streamer_name)
+        method = "api"
+        if live is None:
+            # Skip this round rather than queue up behind a throttled platform
+            if not limiter.acquire(self.stream_platform, limiter.max_wait):
+                probes.inc(platform=platform, method="streamlink", result="deferred")
+                return False
+            quality = self.config["streamlink"]["quality"] if self.config else "best"
+            start = time.monotonic()
+            probe = self._probe(quality)
+            method = "streamlink"
+            live = probe is not None
+            if live:
+                self.stream_metadata = probe["metadata"]
+                self.resolved_url = probe["url"]
+        elif live:
+            self.stream_metadata = live_status.get_metadata(
+                self.stream_platform, self.streamer_name
+            )
+
+        probe_seconds.observe(
+            time.monotonic() - start, platform=platform, method=method
+        )
+        probes.inc(
+            platform=platform, method=method, result="live" if live else "offline"
+        )
+        if live:
+            self.live_since = time.monotonic()
+        return live
+
+    def _probe(self, quality: str) -> dict | None:
+        if streamlink_backend.available:
+            try:
+                return streamlink_backend.probe(
+                    self.stream_source_url,
+                    quality,
+                    self.stream_platform,
+                    self._get_flags(),
+                )
+            except StreamlinkError as e:
+                logger.debug(f"Streamlink API probe failed, using the CLI: {e}")
+        return probe_stream(self.stream_source_url, quality)
+
+    def _get_flags(self) -> list[str]:
+        if not self.config or not self.config.has_option("streamlink", "flags"):
+            return []
+        flags = self.config.get("streamlink", "flags").strip(",").split(",")
+        return [flag.strip() for flag in flags if flag.strip()]
+
+    def _get_output_path(self) -> str:
+        current_time = datetime.datetime.now().strftime(self.datetime_format)
+        stream_title = self.stream_metadata.get("title") or ""
+        stream_id = self.stream_metadata.get("id") or current_time
+
+        extension = "mp4" if self._records_fmp4() else "ts"
+
+        return f"recordings/{self.streamer_name}/{stream_id}/{stream_title}-{self.streamer_name}-{current_time}.{extension}"
+
+    def _records_fmp4(self) -> bool:
+        return (
+            self.config is not None
+            and self.config.get("video", "recording_format", fallback="ts") == "fmp4"
+        )
+
+    def _split_duration(self) -> int | None:
+        """Length of each part in seconds if the stream is split into parts."""
+        if not self.config or not self.config.getboolean(
+            "video", "split_into_parts", fallback=False
+        ):
+            return None
+        try:
+            return parse_duration(
+                self.config.get("video", "split_duration", fallback="06:00:00")
+            )
+        except ValueError:
+            logger.error("Invalid [video] split_duration, recording a single file")
+            return None
+
+    def _start_muxer(
+        self, output_path: str, stdin, segments: SegmentWatcher | None
+    ) -> subprocess.Popen:
+        """Start ffmpeg muxing the MPEG-TS on `stdin` into a fragmented MP4 or parts."""
+        log_level = self.config.get("encoding", "log", fallback="error")
+        if segments:
+            segments.resume()
+            command = build_segment_mux_command(
+                segments.pattern,
+                segments.list_path,
+                self._split_duration(),
+                self._records_fmp4(),
+                log_level,
+                start_number=len(segments.finished),
+            )
+        else:
+            command = build_fmp4_mux_command(output_path, log_level)
+        return subprocess.Popen(command, stdin=stdin, stdout=subprocess.DEVNULL)
+
+    @staticmethod
+    def _wait_muxer(muxer: subprocess.Popen) -> bool:
+        code = muxer.wait()
+        subprocess_exits.inc(command="ffmpeg", code=code)
+        return code == 0
+
+    def _queue_finished_parts(self, segments: SegmentWatcher) -> None:
+        """Hand every finished part to the processor while the stream continues."""
+        for part in segments.poll():
+            logger.info(f"Finished part {os.path.basename(part)}")
+            processor.process(
+                part, self.streamer_name, self.config, self._split_duration()
+            )
+            self.parts_queued += 1
+
+    def _attach_metadata(self, output_dir: str, fetch: bool = False) -> None:
+        """Save stream metadata next to the recording, fetching it first if needed."""
+        if fetch:
+            limiter.acquire(self.stream_platform)
+            metadata = fetch_metadata(self.stream_source_url)
+            if not metadata:
+                return
+            self.stream_metadata.update(metadata)
+
+        try:
+            os.makedirs(output_dir, exist_ok=True)
+            with open(os.path.join(output_dir, "metadata.json"), "w") as f:
+                json.dump(self.stream_metadata, f, indent=2)
+        except OSError:
+            logger.exception(f"Failed to save metadata for {self.streamer_name}")
+
+    def _report_progress(
+        self, output_path: str, segments: SegmentWatcher | None = None
+    ) -> None:
+        """Report the size of the output file and note the first recorded bytes."""
+        if segments:
+            self._queue_finished_parts(segments)
+            size = segments.total_bytes()
+        else:
+            try:
+                size = os.path.getsize(output_path)
+            except OSError:
+                return
+
+        throughput.update(self.streamer_name, size)
+        storage.check()
+        if size > 0:
+            self._mark_first_byte()
+
+    def _mark_first_byte(self) -> None:
+        if self.first_byte_latency is not None or self.live_since is None:
+            return
+
+        self.first_byte_latency = time.monotonic() - self.live_since
+        go_live_seconds.observe(
+            self.first_byte_latency,
+            platform=self.stream_platform.value if self.stream_platform else "unknown",
+        )
+        logger.info(
+            f"Go-live to first byte for {self.streamer_name}: {self.first_byte_latency:.2f}s"
+        )
+
+    def download_video(
+        self, output_path: str | None = None, segments: SegmentWatcher | None = None
+    ) -> tuple[bool, str]:
+        """Record one connection to the stream into `output_path`.
+
+        Split recordings write parts through `segments`, which a resumed
+        session passes back in to continue the numbering.
+        """
+        # Set again once this connection delivers its first byte
+        self.first_byte_latency = None
         if not self.config:
             return False, ""
 
         quality = self.config["streamlink"]["quality"]
-        current_time = datetime.datetime.now().strftime(self.datetime_format)
-        stream_title = self.stream_metadata.get("title", "")
-        stream_id = self.stream_metadata.get("id", current_time)
-
-        output_path = f"recordings/{self.streamer_name}/{stream_id}/{stream_title}-{self.streamer_name}-{current_time}.ts"
+        output_path = output_path or self._get_output_path()
 
         output_dir = os.path.dirname(output_path)
         os.makedirs(output_dir, exist_ok=True)
@@ -96,29 +342,64 @@ class StreamMonitor(threading.Thread):
         # This is a workaround for YouTube Live streams that stopped working with streamlink directly
         stream_url = self.stream_source_url
         if self.stream_platform == StreamPlatform.YOUTUBE:
-            logger.info(
-                "YouTube source detected, using yt-dlp to get direct stream URL..."
-            )
-            direct_url = self._get_youtube_stream_url(self.stream_source_url)
-            if direct_url:
-                stream_url = direct_url
+            if self.resolved_url:
+                # The liveness probe already resolved the stream, no need to ask yt-dlp
+                stream_url = self.resolved_url
             else:
-                logger.warning(
-                    "Failed to get direct URL from yt-dlp, falling back to original URL"
+                logger.info(
+                    "YouTube source detected, using yt-dlp to get direct stream URL..."
                 )
+                direct_url = self._get_youtube_stream_url(self.stream_source_url)
+                if direct_url:
+                    stream_url = direct_url
+                else:
+                    logger.warning(
+                        "Failed to get direct URL from yt-dlp, falling back to original URL"
+                    )
+
+        if segments is None and self._split_duration():
+            segments = SegmentWatcher(output_path)
 
-        command = ["streamlink", "-o", output_path, stream_url, quality]
+        if streamlink_backend.available:
+            result = self._download_with_api(stream_url, quality, output_path, segments)
+            if result is not None:
+                return result
 
-        if self.config.has_option("streamlink", "flags"):
-            flags = self.config.get("streamlink", "flags").strip(",").split(",")
-            command.extend([flag.strip() for flag in flags if flag.strip()])
+        piped = segments is not None or self._records_fmp4()
+        command = build_streamlink_command(
+            stream_url, quality, self._get_flags(), None if piped else output_path
+        )
 
         try:
-            # Start the download process
-            self.current_process = subprocess.Popen(
-                command, stdout=sys.stdout, stderr=subprocess.DEVNULL
-            )
-            success = self.current_process.wait() == 0  # Wait until the stream ends
+            # Start the download process, piped into ffmpeg for fragmented MP4 or parts
+            muxer = None
+            if piped:
+                process = subprocess.Popen(
+                    command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+                )
+                muxer = self._start_muxer(output_path, process.stdout, segments)
+                process.stdout.close()  # ffmpeg holds the only reader now
+            else:
+                process = subprocess.Popen(
+                    command, stdout=sys.stdout, stderr=subprocess.DEVNULL
+                )
+            self.current_process = process
+            throughput.start(self.streamer_name)
+
+            # Wait until the stream ends, reporting how much has been recorded
+            while process.poll() is None:
+                self._report_progress(output_path, segments)
+                time.sleep(0.5)
+            code = process.wait()
+            subprocess_exits.inc(command="streamlink", code=code)
+            success = code == 0
+            if muxer is not None:
+                success = self._wait_muxer(muxer) and success
+
+            if segments:
+                # The last part is listed once ffmpeg has finished it
+                self._queue_finished_parts(segments)
+                return success, ""
 
             if success:
                 if output_path and os.path.exists(output_path):
@@ -135,51 +416,252 @@ class StreamMonitor(threading.Thread):
             return False, ""
         finally:
             self.current_process = None
+            throughput.finish(self.streamer_name)
 
-    def run(self) -> None:
+    def _download_with_api(
+        self,
+        stream_url: str,
+        quality: str,
+        output_path: str,
+        segments: SegmentWatcher | None = None,
+    ) -> tuple[bool, str] | None:
+        """Record through the streamlink API. Returns None to fall back to the CLI."""
+        self.first_byte_latency = None
+        try:
+            stream_fd = streamlink_backend.open(
+                stream_url, quality, self.stream_platform, self._get_flags()
+            )
+        except StreamlinkError as e:
+            logger.warning(f"Streamlink API failed, falling back to the CLI: {e}")
+            return None
+
+        if stream_fd is None:
+            logger.warning(f"No {quality} stream available for {self.streamer_name}")
+            return False, ""
+
+        self.current_stream = stream_fd
+        throughput.start(self.streamer_name)
+        success = True
+        muxer = None
+        last_check = time.monotonic()
+        try:
+            if segments or self._records_fmp4():
+                muxer = self._start_muxer(output_path, subprocess.PIPE, segments)
+                sink = muxer.stdin
+            else:
+                sink = open(output_path, "wb")
+
+            with sink as f:
+                while True:
+                    data = stream_fd.read(READ_SIZE)
+                    if not data:
+                        break
+                    f.write(data)
+                    throughput.add(self.streamer_name, len(data))
+                    self._mark_first_byte()
+                    if segments and time.monotonic() - last_check > 1:
+                        self._queue_finished_parts(segments)
+                        last_check = time.monotonic()
+        except (OSError, ValueError, StreamlinkError):
+            # Raised when stop() closes the stream or the connection is lost
+            success = False
+            if self.running:
+                logger.exception("Error reading stream through the streamlink API")
+        finally:
+            self.current_stream = None
+            stream_fd.close()
+            if muxer is not None:
+                success = self._wait_muxer(muxer) and success
+            throughput.finish(self.streamer_name)
+
+        if segments:
+            self._queue_finished_parts(segments)
+            return success, ""
+
+        if success and os.path.exists(output_path):
+            logger.debug(f"Found downloaded file: {output_path}")
+            return True, output_path
+        return False, ""
+
+    def start_monitoring(self) -> bool:
         if not self.config or not self.stream_source_url:
             logger.error(
                 f"Cannot start monitoring for {self.streamer_name}: missing configuration"
             )
-            return
+            return False
 
         self.running = True
+        live_status.register(self.stream_platform, self.streamer_name)
         logger.info(f"Started monitoring {self.streamer_name}")
+        return True
+
+    def next_delay(self) -> float:
+        return limiter.jitter(self.polling.next_delay())
+
+    def poll(self) -> float:
+        """Check once, record the stream until it ends if it is live, and return
+        the seconds to wait before the next check."""
+        if self.check_live():
+            self.record_stream()
+            return self.next_delay()
 
+        delay = self.next_delay()
+        logger.info(
+            f"{self.streamer_name} is offline. Retrying in {delay:.0f} seconds.."
+        )
+        return delay
+
+    def record_stream(self) -> None:
+        logger.success(f"{self.streamer_name} is live!")
+        self.polling.record_go_live()
+
+        # A full disk makes streamlink fail in the middle of the stream
+        if not storage.ensure_free_space():
+            logger.error(f"Not recording {self.streamer_name}, the disk is full")
+            return
+
+        # Start recording right away, metadata missing from the probe is fetched in the background
+        output_path = self._get_output_path()
+        output_dir = os.path.dirname(output_path)
+        if self.stream_metadata:
+            self._attach_metadata(output_dir)
+        else:
+            threading.Thread(
+                target=self._attach_metadata,
+                args=(output_dir, True),
+                name=f"meta-{self.streamer_name}",
+                daemon=True,
+            ).start()
+
+        # Keep recording into the same session while reconnects succeed
+        session = RecordingSession(output_path)
+        started = time.monotonic()
+        segments = SegmentWatcher(output_path) if self._split_duration() else None
+        self.parts_queued = 0
+        deadline = None
+        clippers: list[LiveClipper] = []
+        while True:
+            part_path = output_path if segments else session.next_part()
+            clipper = None
+            if live_clipping_enabled(self.config):
+                clipper = LiveClipper.from_config(
+                    part_path, self.streamer_name, self.config
+                )
+                clipper.start()
+                clippers.append(clipper)
+
+            download_success, _ = self.download_video(part_path, segments)
+
+            if clipper is not None:
+                # It clips the tail of this part while the reconnect goes ahead
+                clipper.stop()
+
+            # Only a connection that recorded something extends the session
+            if self.first_byte_latency is not None:
+                deadline = time.monotonic() + self.config.getfloat(
+                    "video", "reconnect_timeout", fallback=60
+                )
+            if not self._await_reconnect(deadline):
+                break
+            logger.info(f"{self.streamer_name} is still live, resuming the recording")
+
+        # Every part must be clipped to the end before the files are processed
+        for clipper in clippers:
+            clipper.join()
+
+        if download_success:
+            logger.success(f"Stream for {self.streamer_name} downloaded successfully")
+        else:
+            logger.warning(f"Recording of {self.streamer_name} ended with an error")
+
+        # Process the session once, split recordings have already queued their parts
+        if segments:
+            logger.info(f"Queued {self.parts_queued} parts of {self.streamer_name}")
+            return
+
+        video_paths = self._stitch_session(session)
+        if not video_paths:
+            logger.error("Downloaded file path not found, cannot process")
+        for video_path in video_paths:
+            processor.process(
+                video_path,
+                self.streamer_name,
+                self.config,
+                (time.monotonic() - started) / len(video_paths),
+            )
+
+    def _await_reconnect(self, deadline: float | None) -> bool:
+        """Wait for the stream to come back before `deadline`.
+
+        Returns True if it is live again and the session should continue.
+        """
+        if deadline is None:
+            return False
+
+        interval = self.config.getfloat("video", "reconnect_interval", fallback=5)
+        while self.running and time.monotonic() < deadline:
+            time.sleep(min(interval, max(deadline - time.monotonic(), 0)))
+            if self.running and self.check_reconnect():
+                return True
+        return False
+
+    def _stitch_session(self, session: RecordingSession) -> list[str]:
+        """Join the parts of a session into one file and return the files to process.
+
+        If joining fails the parts are returned as they are.
+        """
+        parts = session.recorded_parts()
+        for path in session.parts:
+            if path not in parts and os.path.exists(path):
+                os.remove(path)
+        if len(parts) <= 1:
+            return parts
+
+        logger.info(f"Joining {len(parts)} parts of {self.streamer_name}'s stream")
+        list_path = session.write_concat_list(parts)
+        command = build_concat_command(
+            list_path,
+            session.stitched_path,
+            self.config.get("encoding", "log", fallback="error"),
+        )
+        try:
+            result = subprocess.run(command, stdout=subprocess.DEVNULL)
+            subprocess_exits.inc(command="ffmpeg", code=result.returncode)
+            joined = result.returncode == 0 and os.path.exists(session.stitched_path)
+        except OSError:
+            logger.exception("Failed to run ffmpeg")
+            joined = False
+
+        if not joined:
+            logger.error(f"Failed to join the parts of {session.output_path}")
+            return parts
+
+        for path in parts:
+            os.remove(path)
+        os.remove(list_path)
+        os.replace(session.stitched_path, session.output_path)
+        return [session.output_path]
+
+    def run(self) -> None:
+        if not self.start_monitoring():
+            return
+
+        time.sleep(self.start_delay)
         while self.running:
+            delay = self.retry_delay
             try:
-                if check_stream_live(self.stream_source_url):
-                    logger.success(f"{self.streamer_name} is live!")
-
-                    self.stream_metadata: dict = fetch_metadata(self.stream_source_url)
-                    download_success, video_path = self.download_video()
-
-                    if download_success:
-                        logger.success(
-                            f"Stream for {self.streamer_name} downloaded successfully"
-                        )
-                    else:
-                        logger.warning(
-                            f"Failed to download stream for {self.streamer_name}"
-                        )
-
-                    # Process video
-                    if video_path:
-                        processor.process(video_path, self.streamer_name, self.config)
-                    else:
-                        logger.error("Downloaded file path not found, cannot process")
-
-                else:
-                    logger.info(
-                        f"{self.streamer_name} is offline. Retrying in {self.retry_delay} seconds.."
-                    )
+                delay = self.poll()
             except Exception:
                 logger.exception(f"Error monitoring {self.streamer_name}")
 
-            time.sleep(self.retry_delay)
+            time.sleep(delay)
 
     def stop(self) -> None:
         self.running = False
+        live_status.unregister(self.stream_platform, self.streamer_name)
+        if self.current_stream is not None:
+            logger.debug(f"Closing streamlink API stream for {self.streamer_name}")
+            self.current_stream.close()
         if self.current_process is not None:
             logger.debug(f"Terminating streamlink process for {self.streamer_name}")
             self.current_process.terminate()
@@ -0,0 +1,180 @@
+import threading
+from logger import logger
+from settings import config
+from recorder import split_flags
+from utils import StreamPlatform
+
+# The Streamlink Python API is optional, the streamlink CLI is used without it
+try:
+    from streamlink import Streamlink
+    from streamlink.exceptions import StreamlinkError, NoPluginError
+except ImportError:
+    Streamlink = None
+    StreamlinkError = NoPluginError = Exception
+
+READ_SIZE = 64 * 1024
+
+
+class StreamlinkBackend:
+    """In-process Streamlink API backend with long-lived sessions per platform.
+
+    Sessions keep their HTTP connection pool and resolved plugins between
+    probes and recordings, so neither pays interpreter start-up or fresh TLS
+    handshakes. Each distinct set of session options gets its own session, so
+    one streamer's flags never apply to another. Callers fall back to the CLI
+    when `available` is False or a call raises StreamlinkError.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.sessions: dict[tuple[StreamPlatform | None, frozenset], "Streamlink"] = {}
+        self.plugins: dict[str, tuple[str, type, str]] = {}
+        self.lock = threading.Lock()
+
+        if enabled and Streamlink is None:
+            logger.warning(
+                "streamlink is not installed, falling back to the streamlink CLI"
+            )
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(available={self.available!r}, sessions={len(self.sessions)!r})"
+
+    @property
+    def available(self) -> bool:
+        return self.enabled and Streamlink is not None
+
+    def _session(
+        self, platform: StreamPlatform | None, options: dict | None = None
+    ) -> "Streamlink":
+        """The session for `platform` with exactly these session options set."""
+        options = options or {}
+        key = (platform, frozenset(options.items()))
+        with self.lock:
+            if key not in self.sessions:
+                session = Streamlink()
+                for name, value in options.items():
+                    try:
+                        session.set_option(name, value)
+                    except (KeyError, ValueError, TypeError):
+                        logger.debug(f"Ignoring unsupported streamlink option --{name}")
+                self.sessions[key] = session
+            return self.sessions[key]
+
+    def _resolve(self, session: "Streamlink", url: str) -> tuple[str, type, str]:
+        # Plugin matching walks every plugin pattern, cache it per URL
+        with self.lock:
+            resolved = self.plugins.get(url)
+        if resolved is None:
+            resolved = session.resolve_url(url)
+            with self.lock:
+                self.plugins[url] = resolved
+        return resolved
+
+    @staticmethod
+    def _option_value(value: str) -> bool | int | float | str:
+        """A flag's value as the type streamlink options take."""
+        if value.lower() in ("true", "yes"):
+            return True
+        if value.lower() in ("false", "no"):
+            return False
+        for kind in (int, float):
+            try:
+                return kind(value)
+            except ValueError:
+                pass
+        return value
+
+    @staticmethod
+    def _parse_flags(plugin_name: str, flags: list[str]) -> tuple[dict, dict]:
+        """Split CLI flags into plugin options and session options.
+
+        Flags are written as on the command line, `--key=value`, `--key value`
+        or `--key` for a switch, and tokenised the same way as for the CLI.
+        """
+        plugin_options: dict = {}
+        session_options: dict = {}
+        prefix = f"--{plugin_name}-"
+
+        tokens = split_flags(flags)
+        for index, token in enumerate(tokens):
+            if not token.startswith("--"):
+                continue
+            key, equals, value = token.partition("=")
+            if not equals and index + 1 < len(tokens):
+                following = tokens[index + 1]
+                if not following.startswith("--"):
+                    value = following
+            parsed = StreamlinkBackend._option_value(value) if value else True
+            if key.startswith(prefix):
+                plugin_options[key[len(prefix) :]] = parsed
+            else:
+                session_options[key[2:]] = parsed
+
+        return plugin_options, session_options
+
+    def _streams(
+        self, url: str, platform: StreamPlatform | None, flags: list[str]
+    ) -> tuple[object, dict]:
+        plugin_name, plugin_class, resolved_url = self._resolve(
+            self._session(platform), url
+        )
+        plugin_options, session_options = self._parse_flags(plugin_name, flags)
+        session = self._session(platform, session_options)
+        plugin = plugin_class(session, resolved_url, plugin_options)
+        return plugin, plugin.streams()
+
+    @staticmethod
+    def _select(streams: dict, quality: str):
+        for name in quality.split(","):
+            stream = streams.get(name.strip())
+            if stream is not None:
+                return stream
+        return None
+
+    def probe(
+        self,
+        url: str,
+        quality: str = "best",
+        platform: StreamPlatform | None = None,
+        flags: list[str] | None = None,
+    ) -> dict | None:
+        """Same result as utils.probe_stream, without starting a process.
+
+        Raises NoPluginError if no plugin handles the URL.
+        """
+        try:
+            plugin, streams = self._streams(url, platform, flags or [])
+        except NoPluginError:
+            raise
+        except StreamlinkError as e:
+            logger.debug(f"Streamlink probe failed for {url}: {e}")
+            return None
+        stream = self._select(streams or {}, quality)
+        if stream is None:
+            return None
+
+        try:
+            stream_url = stream.to_url()
+        except TypeError:
+            stream_url = None
+
+        return {"live": True, "metadata": plugin.get_metadata(), "url": stream_url}
+
+    def open(
+        self,
+        url: str,
+        quality: str = "best",
+        platform: StreamPlatform | None = None,
+        flags: list[str] | None = None,
+    ):
+        """Open the selected stream and return a readable file-like object, or None."""
+        _, streams = self._streams(url, platform, flags or [])
+        stream = self._select(streams or {}, quality)
+        if stream is None:
+            return None
+        return stream.open()
+
+
+streamlink_backend = StreamlinkBackend(
+    enabled=config.get("general", "streamlink_backend", fallback="cli") == "api"
+)
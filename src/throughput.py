@@ -0,0 +1,85 @@
+import time
+import threading
+from metrics import metrics
+
+
+class ThroughputTracker:
+    """Download progress reported by the active recordings themselves.
+
+    Each monitor reports the size of its own output file, so a progress
+    update costs one dictionary write per active recording instead of a
+    walk over every file ever recorded.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.active: dict[str, int] = {}  # streamer name -> bytes written
+        self.completed = 0  # bytes written by recordings that already ended
+        self.previous: dict[str, int] = {}
+        self.previous_time = time.monotonic()
+        self.speeds: dict[str, float] = {}  # from the latest sample
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(active={len(self.active)!r}, completed={self.completed!r})"
+
+    def start(self, name: str) -> None:
+        with self.lock:
+            self.completed += self.active.pop(name, 0)
+            self.active[name] = 0
+            self.previous[name] = 0
+
+    def update(self, name: str, total_bytes: int) -> None:
+        with self.lock:
+            if name in self.active:
+                self.active[name] = total_bytes
+
+    def add(self, name: str, num_bytes: int) -> None:
+        with self.lock:
+            if name in self.active:
+                self.active[name] += num_bytes
+
+    def finish(self, name: str) -> None:
+        with self.lock:
+            self.completed += self.active.pop(name, 0)
+            self.previous.pop(name, None)
+
+    def active_count(self) -> int:
+        with self.lock:
+            return len(self.active)
+
+    def total_bytes(self) -> int:
+        with self.lock:
+            return self.completed + sum(self.active.values())
+
+    def sample(self) -> tuple[int, dict[str, float]]:
+        """Return total bytes written and bytes per second per active recording
+        since the previous sample."""
+        with self.lock:
+            now = time.monotonic()
+            elapsed = max(now - self.previous_time, 1e-6)
+            speeds = {
+                name: max(size - self.previous.get(name, 0), 0) / elapsed
+                for name, size in self.active.items()
+            }
+            self.previous = dict(self.active)
+            self.previous_time = now
+            self.speeds = speeds
+            return self.completed + sum(self.active.values()), speeds
+
+
+throughput = ThroughputTracker()
+
+metrics.gauge(
+    "active_recordings", "Recordings in progress.", function=throughput.active_count
+)
+metrics.counter(
+    "recorded_bytes_total",
+    "Bytes written by recordings.",
+    function=throughput.total_bytes,
+)
+metrics.gauge(
+    "recording_bytes_per_second",
+    "Download speed of each active recording, as of the latest progress update.",
+    ("streamer",),
+    function=lambda: {(name,): speed for name, speed in throughput.speeds.items()},
+)
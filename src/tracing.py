@@ -0,0 +1,241 @@
+import os
+import json
+import time
+import signal
+import shutil
+import cProfile
+import functools
+import itertools
+import threading
+import subprocess
+import contextvars
+from collections.abc import Callable
+from contextlib import contextmanager
+from logger import logger
+
+_trace: contextvars.ContextVar["Trace | None"] = contextvars.ContextVar(
+    "trace", default=None
+)
+_span: contextvars.ContextVar["Span | None"] = contextvars.ContextVar(
+    "span", default=None
+)
+
+
+class Span:
+    """A timed piece of work inside a trace, child of the span it started in."""
+
+    def __init__(self, trace: "Trace", name: str, parent: "Span | None", attributes):
+        self.trace = trace
+        self.name = name
+        self.id = next(trace.ids)
+        self.parent_id = parent.id if parent else None
+        self.attributes = dict(attributes)
+        self.status = "ok"
+        self.start = time.time()
+        self.started = time.monotonic()
+        self.duration: float | None = None
+        self.thread = threading.current_thread().name
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(name={self.name!r}, id={self.id!r}, parent_id={self.parent_id!r})"
+
+    def set(self, **attributes) -> None:
+        self.attributes.update(attributes)
+
+    def end(self) -> None:
+        self.duration = time.monotonic() - self.started
+
+    def to_dict(self) -> dict:
+        return {
+            "trace": self.trace.id,
+            "span": self.id,
+            "parent": self.parent_id,
+            "name": self.name,
+            "start": self.start,
+            "duration": self.duration,
+            "thread": self.thread,
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+class Trace:
+    """The spans of one job, appended to `path` as JSON lines as they end.
+
+    Children end before their parents, so a span's parent is always written
+    after it. Spans link to their parent by id, giving the span tree.
+    """
+
+    def __init__(self, path: str, **attributes):
+        self.path = path
+        self.id = os.urandom(8).hex()
+        self.attributes = attributes
+        self.ids = itertools.count(1)
+        self.lock = threading.Lock()
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(path={self.path!r}, id={self.id!r})"
+
+    def write(self, span: Span) -> None:
+        record = span.to_dict()
+        if span.parent_id is None:
+            record["attributes"] = {**self.attributes, **record["attributes"]}
+        line = json.dumps(record, default=str)
+        with self.lock:
+            try:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+            except OSError:
+                logger.debug(f"Failed to write trace span to {self.path}")
+
+
+@contextmanager
+def activate(trace: Trace | None):
+    """Make `trace` the current trace of the enclosed block, None for no trace."""
+    trace_token = _trace.set(trace)
+    span_token = _span.set(None)
+    try:
+        yield trace
+    finally:
+        _span.reset(span_token)
+        _trace.reset(trace_token)
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Record the enclosed block as a span of the current trace.
+
+    Yields the span to add attributes to, or None outside of a trace.
+    """
+    trace = _trace.get()
+    if trace is None:
+        yield None
+        return
+
+    current = Span(trace, name, _span.get(), attributes)
+    token = _span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.status = "error"
+        current.set(error=repr(e))
+        raise
+    finally:
+        _span.reset(token)
+        current.end()
+        trace.write(current)
+
+
+def traced(name: str) -> Callable:
+    """Decorator recording every call of a function as a span."""
+
+    def decorator(function: Callable) -> Callable:
+        @functools.wraps(function)
+        def run(*args, **kwargs):
+            with span(name):
+                return function(*args, **kwargs)
+
+        return run
+
+    return decorator
+
+
+def wrap(function: Callable) -> Callable:
+    """Bind `function` to the current trace and span, for executor threads.
+
+    Threads don't inherit context variables, work handed to a pool would
+    otherwise not be part of the trace.
+    """
+    context = contextvars.copy_context()
+
+    def run(*args, **kwargs):
+        # A context can only be entered by one thread at a time
+        return context.copy().run(function, *args, **kwargs)
+
+    return run
+
+
+class Profiler:
+    """Opt-in profiling of a block of work.
+
+    `cprofile` profiles the calling thread with cProfile and writes a pstats
+    file. `py-spy` samples the whole process with py-spy and writes a
+    speedscope profile, and needs py-spy installed and allowed to attach.
+    """
+
+    MODES = ("off", "cprofile", "py-spy")
+
+    def __init__(self, mode: str = "off", rate: int = 100):
+        if mode not in self.MODES:
+            logger.warning(f"Unknown profiler {mode!r}, profiling is off")
+            mode = "off"
+        self.mode = mode
+        self.rate = rate
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(mode={self.mode!r}, rate={self.rate!r})"
+
+    @contextmanager
+    def profile(self, base_path: str):
+        """Profile the enclosed block into `base_path` plus the profile's extension."""
+        if self.mode == "cprofile":
+            with self._cprofile(f"{base_path}.prof"):
+                yield
+        elif self.mode == "py-spy":
+            with self._py_spy(f"{base_path}.speedscope.json"):
+                yield
+        else:
+            yield
+
+    @contextmanager
+    def _cprofile(self, path: str):
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler is active in this thread
+            yield
+            return
+        try:
+            yield
+        finally:
+            profiler.disable()
+            try:
+                profiler.dump_stats(path)
+            except OSError:
+                logger.warning(f"Failed to write profile {path}")
+
+    @contextmanager
+    def _py_spy(self, path: str):
+        executable = shutil.which("py-spy")
+        if executable is None:
+            logger.warning("py-spy is not installed, not profiling")
+            yield
+            return
+
+        command = [
+            executable,
+            "record",
+            "--pid",
+            str(os.getpid()),
+            "--rate",
+            str(self.rate),
+            "--format",
+            "speedscope",
+            "--output",
+            path,
+            "--threads",
+            "--nonblocking",
+        ]
+        process = subprocess.Popen(
+            command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        try:
+            yield
+        finally:
+            # py-spy writes the profile when interrupted
+            process.send_signal(signal.SIGINT)
+            try:
+                process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                process.kill()
@@ -10,13 +10,17 @@ except ImportError:
 
 # Standard imports
 from pathlib import Path
+import os
 import json
 import subprocess
 import time
 import numpy as np
-from pydub import AudioSegment
 import librosa
 from settings import config
+from artifact_cache import artifact_cache
+import tracing
+from model_pool import model_pool
+from audio_source import FfmpegSource, open_audio, resample
 
 transcription_engine = config.get(
     "clipception.transcription", "engine", fallback="whisper"
@@ -41,6 +45,13 @@ MIN_DURATION = config.getfloat("clipception", "clip_duration")
 model_size = config.get("clipception.transcription", "model_size")
 device = config.get("clipception.transcription", "device")
 language = config.get("clipception.transcription", "language", fallback="en")
+compute_type = config.get("clipception.transcription", "compute_type", fallback="")
+block_seconds = 60 * config.getfloat(
+    "clipception.transcription", "block_minutes", fallback=10
+)
+block_overlap = config.getfloat(
+    "clipception.transcription", "block_overlap", fallback=5
+)
 
 
 def format_time(seconds):
@@ -64,21 +75,20 @@ def check_cuda():
     return False
 
 
-def extract_audio_features(audio_segment, start_time, end_time):
-    """Extract audio features for a segment including volume and characteristics"""
-    start_sample = int(start_time * 1000)
-    end_sample = int(end_time * 1000)
-    # Downsample to 8000Hz for faster feature extraction
-    segment = audio_segment[start_sample:end_sample].set_frame_rate(8000)
+def extract_audio_features(samples, start_time, end_time, sample_rate=16000):
+    """Extract audio features for a segment including volume and characteristics
 
-    samples = np.array(segment.get_array_of_samples())
+    `samples` are int16 samples, the times are seconds from their start.
+    """
+    segment = samples[int(start_time * sample_rate) : int(end_time * sample_rate)]
+    # Downsample to 8000Hz for faster feature extraction
+    frame_rate = 8000
+    samples = resample(segment, sample_rate, frame_rate)
 
     # Audio analysis
-    rms = librosa.feature.rms(y=samples.astype(float))[0]
-    zero_crossing_rate = librosa.feature.zero_crossing_rate(samples.astype(float))[0]
-    spectral_centroid = librosa.feature.spectral_centroid(
-        y=samples.astype(float), sr=segment.frame_rate
-    )[0]
+    rms = librosa.feature.rms(y=samples)[0]
+    zero_crossing_rate = librosa.feature.zero_crossing_rate(samples)[0]
+    spectral_centroid = librosa.feature.spectral_centroid(y=samples, sr=frame_rate)[0]
 
     avg_volume = float(np.mean(rms))
     avg_zcr = float(np.mean(zero_crossing_rate))
@@ -105,18 +115,27 @@ def extract_audio_features(audio_segment, start_time, end_time):
     }
 
 
-def extract_audio(video_path):
+@tracing.traced("extract_audio")
+def extract_audio(video_path, start=None, duration=None, audio_path=None):
+    """Extract 16 kHz mono audio, optionally only `duration` seconds from `start`."""
     video_file = Path(video_path)
-    audio_path = video_file.with_suffix(".wav")
+    audio_path = Path(audio_path) if audio_path else video_file.with_suffix(".wav")
 
     logger.info(f"Extracting audio to {audio_path}...")
 
+    window = []
+    if start is not None:
+        window += ["-ss", str(start)]
+    if duration is not None:
+        window += ["-t", str(duration)]
+
     subprocess.run(
         [
             "ffmpeg",
             "-y",
             "-loglevel",
             "error",
+            *window,
             "-i",
             str(video_file),
             "-vn",
@@ -131,10 +150,26 @@ def extract_audio(video_path):
         check=True,
     )
 
-    files_to_cleanup.append(str(audio_path))
+    if str(audio_path) not in files_to_cleanup:
+        files_to_cleanup.append(str(audio_path))
     return audio_path
 
 
+def cleanup_files(paths=None):
+    """Delete `paths`, or every file in files_to_cleanup, and drop them from it."""
+    paths = list(files_to_cleanup if paths is None else paths)
+    for path in paths:
+        if path in files_to_cleanup:
+            files_to_cleanup.remove(path)
+        try:
+            os.remove(path)
+            logger.debug(f"Removed {path}")
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Failed to remove {path}: {e}")
+
+
 def combine_segments(segments):
     """Combine multiple segments into a single segment with merged features"""
     if not segments:
@@ -181,57 +216,86 @@ def combine_segments(segments):
     }
 
 
-def transcribe_with_features(model, audio_path, device: str, min_duration=MIN_DURATION):
-    """Get transcription with timestamps and audio features"""
+def transcribe_with_features(
+    model, audio, device: str, min_duration=MIN_DURATION, offset=0.0
+):
+    """Get transcription with timestamps and audio features.
+
+    `audio` is a wav path or an AudioSource, transcribed block by block so
+    only one block of it is in memory at a time. Blocks overlap by
+    `block_overlap` seconds so speech isn't cut at their boundaries, segments
+    transcribed twice are kept once. `offset` is added to every timestamp,
+    for audio cut from later in a video.
+    """
     logger.info("Generating enhanced transcription...")
     enhanced_segments = []
-
-    audio = AudioSegment.from_wav(str(audio_path))
-
-    transcribe_start = time.time()
-
-    # Transcribe based on engine type
-    if transcription_engine == "faster-whisper":
-        # faster-whisper returns segments directly
-        segments, info = model.transcribe(str(audio_path), language=language)
-        result = {"segments": list(segments)}
-    else:
-        # Original whisper with FP16 support
-        fp16 = device == "cuda" and (
-            torch.cuda.is_bf16_supported()
-            or torch.cuda.get_device_capability(0)[0] >= 5
-        )
-        if device == "cuda":
-            torch.cuda.init()
-        result = model.transcribe(str(audio_path), language=language, fp16=fp16)
-
     current_segments = []
     current_duration = 0.0
 
-    for segment in result["segments"]:
-        # Handle both faster-whisper (object attributes) and whisper (dict access)
-        start = segment.start if hasattr(segment, "start") else segment["start"]
-        end = segment.end if hasattr(segment, "end") else segment["end"]
-        text = segment.text if hasattr(segment, "text") else segment["text"]
-
-        audio_features = extract_audio_features(audio, start, end)
-
-        enhanced_segment = {
-            "start": start,
-            "end": end,
-            "text": text,
-            "audio_features": audio_features,
-        }
-
-        current_segments.append(enhanced_segment)
-        current_duration = current_segments[-1]["end"] - current_segments[0]["start"]
-
-        if current_duration >= min_duration:
-            combined_segment = combine_segments(current_segments)
-            if combined_segment:
-                enhanced_segments.append(combined_segment)
-            current_segments = []
-            current_duration = 0.0
+    source = open_audio(audio)
+    transcribe_start = time.time()
+    covered = None  # end of the last segment kept
+
+    for block_start, samples in source.blocks(block_seconds, block_overlap):
+        # Whisper takes float32 audio in [-1, 1], features use the int16 samples
+        block = samples.astype(np.float32) / 32768.0
+        block_offset = offset + block_start
+        # Segments starting in the overlap are transcribed again by the next block
+        block_end = block_offset + block_seconds
+
+        # Transcribe based on engine type
+        with tracing.span(
+            "transcribe", engine=transcription_engine, offset=block_offset
+        ):
+            if transcription_engine == "faster-whisper":
+                # faster-whisper returns segments lazily
+                segments, info = model.transcribe(block, language=language)
+                result = {"segments": list(segments)}
+            else:
+                # Original whisper with FP16 support
+                fp16 = device == "cuda" and (
+                    torch.cuda.is_bf16_supported()
+                    or torch.cuda.get_device_capability(0)[0] >= 5
+                )
+                if device == "cuda":
+                    torch.cuda.init()
+                result = model.transcribe(block, language=language, fp16=fp16)
+
+        with tracing.span("extract_features", segments=len(result["segments"])):
+            for segment in result["segments"]:
+                # Handle both faster-whisper (object attributes) and whisper (dict access)
+                start = segment.start if hasattr(segment, "start") else segment["start"]
+                end = segment.end if hasattr(segment, "end") else segment["end"]
+                text = segment.text if hasattr(segment, "text") else segment["text"]
+
+                if start + block_offset >= block_end or (
+                    covered is not None and start + block_offset < covered
+                ):
+                    continue
+                covered = end + block_offset
+
+                audio_features = extract_audio_features(
+                    samples, start, end, source.sample_rate
+                )
+
+                enhanced_segment = {
+                    "start": start + block_offset,
+                    "end": end + block_offset,
+                    "text": text,
+                    "audio_features": audio_features,
+                }
+
+                current_segments.append(enhanced_segment)
+                current_duration = (
+                    current_segments[-1]["end"] - current_segments[0]["start"]
+                )
+
+                if current_duration >= min_duration:
+                    combined_segment = combine_segments(current_segments)
+                    if combined_segment:
+                        enhanced_segments.append(combined_segment)
+                    current_segments = []
+                    current_duration = 0.0
 
     if current_segments:
         combined_segment = combine_segments(current_segments)
@@ -246,7 +310,79 @@ def transcribe_with_features(model, audio_path, device: str, min_duration=MIN_DU
     return enhanced_segments
 
 
-def process_video(video_path):
+def model_key(device):
+    """Key of the configured model on `device` in the model pool."""
+    compute = compute_type or ("float16" if device == "cuda" else "float32")
+    return (transcription_engine, model_size, device, compute)
+
+
+def loaded_model(device):
+    """Context manager holding the configured model on `device` from the pool.
+
+    The model is loaded once and unloaded after the configured model_ttl
+    unused. openai-whisper keeps per-decode state on the model, so its users
+    take turns, faster-whisper models are safe to share.
+    """
+    key = model_key(device)
+    return model_pool.use(
+        key,
+        lambda: _load_model(device, key[3]),
+        exclusive=transcription_engine == "whisper",
+    )
+
+
+def _free_model(key):
+    if key[2] == "cuda":
+        torch.cuda.empty_cache()
+
+
+model_pool.on_evict = _free_model
+
+
+@tracing.traced("load_model")
+def _load_model(device, compute):
+    logger.info(f"Loading {transcription_engine} {model_size} model for {device}...")
+    if transcription_engine == "faster-whisper":
+        model = WhisperModel(model_size, device=device, compute_type=compute)
+    else:
+        model = whisper.load_model(model_size, device=device)
+        # Verify model device
+        logger.info(f"Model is on device: {next(model.parameters()).device}")
+
+    if device == "cuda":
+        logger.info(
+            f"GPU Memory allocated: {torch.cuda.memory_allocated()/1024**2:.2f} MB"
+        )
+        logger.info(
+            f"GPU Memory reserved: {torch.cuda.memory_reserved()/1024**2:.2f} MB"
+        )
+    return model
+
+
+def cache_key(video_path, device):
+    """Artifact cache key of the transcription of `video_path` made on `device`."""
+    return artifact_cache.key(
+        video_path,
+        kind="transcription",
+        engine=transcription_engine,
+        model_size=model_size,
+        language=language,
+        min_duration=MIN_DURATION,
+        # Blocks are transcribed separately, their length changes the segments
+        block_seconds=block_seconds,
+        block_overlap=block_overlap,
+        device=device,
+        compute_type=model_key(device)[3],
+    )
+
+
+def process_video(video_path, audio_path=None):
+    """Write the enhanced transcription of a video next to it.
+
+    `audio_path` is a 16 kHz mono wav already extracted from the video,
+    without one the audio is decoded from the video as it's transcribed. The
+    wav is only needed for this, it is deleted afterwards, also on failure.
+    """
     global device
 
     device = "cpu" if not check_cuda() else device
@@ -255,41 +391,34 @@ def process_video(video_path):
     video_file = Path(video_path)
     transcription_path = video_file.with_suffix(".enhanced_transcription.json")
 
+    key = cache_key(video_path, device)
     try:
-        # Audio extraction
-        audio_path = extract_audio(video_path)
-
-        # Model loading
-        logger.info(f"Loading {transcription_engine} {model_size} model for {device}...")
-        if transcription_engine == "faster-whisper":
-            model = WhisperModel(
-                model_size,
-                device=device,
-                compute_type="float16" if device == "cuda" else "float32",
-            )
+        if artifact_cache.restore(key, transcription_path):
+            return
+
+        # Audio extracted while preparing the video, or decoded from it as it's read
+        if audio_path and os.path.exists(audio_path):
+            audio_path = str(audio_path)
+            if audio_path not in files_to_cleanup:
+                files_to_cleanup.append(audio_path)
+            audio = audio_path
         else:
-            model = whisper.load_model(model_size, device=device)
-            # Verify model device
-            logger.info(f"Model is on device: {next(model.parameters()).device}")
+            audio = FfmpegSource(video_path)
 
-        if device == "cuda":
-            logger.info(
-                f"GPU Memory allocated: {torch.cuda.memory_allocated()/1024**2:.2f} MB"
-            )
-            logger.info(
-                f"GPU Memory reserved: {torch.cuda.memory_reserved()/1024**2:.2f} MB"
-            )
-
-        # Transcription
-        enhanced_transcription = transcribe_with_features(model, audio_path, device)
+        with loaded_model(device) as model:
+            # Transcription
+            enhanced_transcription = transcribe_with_features(model, audio, device)
 
         # Save results
         with open(transcription_path, "w", encoding="utf-8") as f:
             json.dump(enhanced_transcription, f, indent=2, ensure_ascii=False)
+        artifact_cache.store(key, transcription_path)
 
         process_end = time.time()
         logger.info(f"\n{'='*40}")
-        logger.info(f"Total processing time: {format_time(process_end - process_start)}")
+        logger.info(
+            f"Total processing time: {format_time(process_end - process_start)}"
+        )
         logger.info(f"Enhanced transcription saved to {transcription_path}")
         logger.info(f"{'='*40}")
 
@@ -299,6 +428,8 @@ def process_video(video_path):
         logger.error(f"{'!'*40}")
         raise
     finally:
-        # Cleanup operations
+        # Cleanup operations, only this video's wav as others may be in use
+        if audio_path:
+            cleanup_files([str(audio_path)])
         if device == "cuda":
             torch.cuda.empty_cache()
@@ -3,10 +3,11 @@ import sys
 import subprocess
 from enum import Enum
 from logger import logger
+from metrics import subprocess_exits
+import tracing
 from pathlib import Path
 import configparser
 import json
-import time
 
 
 class StreamPlatform(Enum):
@@ -38,11 +39,19 @@ def run_command(
         return subprocess.CompletedProcess([], -1)
 
     logger.debug(f"Executing: {' '.join(cmd)}")
-    try:
-        return subprocess.run(cmd, stdout=stdout, stderr=stderr, check=True)
-    except subprocess.CalledProcessError as e:
-        logger.debug(f"Command failed with error: {e}")
-        return subprocess.CompletedProcess(cmd, -1)
+    command = os.path.basename(str(cmd[0]))
+    with tracing.span("subprocess", command=command, args=cmd) as span:
+        try:
+            result = subprocess.run(cmd, stdout=stdout, stderr=stderr, check=True)
+            code = result.returncode
+        except subprocess.CalledProcessError as e:
+            code = e.returncode
+            logger.debug(f"Command failed with error: {e}")
+            result = subprocess.CompletedProcess(cmd, -1)
+        subprocess_exits.inc(command=command, code=code)
+        if span is not None:
+            span.set(returncode=code)
+        return result
 
 
 def is_docker() -> bool:
@@ -66,43 +75,46 @@ def determine_source(stream_source: StreamPlatform, streamer_name: str) -> str |
     return sources.get(stream_source)
 
 
-def check_stream_live(url: str) -> bool:
-    # TODO this takes many seconds, find a faster method
-    result = run_command(["streamlink", url])
-    return result.returncode == 0
-
-
-def get_size(path: str) -> float:
-    if not os.path.exists(path):
-        logger.warning(f"Path does not exist: {path}")
-        return 0.0
-
-    bytes_total = sum(
-        os.path.getsize(os.path.join(dirpath, filename))
-        for dirpath, _, filenames in os.walk(path)
-        for filename in filenames
-    )
-    return bytes_total / 1_000_000  # Convert to MB
-
+def probe_stream(streamer_url: str, quality: str = "best") -> dict | None:
+    """Probe a stream once with `streamlink --json`.
 
-def fetch_metadata(streamer_url: str) -> dict:
+    Returns liveness, metadata and the resolved stream URL from a single
+    streamlink process, or None if the stream is offline.
+    """
     try:
-        # TODO: fix this code smell
-        time.sleep(22)
         result = subprocess.run(
-            ["streamlink", "--json", streamer_url],
+            ["streamlink", "--json", streamer_url, quality],
             capture_output=True,
             text=True,
             check=True,
         )
-        return json.loads(result.stdout)["metadata"]
+        subprocess_exits.inc(command="streamlink", code=0)
+        data = json.loads(result.stdout)
     except subprocess.CalledProcessError as e:
-        logger.error(f"Streamlink error: {e}")
+        subprocess_exits.inc(command="streamlink", code=e.returncode)
         return None
     except json.JSONDecodeError as e:
         logger.error(f"JSON decode error: {e}")
         return None
 
+    if "error" in data:
+        logger.debug(f"Streamlink probe failed: {data['error']}")
+        return None
+
+    return {
+        "live": True,
+        "metadata": data.get("metadata") or {},
+        "url": data.get("url"),
+    }
+
+
+def fetch_metadata(streamer_url: str) -> dict:
+    probe = probe_stream(streamer_url)
+    if probe is None:
+        logger.error(f"Could not fetch metadata for {streamer_url}")
+        return None
+    return probe["metadata"]
+
 
 def get_version_from_toml() -> str:
     """
@@ -129,14 +141,26 @@ def get_version_from_toml() -> str:
     return "0.0.0"
 
 
+# Parsed config files by path, with the modification time they were parsed at
+_config_cache: dict[str, tuple[int, configparser.ConfigParser]] = {}
+
+
 def load_config(config_name: str) -> configparser.ConfigParser | None:
-    config = configparser.ConfigParser()
     config_file = f"{config_name}.ini"
 
-    if not os.path.exists(config_file):
+    try:
+        mtime = os.stat(config_file).st_mtime_ns
+    except OSError:
         logger.warning(f"The config file {config_file} not found for {config_name}.")
         return None
 
+    # Unchanged files are served from the cache instead of being parsed again
+    cached = _config_cache.get(config_file)
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    config = configparser.ConfigParser()
     config.read(config_file)
+    _config_cache[config_file] = (mtime, config)
     logger.debug(f"Loaded configuration from {config_file}")
     return config
@@ -1,13 +1,115 @@
 import pytest
 import os
 import sys
+import json
+import re
+import types
+import contextlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
 
 # Add src to path for all tests
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
 
+# Keep processor imports lightweight, the real modules need torch, whisper and OpenRouter.
+_noop = lambda *args, **kwargs: None  # noqa: E731
+
+transcription = types.ModuleType("transcription")
+transcription.MIN_DURATION = 999
+transcription.device = "cpu"
+transcription.check_cuda = lambda: False
+transcription.process_video = _noop
+transcription.extract_audio = _noop
+transcription.loaded_model = lambda device: contextlib.nullcontext()
+transcription.cleanup_files = _noop
+transcription.transcribe_with_features = lambda *args, **kwargs: []
+sys.modules.setdefault("transcription", transcription)
+
+gen_clip = types.ModuleType("gen_clip")
+gen_clip.generate_clips = _noop
+gen_clip.process_clips = _noop
+gen_clip.rank_all_clips_parallel = lambda *args, **kwargs: []
+gen_clip.extract_clip = lambda *args, **kwargs: (False, "")
+gen_clip.save_top_clips_json = _noop
+sys.modules.setdefault("gen_clip", gen_clip)
+
+uploader = types.ModuleType("uploader")
+uploader.upload_youtube = _noop
+sys.modules.setdefault("uploader", uploader)
+
 
 @pytest.fixture
 def project_root():
     """Return the project root directory"""
     return Path(__file__).parent.parent
+
+
+class StubStatusServer(ThreadingHTTPServer):
+    """Local stand-in for the Twitch GQL and Kick channel APIs"""
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), StubStatusHandler)
+        self.live: dict[str, dict] = {}  # channel name -> stream info
+        self.requests: list[str] = []
+        self.client_ids: list[str] = []
+        self.broken: set[str] = set()  # channels failing every request they are in
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class StubStatusHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status: int, payload: dict) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        self.server.requests.append(self.path)
+        length = int(self.headers.get("Content-Length", 0))
+        query = json.loads(self.rfile.read(length))["query"]
+        logins = json.loads(re.search(r"logins: (\[.*?\])", query).group(1))
+        self.server.client_ids.append(self.headers.get("Client-ID"))
+        if self.server.broken.intersection(logins):
+            self._reply(500, {"error": "Internal Server Error"})
+            return
+        users = []
+        for login in logins:
+            info = self.server.live.get(login)
+            stream = (
+                {"id": info["id"], "title": info["title"], "type": "live", "game": None}
+                if info
+                else None
+            )
+            users.append({"login": login, "stream": stream})
+        self._reply(200, {"data": {"users": users}})
+
+    def do_GET(self):
+        self.server.requests.append(self.path)
+        name = self.path.rstrip("/").rsplit("/", 1)[-1]
+        info = self.server.live.get(name)
+        livestream = (
+            {"id": info["id"], "session_title": info["title"], "is_live": True}
+            if info
+            else None
+        )
+        self._reply(200, {"slug": name, "livestream": livestream})
+
+
+@pytest.fixture
+def status_server():
+    """Run a stub live status server on a free local port"""
+    server = StubStatusServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
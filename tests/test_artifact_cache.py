@@ -0,0 +1,76 @@
+import os
+
+import artifact_cache
+from artifact_cache import ArtifactCache, fingerprint
+
+
+class TestFingerprint:
+    def test_small_files_hash_their_content(self, tmp_path):
+        first, second = tmp_path / "a.ts", tmp_path / "b.ts"
+        first.write_bytes(b"recording")
+        second.write_bytes(b"recording")
+        assert fingerprint(str(first)) == fingerprint(str(second))
+
+        second.write_bytes(b"Recording")
+        assert fingerprint(str(first)) != fingerprint(str(second))
+
+    def test_large_files_are_sampled(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(artifact_cache, "SAMPLE_SIZE", 4)
+        monkeypatch.setattr(artifact_cache, "SAMPLE_COUNT", 3)
+        path = tmp_path / "a.ts"
+        path.write_bytes(b"0123456789abcdefghij")
+        original = fingerprint(str(path))
+
+        # Blocks at 0, 8 and 16 are read, a change at 5 is not seen
+        path.write_bytes(b"01234X6789abcdefghij")
+        assert fingerprint(str(path)) == original
+        path.write_bytes(b"0123456789abcdefghiX")
+        assert fingerprint(str(path)) != original
+
+
+class TestArtifactCache:
+    def _input(self, tmp_path, content=b"video"):
+        path = tmp_path / "video.ts"
+        path.write_bytes(content)
+        return str(path)
+
+    def test_store_and_restore(self, tmp_path):
+        cache = ArtifactCache(str(tmp_path / "cache"))
+        key = cache.key(self._input(tmp_path), model_size="base")
+        destination = str(tmp_path / "video.enhanced_transcription.json")
+        assert not cache.restore(key, destination)
+
+        (tmp_path / "result.json").write_text("[]")
+        cache.store(key, str(tmp_path / "result.json"))
+        assert cache.restore(key, destination)
+        assert open(destination).read() == "[]"
+
+    def test_key_depends_on_content_and_parameters(self, tmp_path):
+        cache = ArtifactCache(str(tmp_path / "cache"))
+        path = self._input(tmp_path)
+        key = cache.key(path, model_size="base", language="en")
+
+        assert cache.key(path, language="en", model_size="base") == key
+        assert cache.key(path, model_size="small", language="en") != key
+        self._input(tmp_path, b"other video")
+        assert cache.key(path, model_size="base", language="en") != key
+
+    def test_least_recently_used_entries_are_evicted(self, tmp_path):
+        cache = ArtifactCache(str(tmp_path / "cache"), max_bytes=20)
+        source = tmp_path / "result.json"
+        source.write_bytes(b"0" * 8)
+
+        for key in ("a", "b"):
+            cache.store(key, str(source))
+        os.utime(cache._path("a"), (1, 1))
+        os.utime(cache._path("b"), (2, 2))
+        assert cache.restore("a", str(tmp_path / "out.json"))  # a is now the newest
+
+        cache.store("c", str(source))
+        assert sorted(os.listdir(tmp_path / "cache")) == ["a", "c"]
+        assert cache.size() == 16
+
+    def test_disabled_cache_never_hits(self, tmp_path):
+        cache = ArtifactCache(str(tmp_path / "cache"), enabled=False)
+        assert cache.key(self._input(tmp_path)) is None
+        assert not cache.restore(None, str(tmp_path / "out.json"))
@@ -0,0 +1,104 @@
+import sys
+import wave
+import subprocess
+
+import numpy as np
+import pytest
+
+from audio_source import FfmpegSource, WavSource, open_audio, resample
+
+
+def _write_wav(path, samples, sample_rate=16000):
+    with wave.open(str(path), "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(samples.astype("<i2").tobytes())
+
+
+class TestWavSource:
+    def test_reads_the_samples_in_blocks(self, tmp_path):
+        samples = np.arange(-8000, 8000, dtype=np.int16)
+        _write_wav(tmp_path / "vod.wav", samples)
+
+        source = open_audio(str(tmp_path / "vod.wav"))
+        assert isinstance(source, WavSource)
+        assert source.duration == 1.0
+
+        blocks = list(source.blocks(0.4))
+        assert [start for start, _ in blocks] == [0.0, 0.4, 0.8]
+        assert [len(block) for _, block in blocks] == [6400, 6400, 3200]
+        assert np.array_equal(np.concatenate([b for _, b in blocks]), samples)
+
+    def test_blocks_overlap_the_next_one(self, tmp_path):
+        samples = np.arange(-8000, 8000, dtype=np.int16)
+        _write_wav(tmp_path / "vod.wav", samples)
+
+        blocks = list(WavSource(tmp_path / "vod.wav").blocks(0.4, overlap=0.1))
+        assert [start for start, _ in blocks] == [0.0, 0.4, 0.8]
+        assert [len(block) for _, block in blocks] == [8000, 8000, 3200]
+        assert np.array_equal(blocks[0][1][6400:], blocks[1][1][:1600])
+
+    def test_rejects_stereo(self, tmp_path):
+        with wave.open(str(tmp_path / "stereo.wav"), "wb") as f:
+            f.setnchannels(2)
+            f.setsampwidth(2)
+            f.setframerate(16000)
+            f.writeframes(b"\0" * 8)
+
+        with pytest.raises(ValueError):
+            WavSource(tmp_path / "stereo.wav")
+
+    def test_empty_wav_has_no_blocks(self, tmp_path):
+        _write_wav(tmp_path / "empty.wav", np.zeros(0))
+        assert list(WavSource(tmp_path / "empty.wav").blocks(1)) == []
+
+
+class TestFfmpegSource:
+    def _source(self, script):
+        source = FfmpegSource("vod.mp4")
+        source.command = [sys.executable, "-c", script]
+        return source
+
+    def test_reads_the_pipe_in_blocks(self):
+        # 2.5 seconds of 16 kHz samples counting up
+        source = self._source(
+            "import sys, numpy; sys.stdout.buffer.write("
+            "(numpy.arange(40000) % 1000).astype('<i2').tobytes())"
+        )
+
+        blocks = list(source.blocks(1))
+        assert [start for start, _ in blocks] == [0.0, 1.0, 2.0]
+        assert [len(block) for _, block in blocks] == [16000, 16000, 8000]
+        assert blocks[2][1][-1] == 999
+
+    def test_pipe_blocks_overlap_the_next_one(self):
+        source = self._source(
+            "import sys, numpy; sys.stdout.buffer.write("
+            "(numpy.arange(40000) % 1000).astype('<i2').tobytes())"
+        )
+
+        blocks = list(source.blocks(1, overlap=0.25))
+        assert [start for start, _ in blocks] == [0.0, 1.0, 2.0]
+        assert [len(block) for _, block in blocks] == [20000, 20000, 8000]
+        assert np.array_equal(blocks[1][1][16000:], blocks[2][1][:4000])
+
+    def test_failed_decode_raises(self):
+        source = self._source("import sys; sys.stderr.write('no audio'); sys.exit(1)")
+
+        with pytest.raises(subprocess.CalledProcessError) as error:
+            list(source.blocks(1))
+        assert error.value.stderr == "no audio"
+
+    def test_window_is_passed_to_ffmpeg(self):
+        command = FfmpegSource("vod.mp4", start=60, duration=30).command
+        assert command[command.index("-ss") + 1] == "60"
+        assert command[command.index("-t") + 1] == "30"
+        assert command[-2:] == ["s16le", "-"]
+
+
+def test_resample_keeps_the_int16_scale():
+    samples = np.full(16000, 12000, dtype=np.int16)
+    downsampled = resample(samples, 16000, 8000)
+    assert len(downsampled) == 8000
+    assert np.allclose(downsampled, 12000)
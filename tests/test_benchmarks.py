@@ -0,0 +1,65 @@
+import json
+import os
+import sys
+import urllib.request
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "benchmarks"))
+
+from fake_openrouter import FakeOpenRouter
+from run import audio_filter, build_generate_command, check_regressions
+
+
+def _report(seconds, rss=100, ok=True, duration=120):
+    return {
+        "settings": {"duration": duration},
+        "stages": {"transcribe": {"ok": ok, "seconds": seconds, "peak_rss_mb": rss}},
+    }
+
+
+def test_generate_command_uses_lavfi_sources():
+    command = build_generate_command("vod.ts", 60, "noise")
+    inputs = [command[i + 1] for i, arg in enumerate(command) if arg == "-i"]
+    assert inputs[0].startswith("testsrc2=") and "duration=60" in inputs[0]
+    assert inputs[1] == audio_filter("noise", 60)
+    assert "seed=42" in inputs[1]
+    assert command[-1] == "vod.ts"
+
+
+def test_thresholds_are_per_minute_of_video():
+    thresholds = {"transcribe": {"seconds_per_minute": 10, "peak_rss_mb": 500}}
+    assert check_regressions(_report(seconds=19), thresholds) == []
+    assert len(check_regressions(_report(seconds=21), thresholds)) == 1
+    assert len(check_regressions(_report(seconds=1, rss=600), thresholds)) == 1
+    assert check_regressions(_report(seconds=1, ok=False), thresholds) == [
+        "transcribe: failed"
+    ]
+
+
+def test_baseline_regressions_respect_the_tolerance():
+    baseline = _report(seconds=10, duration=60)
+    assert check_regressions(_report(seconds=24), {}, baseline, 0.25) == []
+    [problem] = check_regressions(_report(seconds=26), {}, baseline, 0.25)
+    assert problem.startswith("transcribe: 13.00s per minute")
+
+
+def test_fake_openrouter_ranks_the_clips_in_the_prompt():
+    server = FakeOpenRouter()
+    server.start()
+    try:
+        clips = [{"start": 0.0, "end": 60.0}, {"start": 60.0, "end": 120.5}]
+        prompt = f"Analyze these clips:\n{json.dumps(clips, indent=2)}"
+        request = urllib.request.Request(
+            f"{server.base_url}/chat/completions",
+            data=json.dumps(
+                {"model": "m", "messages": [{"role": "user", "content": prompt}]}
+            ).encode(),
+            headers={"Content-Type": "application/json"},
+        )
+        with urllib.request.urlopen(request, timeout=5) as response:
+            body = json.load(response)
+    finally:
+        server.stop()
+
+    ranked = json.loads(body["choices"][0]["message"]["content"])["clips"]
+    assert [(c["start"], c["end"]) for c in ranked] == [(0.0, 60.0), (60.0, 120.5)]
+    assert body["usage"]["prompt_tokens"] > 0
@@ -0,0 +1,78 @@
+import os
+import subprocess
+from unittest.mock import patch
+
+from chunked_encode import ChunkEncoder, ChunkedEncode, build_split_command
+
+
+class RecordingEncoder(ChunkEncoder):
+    """Stand-in for a remote worker, writes every chunk it is given."""
+
+    def __init__(self, fail=()):
+        self.chunks = []
+        self.fail = fail
+
+    def encode(self, chunk_path, output_path, video_args, log_level="error"):
+        self.chunks.append((os.path.basename(chunk_path), video_args))
+        open(output_path, "wb").close()
+        return os.path.basename(chunk_path) not in self.fail
+
+
+def _fake_ffmpeg(commands):
+    def run(command):
+        commands.append(command)
+        if "segment" in command:
+            directory = os.path.dirname(command[-1])
+            for index in range(3):
+                open(os.path.join(directory, f"chunk{index:05d}.mkv"), "wb").close()
+        else:
+            # The join command lists the encoded chunks in order
+            with open(command[command.index("concat") + 4]) as f:
+                commands.append(f.read().splitlines())
+        return subprocess.CompletedProcess(command, 0)
+
+    return run
+
+
+class TestChunkedEncode:
+    def test_split_keeps_only_video_and_copies_it(self):
+        command = build_split_command("in.mp4", "chunks/chunk%05d.mkv", 120)
+        assert command[command.index("-map") + 1] == "0:v:0"
+        assert command[command.index("-c") + 1] == "copy"
+        assert command[command.index("-segment_time") + 1] == "120"
+
+    def test_chunks_are_encoded_and_joined_in_order(self, tmp_path):
+        encoder = RecordingEncoder()
+        commands = []
+        output = str(tmp_path / "video.reencoded.mp4")
+        with patch("chunked_encode.run_command", side_effect=_fake_ffmpeg(commands)):
+            assert ChunkedEncode(encoder, workers=2).run(
+                "/tmp/video.mp4", output, ["-c:v", "libx265"]
+            )
+
+        assert sorted(name for name, _ in encoder.chunks) == [
+            "chunk00000.mkv",
+            "chunk00001.mkv",
+            "chunk00002.mkv",
+        ]
+        assert all(args == ["-c:v", "libx265"] for _, args in encoder.chunks)
+
+        join, listed = commands[1], commands[2]
+        assert [line.rsplit("/", 1)[1] for line in listed] == [
+            "encoded_chunk00000.mkv'",
+            "encoded_chunk00001.mkv'",
+            "encoded_chunk00002.mkv'",
+        ]
+        # Audio comes straight from the source, video from the chunks
+        assert join[join.index("-i", join.index("-i") + 1) + 1] == "/tmp/video.mp4"
+        assert join[-1] == output
+        assert not os.path.exists(str(tmp_path / "video.reencoded.chunks"))
+
+    def test_failed_chunk_fails_the_encode(self, tmp_path):
+        encoder = RecordingEncoder(fail={"chunk00001.mkv"})
+        commands = []
+        with patch("chunked_encode.run_command", side_effect=_fake_ffmpeg(commands)):
+            assert not ChunkedEncode(encoder).run(
+                "/tmp/video.mp4", str(tmp_path / "out.mp4"), []
+            )
+        assert len(commands) == 1  # never joined
@@ -0,0 +1,35 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from config_watcher import ConfigWatcher
+
+
+def _touch(path, content: str, mtime_ns: int) -> None:
+    path.write_text(content)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+class TestConfigWatcher:
+    """Test cases for the config file watcher"""
+
+    def test_detects_added_modified_and_deleted_files(self, tmp_path):
+        """Test every kind of change is reported by name"""
+        _touch(tmp_path / "config.ini", "[streamers]", 1_000_000_000)
+        _touch(tmp_path / "alpha.ini", "[source]", 1_000_000_000)
+        watcher = ConfigWatcher(lambda changed: None, directory=str(tmp_path))
+
+        assert watcher.check() == set()
+
+        _touch(tmp_path / "config.ini", "[streamers]\n", 2_000_000_000)
+        _touch(tmp_path / "beta.ini", "[source]", 1_000_000_000)
+        (tmp_path / "alpha.ini").unlink()
+        assert watcher.check() == {"config", "alpha", "beta"}
+        assert watcher.check() == set()
+
+    def test_ignores_other_files(self, tmp_path):
+        """Test non-ini files are not watched"""
+        watcher = ConfigWatcher(lambda changed: None, directory=str(tmp_path))
+        (tmp_path / "notes.txt").write_text("hello")
+        assert watcher.check() == set()
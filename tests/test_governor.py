@@ -0,0 +1,89 @@
+import os
+from unittest.mock import patch
+
+import governor as governor_module
+from governor import ResourceGovernor, read_available_memory, read_disk_written
+
+
+def _sys_block(tmp_path, disks, virtual=()):
+    sys_block = tmp_path / "block"
+    for name in disks:
+        (sys_block / name / "device").mkdir(parents=True)
+    for name in virtual:
+        (sys_block / name).mkdir(parents=True)
+    return str(sys_block)
+
+
+class TestReaders:
+    def test_available_memory(self, tmp_path):
+        meminfo = tmp_path / "meminfo"
+        meminfo.write_text("MemTotal: 8000 kB\nMemAvailable:    2048 kB\n")
+        assert read_available_memory(str(meminfo)) == 2048 * 1024
+        assert read_available_memory(str(tmp_path / "missing")) is None
+
+    def test_disk_written_counts_physical_disks_once(self, tmp_path):
+        diskstats = tmp_path / "diskstats"
+        diskstats.write_text(
+            "   8       0 sda 1 0 0 0 2 0 100 0 0 0 0\n"
+            "   8       1 sda1 1 0 0 0 2 0 100 0 0 0 0\n"
+            " 253       0 dm-0 1 0 0 0 2 0 100 0 0 0 0\n"
+            " 259       0 nvme0n1 1 0 0 0 2 0 50 0 0 0 0\n"
+        )
+        sys_block = _sys_block(tmp_path, ["sda", "nvme0n1"], virtual=["dm-0"])
+        assert read_disk_written(str(diskstats), sys_block) == 150 * 512
+
+
+class TestResourceGovernor:
+    def test_check_reports_the_exhausted_resource(self):
+        governor = ResourceGovernor(max_load=0.5, min_free_memory=1024**3)
+        with (
+            patch("governor.os.getloadavg", return_value=(1.0, 0, 0)),
+            patch("governor.os.cpu_count", return_value=1),
+        ):
+            assert governor.check().startswith("load")
+
+        with (
+            patch("governor.os.getloadavg", return_value=(0.0, 0, 0)),
+            patch("governor.read_available_memory", return_value=1024**2),
+        ):
+            assert "memory" in governor.check()
+
+        with (
+            patch("governor.os.getloadavg", return_value=(0.0, 0, 0)),
+            patch("governor.read_available_memory", return_value=None),
+            patch("governor.read_disk_written", return_value=None),
+        ):
+            assert governor.check() is None
+
+    def test_admit_waits_until_resources_free_up(self):
+        governor = ResourceGovernor(poll_interval=0)
+        with patch.object(governor, "check", side_effect=["load 1.00", None]):
+            assert governor.admit("encoding") is True
+
+    def test_admit_gives_up_after_max_wait(self):
+        governor = ResourceGovernor(max_wait=0, poll_interval=0)
+        with patch.object(governor, "check", return_value="load 1.00"):
+            assert governor.admit("encoding") is False
+
+    def test_cores_are_reserved_per_recording(self):
+        governor = ResourceGovernor(reserve_cores=2)
+        with (
+            patch("governor.os.sched_getaffinity", return_value={0, 1, 2, 3, 4}),
+            patch.object(governor_module.throughput, "active_count", return_value=1),
+        ):
+            assert governor.allowed_cores() == {2, 3, 4}
+
+        # At least one core is always left for processing
+        with (
+            patch("governor.os.sched_getaffinity", return_value={0, 1}),
+            patch.object(governor_module.throughput, "active_count", return_value=3),
+        ):
+            assert governor.allowed_cores() == {1}
+
+    def test_disabled_governor_leaves_work_alone(self):
+        governor = ResourceGovernor(enabled=False)
+        with patch.object(governor, "check") as check:
+            with governor.heavy("encoding"):
+                assert governor.active == 1
+        check.assert_not_called()
+        assert governor.active == 0
@@ -0,0 +1,57 @@
+from journal import JobJournal
+from pipeline import Job
+
+
+def _job(path="/tmp/recordings/a/video.ts") -> Job:
+    return Job(path, "streamer", None)
+
+
+class TestJobJournal:
+    def test_pending_jobs_survive_reopening(self, tmp_path):
+        path = str(tmp_path / "jobs.db")
+        journal = JobJournal(path)
+        job = _job()
+        job.duration = 3600.0
+        journal.add(job)
+        job.video_path = "/tmp/recordings/a/video.mp4"
+        job.audio_path = "/tmp/recordings/a/video.wav"
+        job.transcription_path = "/tmp/recordings/a/video.enhanced_transcription.json"
+        journal.checkpoint(job, "transcribe")
+        journal.close()
+
+        [(resumed, completed)] = JobJournal(path).pending()
+        assert completed == "transcribe"
+        assert resumed.id == job.id
+        assert resumed.source_path == "/tmp/recordings/a/video.ts"
+        assert resumed.video_path == "/tmp/recordings/a/video.mp4"
+        assert resumed.audio_path == "/tmp/recordings/a/video.wav"
+        assert resumed.duration == 3600.0
+        assert resumed.transcription_path == job.transcription_path
+        assert resumed.clips_path is None
+
+    def test_finished_jobs_are_not_pending(self, tmp_path):
+        journal = JobJournal(str(tmp_path / "jobs.db"))
+        first, second = _job("/tmp/1.ts"), _job("/tmp/2.ts")
+        journal.add(first)
+        journal.add(second)
+        journal.checkpoint(first, "upload", finished=True)
+
+        assert [job.source_path for job, _ in journal.pending()] == ["/tmp/2.ts"]
+        assert journal.pending()[0][1] is None
+
+    def test_disabled_journal_keeps_nothing(self, tmp_path):
+        journal = JobJournal(str(tmp_path / "jobs.db"), enabled=False)
+        job = _job()
+        journal.add(job)
+        journal.checkpoint(job, "convert")
+
+        assert job.id is None
+        assert journal.pending() == []
+        assert not (tmp_path / "jobs.db").exists()
+
+    def test_nothing_is_written_until_first_use(self, tmp_path):
+        journal = JobJournal(str(tmp_path / "recordings" / "jobs.db"))
+        assert not (tmp_path / "recordings").exists()
+
+        journal.add(_job())
+        assert (tmp_path / "recordings" / "jobs.db").exists()
@@ -0,0 +1,126 @@
+import configparser
+import json
+from unittest.mock import patch
+
+import live_clipper
+from audio_source import FfmpegSource
+from live_clipper import LiveClipper, live_clipping_enabled
+
+
+def _config(**clipception) -> configparser.ConfigParser:
+    config = configparser.ConfigParser()
+    config.read_dict(
+        {
+            "clipception": {"enabled": "true", **clipception},
+            "video": {"split_into_parts": "false"},
+        }
+    )
+    return config
+
+
+def _segment(start, end):
+    return {"start": start, "end": end, "text": "", "audio_features": {}}
+
+
+def _clip(name, start, end, score):
+    return {"name": name, "start": start, "end": end, "score": score}
+
+
+class TestLiveClippingEnabled:
+    def test_requires_live_and_clipception(self):
+        with patch.object(live_clipper, "CLIPCEPTION_ENABLED", True):
+            assert live_clipping_enabled(_config(live="true"))
+            assert not live_clipping_enabled(_config(live="false"))
+            assert not live_clipping_enabled(_config(enabled="false", live="true"))
+
+        with patch.object(live_clipper, "CLIPCEPTION_ENABLED", False):
+            assert not live_clipping_enabled(_config(live="true"))
+
+    def test_split_recordings_are_clipped_per_part(self):
+        config = _config(live="true")
+        config["video"]["split_into_parts"] = "true"
+        with patch.object(live_clipper, "CLIPCEPTION_ENABLED", True):
+            assert not live_clipping_enabled(config)
+
+
+class TestLiveClipper:
+    def _clipper(self, tmp_path, **kwargs) -> LiveClipper:
+        return LiveClipper(str(tmp_path / "stream.ts"), "streamer", **kwargs)
+
+    def test_window_transcription_is_offset_and_appended(self, tmp_path):
+        clipper = self._clipper(tmp_path)
+        with (
+            patch.object(
+                live_clipper, "transcribe_with_features", return_value=[_segment(0, 60)]
+            ) as transcribe,
+            patch.object(live_clipper, "rank_all_clips_parallel", return_value=[]),
+        ):
+            clipper.process_window(0, 300)
+            clipper.process_window(300, 300)
+
+        audio = transcribe.call_args.args[1]
+        assert isinstance(audio, FfmpegSource)
+        assert audio.video_path == str(tmp_path / "stream.ts")
+        assert audio.command[3:7] == ["-ss", "300", "-t", "300"]
+        assert not (tmp_path / "stream.live.wav").exists()
+        assert transcribe.call_args.kwargs["offset"] == 300
+        saved = json.loads(
+            (tmp_path / "stream.enhanced_transcription.json").read_text()
+        )
+        assert len(saved) == 2
+
+    def test_ranks_only_segments_within_horizon(self, tmp_path):
+        clipper = self._clipper(tmp_path, horizon=600)
+        clipper.segments = [_segment(0, 60), _segment(500, 560)]
+        with (
+            patch.object(
+                live_clipper,
+                "transcribe_with_features",
+                return_value=[_segment(900, 960)],
+            ),
+            patch.object(
+                live_clipper, "rank_all_clips_parallel", return_value=[]
+            ) as rank,
+        ):
+            clipper.process_window(900, 300)
+
+        ranked = rank.call_args.args[0]
+        assert [segment["start"] for segment in ranked] == [900]
+
+    def test_extracts_each_moment_once_above_min_score(self, tmp_path):
+        clipper = self._clipper(tmp_path, min_score=7)
+        first = [_clip("a", 0, 60, 9), _clip("low", 100, 160, 3)]
+        second = [_clip("a again", "30", "90", 9), _clip("b", 200, 260, 8)]
+        with (
+            patch.object(
+                live_clipper, "transcribe_with_features", return_value=[_segment(0, 60)]
+            ),
+            patch.object(
+                live_clipper, "rank_all_clips_parallel", side_effect=[first, second]
+            ),
+            patch.object(
+                live_clipper, "extract_clip", return_value=(True, "clip.mp4")
+            ) as extract,
+            patch.object(live_clipper, "save_top_clips_json") as save,
+        ):
+            assert [c["name"] for c in clipper.process_window(0, 300)] == ["a"]
+            assert [c["name"] for c in clipper.process_window(300, 300)] == ["b"]
+
+        assert extract.call_count == 2
+        saved, path, _ = save.call_args.args
+        assert [c["name"] for c in saved] == ["a", "b"]
+        assert path == str(tmp_path / "stream.top_clips.json")
+
+    def test_stop_processes_remaining_recording(self, tmp_path):
+        (tmp_path / "stream.ts").write_bytes(b"data")
+        clipper = self._clipper(tmp_path, window=300, lag=30)
+        with (
+            patch.object(clipper, "elapsed", return_value=42.0),
+            patch.object(clipper, "process_window") as process,
+        ):
+            clipper.start()
+            clipper.stop()
+            clipper.join(timeout=5)
+
+        process.assert_called_once_with(0.0, 42.0)
+        assert clipper.processed == 42.0
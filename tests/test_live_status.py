@@ -0,0 +1,138 @@
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from live_status import LiveStatusService
+from utils import StreamPlatform
+
+
+def _make_service(server, **kwargs) -> LiveStatusService:
+    return LiveStatusService(
+        twitch_gql_url=f"{server.url}/gql", kick_api_url=server.url, **kwargs
+    )
+
+
+class TestLiveStatusService:
+    """Test cases for the batched live status service"""
+
+    def test_twitch_channels_checked_in_one_request(self, status_server):
+        """Test that every registered Twitch channel shares one request"""
+        status_server.live["alpha"] = {"id": "42", "title": "hello"}
+        service = _make_service(status_server)
+        for name in ("alpha", "beta", "gamma"):
+            service.register(StreamPlatform.TWITCH, name)
+
+        assert service.is_live(StreamPlatform.TWITCH, "alpha") is True
+        assert service.is_live(StreamPlatform.TWITCH, "beta") is False
+        assert service.is_live(StreamPlatform.TWITCH, "gamma") is False
+        assert status_server.requests == ["/gql"]
+
+    def test_metadata_is_cached(self, status_server):
+        """Test that stream metadata is kept from the batch response"""
+        status_server.live["alpha"] = {"id": "42", "title": "hello"}
+        service = _make_service(status_server)
+
+        service.is_live(StreamPlatform.TWITCH, "Alpha")
+        metadata = service.get_metadata(StreamPlatform.TWITCH, "alpha")
+        assert metadata["id"] == "42"
+        assert metadata["title"] == "hello"
+
+    def test_stale_results_are_refreshed(self, status_server):
+        """Test that a zero ttl triggers a new request"""
+        service = _make_service(status_server, ttl=0)
+
+        assert service.is_live(StreamPlatform.TWITCH, "alpha") is False
+        status_server.live["alpha"] = {"id": "1", "title": ""}
+        assert service.is_live(StreamPlatform.TWITCH, "alpha") is True
+        assert len(status_server.requests) == 2
+
+    def test_check_now_bypasses_the_cache(self, status_server):
+        """Test that a fresh check sees a stream end the cache doesn't know about"""
+        status_server.live["alpha"] = {"id": "1", "title": ""}
+        service = _make_service(status_server)
+        assert service.is_live(StreamPlatform.TWITCH, "alpha") is True
+
+        del status_server.live["alpha"]
+        assert service.is_live(StreamPlatform.TWITCH, "alpha") is True
+        assert service.check_now(StreamPlatform.TWITCH, "alpha") is False
+        assert service.is_live(StreamPlatform.TWITCH, "alpha") is False
+
+    def test_failed_batch_is_checked_channel_by_channel(self, status_server):
+        """Test one channel failing the batch doesn't hide the others"""
+        status_server.live["alpha"] = {"id": "42", "title": "hello"}
+        status_server.broken.add("broken")
+        service = _make_service(status_server)
+        for name in ("alpha", "beta", "broken"):
+            service.register(StreamPlatform.TWITCH, name)
+
+        assert service.is_live(StreamPlatform.TWITCH, "alpha") is True
+        assert service.is_live(StreamPlatform.TWITCH, "beta") is False
+        # The batch, then one request per channel
+        assert len(status_server.requests) == 4
+        assert service.is_live(StreamPlatform.TWITCH, "broken") is None
+
+    def test_twitch_client_id_is_configurable(self, status_server):
+        """Test the configured client id is sent with every request"""
+        service = _make_service(status_server, twitch_client_id="my-client")
+        service.is_live(StreamPlatform.TWITCH, "alpha")
+        assert status_server.client_ids == ["my-client"]
+
+    def test_kick_channels(self, status_server):
+        """Test Kick channel status through the pooled session"""
+        status_server.live["kicker"] = {"id": 7, "title": "live now"}
+        service = _make_service(status_server)
+        service.register(StreamPlatform.KICK, "other")
+
+        assert service.is_live(StreamPlatform.KICK, "kicker") is True
+        assert service.is_live(StreamPlatform.KICK, "other") is False
+        assert service.get_metadata(StreamPlatform.KICK, "kicker")["id"] == "7"
+
+    def test_only_stale_channels_are_refreshed(self, status_server):
+        """Test that channels with a fresh result are not checked again"""
+        service = _make_service(status_server)
+        for name in ("alpha", "beta", "gamma"):
+            service.register(StreamPlatform.KICK, name)
+        assert service.is_live(StreamPlatform.KICK, "alpha") is False
+        assert len(status_server.requests) == 3
+
+        service.register(StreamPlatform.KICK, "delta")
+        assert service.is_live(StreamPlatform.KICK, "delta") is False
+        assert status_server.requests[3:] == ["/channels/delta"]
+
+    def test_concurrent_callers_share_one_refresh(self, status_server):
+        """Test that monitors asking at once wait for the refresh in progress"""
+        service = _make_service(status_server)
+        for name in ("alpha", "beta", "gamma", "delta"):
+            service.register(StreamPlatform.KICK, name)
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(
+                executor.map(
+                    lambda name: service.is_live(StreamPlatform.KICK, name),
+                    ["alpha", "beta", "gamma", "delta"],
+                )
+            )
+
+        assert results == [False] * 4
+        assert sorted(status_server.requests) == [
+            f"/channels/{name}" for name in ("alpha", "beta", "delta", "gamma")
+        ]
+
+    def test_unsupported_platform_returns_none(self, status_server):
+        """Test that platforms without an API checker fall back"""
+        service = _make_service(status_server)
+        assert service.is_live(StreamPlatform.YOUTUBE, "someone") is None
+        assert status_server.requests == []
+
+    def test_disabled_service_returns_none(self, status_server):
+        """Test that a disabled service never sends requests"""
+        service = _make_service(status_server, enabled=False)
+        assert service.is_live(StreamPlatform.TWITCH, "alpha") is None
+        assert status_server.requests == []
+
+    def test_failed_request_returns_none(self):
+        """Test that an unreachable API falls back to streamlink"""
+        service = LiveStatusService(twitch_gql_url="http://127.0.0.1:1/gql", timeout=1)
+        assert service.is_live(StreamPlatform.TWITCH, "alpha") is None
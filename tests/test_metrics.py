@@ -0,0 +1,86 @@
+import subprocess
+import urllib.request
+from unittest.mock import patch
+
+import pytest
+
+from metrics import MetricsExporter, MetricsRegistry, subprocess_exits
+from utils import run_command
+
+
+class TestMetricsRegistry:
+    def test_counter_and_gauge_render_per_label(self):
+        registry = MetricsRegistry()
+        probes = registry.counter("probes_total", "Probes.", ("platform",))
+        probes.inc(platform="twitch")
+        probes.inc(2, platform="kick")
+        registry.gauge("speed", "Speed.").set(1.5)
+
+        text = registry.render()
+        assert "# TYPE autovod_probes_total counter" in text
+        assert 'autovod_probes_total{platform="kick"} 2\n' in text
+        assert 'autovod_probes_total{platform="twitch"} 1\n' in text
+        assert "autovod_speed 1.5\n" in text
+
+    def test_nan_and_infinite_values_render(self):
+        registry = MetricsRegistry()
+        gauge = registry.gauge("ratio", "Ratio.", ("stage",))
+        gauge.set(float("nan"), stage="a")
+        gauge.set(float("inf"), stage="b")
+        gauge.set(float("-inf"), stage="c")
+
+        text = registry.render()
+        assert 'autovod_ratio{stage="a"} NaN\n' in text
+        assert 'autovod_ratio{stage="b"} +Inf\n' in text
+        assert 'autovod_ratio{stage="c"} -Inf\n' in text
+
+    def test_labels_must_match(self):
+        counter = MetricsRegistry().counter("c", "C.", ("stage",))
+        with pytest.raises(ValueError):
+            counter.inc(platform="twitch")
+
+    def test_function_metrics_are_read_when_rendered(self):
+        registry = MetricsRegistry()
+        depth = {"convert": 1}
+        registry.gauge(
+            "queued_jobs",
+            "Queued.",
+            ("stage",),
+            function=lambda: {(stage,): n for stage, n in depth.items()},
+        )
+        depth["convert"] = 3
+        assert 'autovod_queued_jobs{stage="convert"} 3\n' in registry.render()
+
+    def test_histogram_buckets_are_cumulative(self):
+        registry = MetricsRegistry()
+        histogram = registry.histogram("d", "D.", ("stage",), buckets=(1, 10))
+        for value in (0.5, 5, 50):
+            histogram.observe(value, stage="encode")
+
+        text = registry.render()
+        assert 'autovod_d_bucket{stage="encode",le="1"} 1\n' in text
+        assert 'autovod_d_bucket{stage="encode",le="10"} 2\n' in text
+        assert 'autovod_d_bucket{stage="encode",le="+Inf"} 3\n' in text
+        assert 'autovod_d_sum{stage="encode"} 55.5\n' in text
+        assert histogram.count(stage="encode") == 3
+
+
+def test_exporter_serves_the_registry():
+    registry = MetricsRegistry()
+    registry.counter("probes_total", "Probes.").inc()
+    exporter = MetricsExporter(registry, port=0)
+    exporter.start()
+    try:
+        url = f"http://127.0.0.1:{exporter.port}/metrics"
+        with urllib.request.urlopen(url, timeout=5) as response:
+            assert "autovod_probes_total 1" in response.read().decode()
+    finally:
+        exporter.stop()
+
+
+def test_run_command_counts_exit_codes():
+    before = subprocess_exits.get(command="ffmpeg", code="1")
+    error = subprocess.CalledProcessError(1, ["ffmpeg"])
+    with patch("utils.subprocess.run", side_effect=error):
+        run_command(["ffmpeg", "-i", "input.ts"])
+    assert subprocess_exits.get(command="ffmpeg", code="1") == before + 1
@@ -0,0 +1,109 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from model_pool import ModelPool, TranscriptionWorker
+
+KEY = ("faster-whisper", "base", "cpu", "float32")
+
+
+class TestModelPool:
+    def test_model_is_loaded_once_and_reused(self):
+        pool = ModelPool(ttl=60)
+        loads = []
+
+        def load():
+            loads.append(1)
+            return object()
+
+        first = pool.acquire(KEY, load)
+        pool.release(KEY)
+        assert pool.acquire(KEY, load) is first
+        pool.release(KEY)
+        assert len(loads) == 1
+
+    def test_concurrent_acquires_share_one_load(self):
+        pool = ModelPool(ttl=60)
+        loads = []
+        loading = threading.Event()
+
+        def load():
+            loads.append(1)
+            loading.wait(1)
+            return object()
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            futures = [executor.submit(pool.acquire, KEY, load) for _ in range(4)]
+            loading.set()
+            models = {id(future.result()) for future in futures}
+
+        assert len(loads) == 1
+        assert len(models) == 1
+        assert pool.models[KEY].users == 4
+
+    def test_idle_models_are_evicted_after_ttl(self):
+        pool = ModelPool(ttl=60)
+        evicted = []
+        pool.on_evict = evicted.append
+        other = ("whisper", "base", "cpu", "float32")
+        pool.acquire(KEY, object)
+        pool.acquire(other, object)
+        pool.release(KEY)
+
+        last_used = pool.models[KEY].last_used
+        assert pool.evict_idle(now=last_used + 30) == []
+        # The other model is still held, however long ago it was loaded
+        assert pool.evict_idle(now=last_used + 60) == [KEY]
+        assert evicted == [KEY]
+        assert list(pool.models) == [other]
+
+    def test_zero_ttl_unloads_on_release(self):
+        pool = ModelPool(ttl=0)
+        pool.acquire(KEY, object)
+        assert KEY in pool.models
+        pool.release(KEY)
+        assert pool.models == {}
+
+    def test_failed_load_is_not_kept(self):
+        pool = ModelPool(ttl=60)
+
+        def load():
+            raise RuntimeError("out of memory")
+
+        with pytest.raises(RuntimeError):
+            pool.acquire(KEY, load)
+        assert pool.models == {}
+
+    def test_exclusive_users_take_turns(self):
+        pool = ModelPool(ttl=60)
+        active, overlaps = [], []
+
+        def transcribe(exclusive):
+            with pool.use(KEY, object, exclusive=exclusive):
+                active.append(1)
+                overlaps.append(len(active))
+                threading.Event().wait(0.05)
+                active.pop()
+
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            list(executor.map(transcribe, [True] * 3))
+        assert max(overlaps) == 1
+        assert pool.models[KEY].users == 0
+
+        overlaps.clear()
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            list(executor.map(transcribe, [False] * 3))
+        assert max(overlaps) > 1
+
+
+class TestTranscriptionWorker:
+    def test_runs_submitted_work_on_one_thread(self):
+        worker = TranscriptionWorker(enabled=True)
+        threads = {worker.call(threading.current_thread) for _ in range(3)}
+        assert threads == {worker}
+
+    def test_disabled_worker_runs_inline(self):
+        worker = TranscriptionWorker(enabled=False)
+        assert worker.call(threading.current_thread) is threading.current_thread()
+        assert not worker.is_alive()
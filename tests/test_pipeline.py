@@ -0,0 +1,187 @@
+import configparser
+import threading
+import time
+from unittest.mock import patch
+
+from pipeline import Job, JobQueue, Pipeline, Stage
+
+
+def _job(name: str) -> Job:
+    return Job(name, "streamer", None)
+
+
+def _run(stages: list[Stage], jobs: list[Job]) -> Pipeline:
+    pipeline = Pipeline(stages)
+    pipeline.start()
+    for job in jobs:
+        pipeline.submit(job)
+    pipeline.join()
+    # Stopping waits out each worker's idle poll, the daemon workers are left running
+    return pipeline
+
+
+class TestPipeline:
+    def test_jobs_go_through_every_stage_in_order(self):
+        seen = []
+
+        def handler(name):
+            def handle(job):
+                seen.append((name, job.video_path))
+                return job
+
+            return handle
+
+        _run([Stage("a", handler("a")), Stage("b", handler("b"))], [_job("1")])
+        assert seen == [("a", "1"), ("b", "1")]
+
+    def test_failed_stage_passes_the_job_on(self):
+        finished = []
+
+        def fail(job):
+            raise RuntimeError("boom")
+
+        _run([Stage("a", fail), Stage("b", finished.append)], [_job("1")])
+        assert [job.video_path for job in finished] == ["1"]
+
+    def test_dropped_job_skips_later_stages(self):
+        finished = []
+        _run([Stage("a", lambda job: None), Stage("b", finished.append)], [_job("1")])
+        assert finished == []
+
+    def test_jobs_are_in_flight_until_finished(self):
+        job = _job("1")
+        seen = []
+        pipeline = Pipeline([Stage("a", lambda j: seen.append(pipeline.in_flight()))])
+        pipeline.start()
+        pipeline.submit(job)
+        pipeline.join()
+        assert seen == [[job]]
+        assert pipeline.in_flight() == []
+
+    def test_workers_run_jobs_concurrently(self):
+        barrier = threading.Barrier(2, timeout=5)
+
+        def wait_for_each_other(job):
+            barrier.wait()
+            return job
+
+        # Both jobs only finish if the two workers hold them at the same time
+        _run([Stage("slow", wait_for_each_other, workers=2)], [_job("1"), _job("2")])
+
+    def test_slow_stage_does_not_hold_up_earlier_stage(self):
+        release = threading.Event()
+        converted = []
+
+        def convert(job):
+            converted.append(job.video_path)
+            return job
+
+        def upload(job):
+            release.wait(5)
+            return job
+
+        pipeline = Pipeline(
+            [Stage("convert", convert), Stage("upload", upload, queue_size=4)]
+        )
+        pipeline.start()
+        for name in ("1", "2", "3"):
+            pipeline.submit(_job(name))
+
+        deadline = time.monotonic() + 5
+        while len(converted) < 3 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert converted == ["1", "2", "3"]
+        assert pipeline.pending() == {"convert": 0, "upload": 3}
+
+        release.set()
+        pipeline.join()
+        pipeline.stop()
+        assert not any(thread.is_alive() for thread in pipeline.threads)
+
+    def test_checkpoints_after_every_stage(self):
+        checkpoints = []
+        stages = [Stage("a", lambda job: job), Stage("b", lambda job: job)]
+        pipeline = Pipeline(
+            stages,
+            on_checkpoint=lambda job, stage, finished: checkpoints.append(
+                (stage, finished)
+            ),
+        )
+        pipeline.start()
+        pipeline.submit(_job("1"))
+        pipeline.join()
+        assert checkpoints == [("a", False), ("b", True)]
+
+    def test_resumed_job_enters_at_its_stage(self):
+        seen = []
+        stages = [
+            Stage(name, lambda job, name=name: seen.append(name) or job)
+            for name in "abc"
+        ]
+        pipeline = Pipeline(stages)
+        pipeline.start()
+
+        assert pipeline.stage_after(None) == "a"
+        assert pipeline.stage_after("a") == "b"
+        assert pipeline.stage_after("c") is None
+        pipeline.submit(_job("1"), pipeline.stage_after("a"))
+        pipeline.join()
+        assert seen == ["b", "c"]
+
+
+def _config(priority: float):
+    config = configparser.ConfigParser()
+    config.read_dict({"processing": {"priority": str(priority)}})
+    return config
+
+
+class TestJobQueue:
+    def _drain(self, job_queue: JobQueue) -> list[str]:
+        return [job_queue.get_nowait().video_path for _ in range(job_queue.qsize())]
+
+    def test_fifo_without_priorities(self):
+        job_queue = JobQueue("convert")
+        for name in ("1", "2", "3"):
+            job_queue.put(Job(name, "streamer", None))
+        assert self._drain(job_queue) == ["1", "2", "3"]
+
+    def test_priority_streamer_goes_first_and_shares_fairly(self):
+        job_queue = JobQueue("convert")
+        for name in ("low1", "low2", "low3"):
+            job_queue.put(Job(name, "low", _config(1)))
+        for name in ("high1", "high2", "high3"):
+            job_queue.put(Job(name, "high", _config(2)))
+
+        # High is served twice as often as low
+        assert self._drain(job_queue) == [
+            "high1",
+            "low1",
+            "high2",
+            "high3",
+            "low2",
+            "low3",
+        ]
+
+    def test_aging_lets_old_jobs_through(self):
+        job_queue = JobQueue("convert", aging=1)
+        with patch("pipeline.time.monotonic", return_value=0):
+            job_queue.put(Job("old", "low", _config(1)))
+        with patch("pipeline.time.monotonic", return_value=3 * 3600):
+            job_queue.put(Job("new", "high", _config(4)))
+            assert self._drain(job_queue) == ["old", "new"]
+
+    def test_shortest_job_first(self):
+        job_queue = JobQueue("convert", shortest_job_first=True)
+        job_queue.put(Job("long", "a", None, duration=12 * 3600))
+        job_queue.put(Job("short", "b", None, duration=20 * 60))
+        assert self._drain(job_queue) == ["short", "long"]
+
+    def test_wait_time_is_recorded_per_stage(self):
+        job_queue = JobQueue("encode")
+        job = Job("1", "streamer", None)
+        with patch("pipeline.time.monotonic", return_value=10):
+            job_queue.put(job)
+        with patch("pipeline.time.monotonic", return_value=25):
+            job_queue.get_nowait()
+        assert job.waits == {"encode": 15}
+        assert job.wait_time == 15
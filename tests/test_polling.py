@@ -0,0 +1,80 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from polling import PollingPolicy, WEEK
+
+DAY = 24 * 3600
+
+
+def _make_policy(tmp_path, **kwargs) -> PollingPolicy:
+    return PollingPolicy(
+        "streamer",
+        120,
+        history_dir=str(tmp_path),
+        min_delay=30,
+        max_delay=1800,
+        window_minutes=60,
+        off_schedule_factor=5,
+        dormant_days=14,
+        **kwargs,
+    )
+
+
+class TestPollingPolicy:
+    """Test cases for the adaptive polling policy"""
+
+    def test_base_delay_without_history(self, tmp_path):
+        """Test that new streamers keep the configured delay"""
+        policy = _make_policy(tmp_path)
+        assert policy.next_delay() == 120
+
+    def test_disabled_policy(self, tmp_path):
+        """Test that a disabled policy never learns"""
+        policy = _make_policy(tmp_path, enabled=False)
+        for week in range(4):
+            policy.record_go_live(1_700_000_000 + week * WEEK)
+        assert policy.next_delay(1_700_000_000 + 4 * WEEK) == 120
+
+    def test_fast_polling_near_usual_start(self, tmp_path):
+        """Test polling speeds up around the weekly start time"""
+        policy = _make_policy(tmp_path)
+        start = 1_700_000_000
+        for week in range(4):
+            policy.record_go_live(start + week * WEEK)
+
+        assert policy.next_delay(start + 4 * WEEK - 1800) == 30
+        assert policy.next_delay(start + 4 * WEEK - 3 * DAY) == 600
+
+    def test_dormant_channels_back_off(self, tmp_path):
+        """Test channels without recent go-lives use the maximum delay"""
+        policy = _make_policy(tmp_path)
+        start = 1_700_000_000
+        for week in range(4):
+            policy.record_go_live(start + week * WEEK)
+
+        assert policy.next_delay(start + 3 * WEEK + 15 * DAY) == 1800
+
+    def test_history_is_persisted(self, tmp_path):
+        """Test go-live history survives a restart"""
+        policy = _make_policy(tmp_path)
+        policy.record_go_live(1_700_000_000)
+
+        assert _make_policy(tmp_path).history == [1_700_000_000]
+
+    def test_never_live_channels_become_dormant(self, tmp_path):
+        """Test channels watched for dormant_days without a go-live back off"""
+        policy = _make_policy(tmp_path)
+        watched_since = policy.watched_since
+
+        assert policy.next_delay(watched_since + 13 * DAY) == 120
+        # The first watch time survives a restart
+        restarted = _make_policy(tmp_path)
+        assert restarted.watched_since == watched_since
+        assert restarted.next_delay(watched_since + 15 * DAY) == 1800
+
+    def test_old_history_files_are_read(self, tmp_path):
+        """Test go-live lists written before watch times were stored"""
+        (tmp_path / "streamer.json").write_text("[1700000000]")
+        assert _make_policy(tmp_path).history == [1_700_000_000]
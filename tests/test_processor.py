@@ -1,4 +1,5 @@
 import configparser
+import json
 import os
 import subprocess
 import sys
@@ -12,22 +13,10 @@ from unittest.mock import patch
 # Add src to path to import processor
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
 
-# Keep processor imports lightweight for command-construction tests.
-transcription = types.ModuleType("transcription")
-transcription.MIN_DURATION = 999
-transcription.process_video = lambda *args, **kwargs: None
-sys.modules.setdefault("transcription", transcription)
-
-gen_clip = types.ModuleType("gen_clip")
-gen_clip.generate_clips = lambda *args, **kwargs: None
-gen_clip.process_clips = lambda *args, **kwargs: None
-sys.modules.setdefault("gen_clip", gen_clip)
-
-uploader = types.ModuleType("uploader")
-uploader.upload_youtube = lambda *args, **kwargs: None
-sys.modules.setdefault("uploader", uploader)
-
+from pipeline import Job, Pipeline, Stage
+from journal import JobJournal
 from processor import Processor
+import tracing
 
 
 def test_encode_writes_to_reencoded_output_path():
@@ -89,16 +78,137 @@ def test_convert_builds_valid_shorts_ffmpeg_command():
         output_path = processor._convert("/tmp/recordings/input.ts")
 
     assert output_path == "/tmp/recordings/input.mp4"
-    assert run_command.call_args_list[1].args[0] == [
+    run_command.assert_called_once()
+    assert run_command.call_args.args[0] == [
         "ffmpeg",
         "-i",
+        "/tmp/recordings/input.ts",
+        "-c",
+        "copy",
         "/tmp/recordings/input.mp4",
         "-vf",
         "scale=1080:1920:force_original_aspect_ratio=decrease,"
         "pad=1080:1920:(ow-iw)/2:(oh-ih)/2:color=black,setsar=1",
-        "-c",
-        "copy",
+        "-c:v",
+        "libx264",
+        "-preset",
+        "veryfast",
+        "-c:a",
+        "aac",
         "/tmp/recordings/shorts_input.mp4",
         "-loglevel",
         "error",
     ]
+
+
+def test_convert_writes_transcription_audio_in_the_same_pass():
+    processor = object.__new__(Processor)
+
+    with (
+        patch("processor.MIN_DURATION", 999),
+        patch("processor.run_command") as run_command,
+    ):
+        processor._convert("/tmp/recordings/input.mp4", "/tmp/recordings/input.wav")
+
+    run_command.assert_called_once()
+    command = run_command.call_args.args[0]
+    assert command.count("-i") == 1
+    assert command[command.index("-ar") + 1] == "16000"
+    assert command[command.index("-ac") + 1] == "1"
+    assert command[-3] == "/tmp/recordings/input.wav"
+
+
+def test_convert_skips_remux_for_mp4_recordings():
+    processor = object.__new__(Processor)
+
+    with (
+        patch("processor.MIN_DURATION", 999),
+        patch("processor.run_command") as run_command,
+    ):
+        output_path = processor._convert("/tmp/recordings/input.mp4")
+
+    assert output_path == "/tmp/recordings/input.mp4"
+    run_command.assert_not_called()
+
+
+def test_encode_stage_keeps_remuxed_video_when_encoding_fails():
+    processor = object.__new__(Processor)
+    streamer_config = configparser.ConfigParser()
+    streamer_config["encoding"] = {"re_encode": "true"}
+    job = Job("/tmp/recordings/input.mp4", "streamer", streamer_config)
+
+    with (
+        patch.object(Processor, "_encode", return_value=None),
+        patch("processor.governor.enabled", False),
+    ):
+        processor._encode_stage(job)
+
+    assert job.video_path == "/tmp/recordings/input.mp4"
+
+
+def test_clip_stages_skip_jobs_without_clipception():
+    processor = object.__new__(Processor)
+    streamer_config = configparser.ConfigParser()
+    streamer_config["clipception"] = {"enabled": "false"}
+    job = Job("/tmp/recordings/input.mp4", "streamer", streamer_config)
+
+    with (
+        patch.object(Processor, "_transcribe") as transcribe,
+        patch.object(Processor, "_rank") as rank,
+        patch.object(Processor, "_extract") as extract,
+    ):
+        for stage in (
+            processor._transcribe_stage,
+            processor._rank_stage,
+            processor._extract_stage,
+        ):
+            assert stage(job) is job
+
+    transcribe.assert_not_called()
+    rank.assert_not_called()
+    extract.assert_not_called()
+
+
+def test_resume_queues_unfinished_jobs_at_their_next_stage(tmp_path):
+    processor = object.__new__(Processor)
+    processor.journal = JobJournal(str(tmp_path / "jobs.db"))
+    processor.pipeline = Pipeline(
+        [Stage("convert", None), Stage("encode", None), Stage("upload", None)]
+    )
+    video = tmp_path / "video.mp4"
+    video.write_bytes(b"0")
+
+    resumed, done, missing = (
+        Job(str(video), "streamer", None),
+        Job(str(video), "streamer", None),
+        Job(str(tmp_path / "gone.mp4"), "streamer", None),
+    )
+    for job in (resumed, done, missing):
+        processor.journal.add(job)
+    processor.journal.checkpoint(resumed, "convert")
+    processor.journal.checkpoint(done, "upload")
+
+    streamer_config = configparser.ConfigParser()
+    with (
+        patch("processor.load_config", return_value=streamer_config),
+        patch.object(processor.pipeline, "submit") as submit,
+    ):
+        processor._resume()
+
+    [(job, stage)] = [call.args for call in submit.call_args_list]
+    assert (job.id, stage) == (resumed.id, "encode")
+    assert job.streamer_config is streamer_config
+    assert [j.id for j, _ in processor.journal.pending()] == [resumed.id]
+
+
+def test_traced_stage_writes_a_span_to_the_jobs_trace(tmp_path):
+    processor = object.__new__(Processor)
+    processor.profiler = tracing.Profiler()
+    job = Job(str(tmp_path / "input.ts"), "streamer", None)
+    job.trace = tracing.Trace(str(tmp_path / "input.trace.jsonl"))
+
+    assert processor._traced("encode", lambda j: j)(job) is job
+
+    [span] = [json.loads(line) for line in open(job.trace.path)]
+    assert span["name"] == "encode"
+    assert span["attributes"]["video"] == job.video_path
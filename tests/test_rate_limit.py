@@ -0,0 +1,69 @@
+import os
+import sys
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from rate_limit import TokenBucket, RateLimiter
+from utils import StreamPlatform
+
+
+class TestTokenBucket:
+    """Test cases for the token bucket"""
+
+    def test_burst_is_free(self):
+        """Test that the burst capacity needs no waiting"""
+        bucket = TokenBucket(rate=1, burst=3)
+        assert [bucket.reserve() for _ in range(3)] == [0, 0, 0]
+
+    def test_wait_after_burst(self):
+        """Test that reservations past the burst queue up"""
+        bucket = TokenBucket(rate=10, burst=1)
+        bucket.reserve()
+        assert 0.09 < bucket.reserve() <= 0.1
+        assert 0.19 < bucket.reserve() <= 0.2
+
+    def test_reserve_respects_max_wait(self):
+        """Test that a too long wait does not take a token"""
+        bucket = TokenBucket(rate=1, burst=1)
+        bucket.reserve()
+        assert bucket.reserve(max_wait=0.1) is None
+        assert bucket.reserve(max_wait=2) is not None
+
+
+class TestRateLimiter:
+    """Test cases for the per-platform rate limiter"""
+
+    def test_counters(self):
+        """Test throttled and deferred counters per platform"""
+        limiter = RateLimiter(rate=1, burst=1)
+        with patch("rate_limit.time.sleep") as sleep:
+            assert limiter.acquire(StreamPlatform.TWITCH)
+            assert limiter.acquire(StreamPlatform.TWITCH)
+            assert not limiter.acquire(StreamPlatform.TWITCH, max_wait=0.5)
+            assert limiter.acquire(StreamPlatform.KICK)
+
+        sleep.assert_called_once()
+        stats = limiter.stats()
+        assert stats["twitch"] == {"throttled": 1, "deferred": 1}
+        assert stats["kick"] == {"throttled": 0, "deferred": 0}
+
+    def test_platform_rate_override(self):
+        """Test that per-platform rates get their own bucket"""
+        limiter = RateLimiter(rate=1, rates={StreamPlatform.KICK: 5})
+        limiter.acquire(StreamPlatform.KICK)
+        assert limiter.buckets[StreamPlatform.KICK].rate == 5
+
+    def test_disabled_limiter(self):
+        """Test that a disabled limiter never waits or jitters"""
+        limiter = RateLimiter(enabled=False, rate=0.001, burst=1)
+        assert all(limiter.acquire(StreamPlatform.TWITCH, 0) for _ in range(5))
+        assert limiter.jitter(120) == 120
+        assert limiter.stagger_delay(3, 10, 120) == 0
+
+    def test_jitter_and_stagger_bounds(self):
+        """Test jitter stays within its ratio and stagger within the window"""
+        limiter = RateLimiter(jitter=0.1, stagger=60)
+        assert all(108 <= limiter.jitter(120) <= 132 for _ in range(50))
+        offsets = [limiter.stagger_delay(i, 4, 120) for i in range(4)]
+        assert all(15 * i <= offset < 15 * (i + 1) for i, offset in enumerate(offsets))
@@ -0,0 +1,154 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from recorder import (
+    build_streamlink_command,
+    build_fmp4_mux_command,
+    build_segment_mux_command,
+    build_concat_command,
+    parse_duration,
+    SegmentWatcher,
+    RecordingSession,
+)
+
+
+class TestRecorderCommands:
+    """Test cases for recording command construction"""
+
+    def test_streamlink_to_file(self):
+        """Test streamlink writing to an output file"""
+        command = build_streamlink_command(
+            "twitch.tv/someone", "best", ["--twitch-disable-ads"], "out.ts"
+        )
+        assert command == [
+            "streamlink",
+            "-o",
+            "out.ts",
+            "twitch.tv/someone",
+            "best",
+            "--twitch-disable-ads",
+        ]
+
+    def test_streamlink_flags_with_separate_values(self):
+        """Test a flag and its value written with a space become two arguments"""
+        command = build_streamlink_command(
+            "twitch.tv/someone",
+            "best",
+            ["--stream-timeout 60", "--http-header 'User-Agent=Py AutoVod'"],
+        )
+        assert command[-4:] == [
+            "--stream-timeout",
+            "60",
+            "--http-header",
+            "User-Agent=Py AutoVod",
+        ]
+
+    def test_streamlink_to_stdout(self):
+        """Test streamlink writing to stdout for piping"""
+        command = build_streamlink_command("twitch.tv/someone", "720p,best", [])
+        assert command == ["streamlink", "-O", "twitch.tv/someone", "720p,best"]
+
+    def test_fmp4_mux_command(self):
+        """Test ffmpeg stream copies stdin into a fragmented mp4"""
+        command = build_fmp4_mux_command("out.mp4", "warning")
+        assert command[:6] == [
+            "ffmpeg",
+            "-hide_banner",
+            "-loglevel",
+            "warning",
+            "-i",
+            "pipe:0",
+        ]
+        assert command[command.index("-c") + 1] == "copy"
+        assert "frag_keyframe" in command[command.index("-movflags") + 1]
+        assert command[-1] == "out.mp4"
+
+
+class TestSegments:
+    """Test cases for split recordings"""
+
+    def test_parse_duration(self):
+        """Test HH:MM:SS durations are converted to seconds"""
+        assert parse_duration("06:00:00") == 21600
+        assert parse_duration("01:30") == 90
+        assert parse_duration("45") == 45
+
+    def test_segment_mux_command(self):
+        """Test the segment muxer writes a list of finished parts"""
+        command = build_segment_mux_command(
+            "out_part%03d.mp4", "out.parts.csv", 60, True
+        )
+        assert command[command.index("-f") + 1] == "segment"
+        assert command[command.index("-segment_list") + 1] == "out.parts.csv"
+        assert command[command.index("-segment_format") + 1] == "mp4"
+        assert command[-1] == "out_part%03d.mp4"
+
+    def test_segment_watcher_returns_each_part_once(self, tmp_path):
+        """Test finished parts are read incrementally from the segment list"""
+        watcher = SegmentWatcher(str(tmp_path / "out.ts"))
+        (tmp_path / "out_part000.ts").write_bytes(b"0" * 10)
+        (tmp_path / "out_part001.ts").write_bytes(b"0" * 5)
+        list_file = tmp_path / "out.parts.csv"
+
+        assert watcher.poll() == []
+        list_file.write_text("out_part000.ts,0.000000,60.000000\nout_part001.ts,60.0")
+        assert watcher.poll() == [str(tmp_path / "out_part000.ts")]
+        assert watcher.current_part() == str(tmp_path / "out_part001.ts")
+        assert watcher.total_bytes() == 15
+
+        with open(list_file, "a") as f:
+            f.write("00000,120.000000\n")
+        assert watcher.poll() == [str(tmp_path / "out_part001.ts")]
+        assert watcher.poll() == []
+
+    def test_segment_watcher_resume_continues_numbering(self, tmp_path):
+        """Test a resumed recording starts a fresh list and keeps the part count"""
+        watcher = SegmentWatcher(str(tmp_path / "out.ts"))
+        list_file = tmp_path / "out.parts.csv"
+        list_file.write_text("out_part000.ts,0.000000,60.000000\n")
+        watcher.poll()
+
+        watcher.resume()
+        assert not list_file.exists()
+        assert watcher.current_part() == str(tmp_path / "out_part001.ts")
+        list_file.write_text("out_part001.ts,0.000000,60.000000\n")
+        assert watcher.poll() == [str(tmp_path / "out_part001.ts")]
+
+        command = build_segment_mux_command(
+            watcher.pattern, watcher.list_path, 60, start_number=1
+        )
+        assert command[command.index("-segment_start_number") + 1] == "1"
+
+
+class TestRecordingSession:
+    def test_parts_after_reconnects(self, tmp_path):
+        """Test every reconnect records into a new part of the session"""
+        session = RecordingSession(str(tmp_path / "out.ts"))
+        assert session.next_part() == str(tmp_path / "out.ts")
+        assert session.next_part() == str(tmp_path / "out_resume01.ts")
+        assert session.next_part() == str(tmp_path / "out_resume02.ts")
+
+        (tmp_path / "out.ts").write_bytes(b"0" * 10)
+        (tmp_path / "out_resume01.ts").write_bytes(b"")
+        (tmp_path / "out_resume02.ts").write_bytes(b"0" * 10)
+        assert session.recorded_parts() == [
+            str(tmp_path / "out.ts"),
+            str(tmp_path / "out_resume02.ts"),
+        ]
+
+    def test_concat_list_quotes_paths(self, tmp_path):
+        """Test the concat list escapes quotes in file names"""
+        session = RecordingSession(str(tmp_path / "it's live.ts"))
+        list_path = session.write_concat_list([session.next_part()])
+        line = open(list_path).read()
+        assert line == f"file '{tmp_path}/it'\\''s live.ts'\n"
+
+    def test_concat_command(self):
+        """Test parts are joined with the concat demuxer without re-encoding"""
+        command = build_concat_command("out.concat.txt", "out.stitched.ts")
+        assert command[command.index("-f") + 1] == "concat"
+        assert command[command.index("-i") + 1] == "out.concat.txt"
+        assert command[command.index("-c") + 1] == "copy"
+        assert command[-1] == "out.stitched.ts"
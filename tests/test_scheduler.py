@@ -0,0 +1,117 @@
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from scheduler import MonitorScheduler
+
+
+class FakeMonitor:
+    def __init__(self, name: str, live: bool = False, retry_delay: float = 0.05):
+        self.streamer_name = name
+        self.retry_delay = retry_delay
+        self.live = live
+        self.running = False
+        self.probes = 0
+        self.recordings = 0
+        self.stopped = threading.Event()
+        self.hold = threading.Event()  # recordings last until it is set
+        self.hold.set()
+
+    def start_monitoring(self) -> bool:
+        self.running = True
+        return True
+
+    def next_delay(self) -> float:
+        return self.retry_delay
+
+    def check_live(self) -> bool:
+        self.probes += 1
+        return self.live
+
+    def record_stream(self) -> None:
+        self.recordings += 1
+        self.hold.wait(2)
+        self.live = False
+
+    def stop(self) -> None:
+        self.running = False
+        self.stopped.set()
+
+
+def _wait_for(condition, timeout: float = 2.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class TestMonitorScheduler:
+    """Test cases for the asyncio monitor scheduler"""
+
+    def test_offline_monitors_are_polled_repeatedly(self):
+        """Test that offline channels are re-probed after their retry delay"""
+        scheduler = MonitorScheduler(probe_workers=2)
+        scheduler.start()
+        monitors = [FakeMonitor(f"s{i}") for i in range(20)]
+        for monitor in monitors:
+            scheduler.add(monitor)
+
+        try:
+            assert _wait_for(lambda: all(m.probes >= 2 for m in monitors))
+            assert all(m.recordings == 0 for m in monitors)
+        finally:
+            scheduler.stop()
+
+    def test_live_monitor_records(self):
+        """Test that a live channel is recorded and then rescheduled"""
+        scheduler = MonitorScheduler()
+        scheduler.start()
+        monitor = FakeMonitor("live", live=True)
+        scheduler.add(monitor)
+
+        try:
+            assert _wait_for(lambda: monitor.recordings == 1 and monitor.probes >= 2)
+        finally:
+            scheduler.stop()
+
+    def test_removed_monitor_is_not_polled(self):
+        """Test that removing a monitor stops it and drops its timer"""
+        scheduler = MonitorScheduler()
+        scheduler.start()
+        monitor = FakeMonitor("gone", retry_delay=0.5)
+        scheduler.add(monitor, delay=0.2)
+        scheduler.remove("gone")
+
+        try:
+            time.sleep(0.3)
+            assert monitor.stopped.is_set()
+            assert monitor.probes == 0
+        finally:
+            scheduler.stop()
+
+    def test_live_channel_over_max_recordings_is_refused(self):
+        """Test a channel going live with the record pool full is not queued"""
+        scheduler = MonitorScheduler(max_recordings=1)
+        scheduler.start()
+        first, second = FakeMonitor("first", live=True), FakeMonitor("second")
+        first.hold.clear()
+        scheduler.add(first)
+
+        try:
+            assert _wait_for(lambda: first.recordings == 1)
+            second.live = True
+            scheduler.add(second)
+            assert _wait_for(lambda: second.probes >= 2)
+            assert second.recordings == 0
+
+            # Probed again and recorded once the pool has room
+            first.hold.set()
+            assert _wait_for(lambda: second.recordings == 1)
+        finally:
+            first.hold.set()
+            scheduler.stop()
@@ -0,0 +1,154 @@
+import os
+import time
+from collections import namedtuple
+from unittest.mock import patch
+
+from storage import StorageManager
+
+Usage = namedtuple("Usage", "total used free")
+
+
+def _write(root, relative, size, age=7200):
+    path = root / relative
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"0" * size)
+    mtime = time.time() - age
+    os.utime(path, (mtime, mtime))
+    return str(path)
+
+
+def _manager(root, capacity, **kwargs):
+    """Manager on a fake disk holding only the files under `root`."""
+
+    def disk_usage(_):
+        used = sum(
+            os.path.getsize(os.path.join(directory, name))
+            for directory, _, files in os.walk(root)
+            for name in files
+        )
+        return Usage(capacity, used, capacity - used)
+
+    return StorageManager(str(root), disk_usage=disk_usage, **kwargs)
+
+
+class TestIndex:
+    def test_scan_skips_dot_directories_and_the_journal(self, tmp_path):
+        video = _write(tmp_path, "a/stream.mp4", 10)
+        _write(tmp_path, ".cache/entry", 10)
+        _write(tmp_path, ".schedules/a.json", 10)
+        _write(tmp_path, "jobs.db", 10)
+        _write(tmp_path, "jobs.db-wal", 10)
+
+        storage = StorageManager(str(tmp_path))
+        storage.scan()
+
+        assert list(storage.index) == [video]
+        assert storage.total_size() == 10
+
+    def test_track_updates_the_index_without_a_scan(self, tmp_path):
+        storage = StorageManager(str(tmp_path))
+        path = _write(tmp_path, "a/stream.ts", 10)
+        storage.track(path)
+        assert storage.total_size() == 10
+
+        _write(tmp_path, "a/stream.ts", 30)
+        storage.track(path)
+        assert storage.total_size() == 30
+
+        os.remove(path)
+        storage.track(path)
+        assert storage.index == {}
+
+
+class TestEviction:
+    def test_evicts_by_class_then_age_down_to_the_low_watermark(self, tmp_path):
+        old_vod = _write(tmp_path, "a/old.mp4", 20, age=10 * 86400)
+        ts = _write(tmp_path, "a/new.ts", 20)
+        _write(tmp_path, "a/new.mp4", 20)
+        wav = _write(tmp_path, "a/new.wav", 20)
+        storage = _manager(
+            tmp_path, capacity=100, high_watermark=70, low_watermark=50, min_age=60
+        )
+        storage.scan()
+
+        storage.check(force=True)
+
+        # The wav goes first, the source .ts next, the old VOD is kept
+        assert not os.path.exists(wav)
+        assert not os.path.exists(ts)
+        assert os.path.exists(old_vod)
+        assert storage.used_percent() == 40
+
+    def test_first_check_scans_a_fresh_manager(self, tmp_path):
+        wav = _write(tmp_path, "a/stream.wav", 95)
+        storage = _manager(tmp_path, capacity=100, min_age=60)
+
+        # However soon after boot the first check runs
+        with patch("storage.time.monotonic", return_value=1.0):
+            storage.check()
+
+        assert storage.scanned == 1.0
+        assert not os.path.exists(wav)
+
+    def test_keeps_new_unconverted_and_protected_files(self, tmp_path):
+        recording = _write(tmp_path, "a/live.ts", 40, age=0)
+        unconverted = _write(tmp_path, "a/other.ts", 20)
+        queued = _write(tmp_path, "a/queued.mp4", 20)
+        storage = _manager(
+            tmp_path,
+            capacity=100,
+            high_watermark=50,
+            low_watermark=10,
+            min_age=60,
+            eviction_order=["wav", "ts"],
+        )
+        storage.protected = lambda: {queued}
+        storage.scan()
+
+        storage.check(force=True)
+
+        assert all(map(os.path.exists, (recording, unconverted, queued)))
+
+    def test_ensure_free_space_evicts_below_the_watermark(self, tmp_path):
+        vod = _write(tmp_path, "a/old.mp4", 40)
+        storage = _manager(
+            tmp_path,
+            capacity=100,
+            min_free=70,
+            min_age=60,
+            eviction_order=["wav", "ts", "vod"],
+        )
+        storage.scan()
+
+        assert storage.ensure_free_space()
+        assert not os.path.exists(vod)
+
+        _write(tmp_path, "a/live.ts", 40, age=0)
+        storage.scan()
+        assert not storage.ensure_free_space()
+
+    def test_ensure_free_space_evicts_only_what_is_needed(self, tmp_path):
+        vods = [
+            _write(tmp_path, f"a/{index}.mp4", 10, age=7200 + 60 * (5 - index))
+            for index in range(5)
+        ]
+        storage = _manager(
+            tmp_path,
+            capacity=100,
+            min_free=55,
+            min_age=60,
+            eviction_order=["wav", "ts", "vod"],
+        )
+        storage.scan()
+
+        assert storage.ensure_free_space()
+        # Only the oldest VOD had to go to get 55 bytes free
+        assert [os.path.exists(vod) for vod in vods] == [False, True, True, True, True]
+
+    def test_vods_are_kept_by_default(self, tmp_path):
+        vod = _write(tmp_path, "a/old.mp4", 40)
+        storage = _manager(tmp_path, capacity=100, min_free=70, min_age=60)
+        storage.scan()
+
+        assert not storage.ensure_free_space()
+        assert os.path.exists(vod)
@@ -3,19 +3,20 @@ import os
 import sys
 from unittest.mock import MagicMock, patch
 import configparser
+from itertools import count
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
 
 from stream_monitor import StreamMonitor
 
+
 class TestStreamMonitorQuality:
     def _make_monitor(self, quality: str) -> StreamMonitor:
         monitor = StreamMonitor.__new__(StreamMonitor)
         config = configparser.ConfigParser()
-        config.read_dict({
-            "streamlink": {"quality": quality},
-            "source": {"stream_source": "twitch"},
-        })
+        config.read_dict(
+            {"streamlink": {"quality": quality}, "source": {"stream_source": "twitch"}}
+        )
         monitor.config = config
         monitor.streamer_name = "teststreamer"
         monitor.datetime_format = "%d-%m-%Y-%H-%M-%S"
@@ -23,6 +24,11 @@ class TestStreamMonitorQuality:
         monitor.stream_source_url = "https://twitch.tv/teststreamer"
         monitor.stream_platform = None
         monitor.current_process = None
+        monitor.resolved_url = None
+        monitor.live_since = None
+        monitor.first_byte_latency = None
+        monitor.reload_pending = False
+        monitor.parts_queued = 0
         return monitor
 
     def test_single_quality_in_command(self):
@@ -39,4 +45,185 @@ class TestStreamMonitorQuality:
             mock_popen.return_value.wait.return_value = 1
             monitor.download_video()
             args = mock_popen.call_args[0][0]
-            assert args[-1] == "1080p60,720p,best"
\ No newline at end of file
+            assert args[-1] == "1080p60,720p,best"
+
+    def test_failed_connection_forgets_the_previous_first_byte(self):
+        monitor = self._make_monitor("best")
+        monitor.first_byte_latency = 0.5
+        with patch("subprocess.Popen", side_effect=OSError):
+            assert monitor.download_video("/tmp/recordings/test/out.ts") == (False, "")
+        assert monitor.first_byte_latency is None
+
+        monitor.first_byte_latency = 0.5
+        with patch("stream_monitor.streamlink_backend.open", return_value=None):
+            assert monitor._download_with_api(
+                "https://twitch.tv/teststreamer", "best", "/tmp/recordings/out.ts"
+            ) == (False, "")
+        assert monitor.first_byte_latency is None
+
+    def test_fmp4_recording_pipes_into_ffmpeg(self):
+        monitor = self._make_monitor("best")
+        monitor.config["video"] = {"recording_format": "fmp4"}
+        with patch("subprocess.Popen") as mock_popen:
+            mock_popen.return_value.wait.return_value = 1
+            monitor.download_video("/tmp/recordings/test/out.mp4")
+            streamlink_args = mock_popen.call_args_list[0][0][0]
+            ffmpeg_args = mock_popen.call_args_list[1][0][0]
+        assert streamlink_args[:2] == ["streamlink", "-O"]
+        assert ffmpeg_args[0] == "ffmpeg"
+        assert ffmpeg_args[-1] == "/tmp/recordings/test/out.mp4"
+
+    def test_split_recording_uses_segment_muxer(self):
+        monitor = self._make_monitor("best")
+        monitor.config["video"] = {
+            "split_into_parts": "true",
+            "split_duration": "00:30:00",
+        }
+        with patch("subprocess.Popen") as mock_popen:
+            mock_popen.return_value.wait.return_value = 0
+            success, path = monitor.download_video("/tmp/recordings/test/out.ts")
+            ffmpeg_args = mock_popen.call_args_list[1][0][0]
+        assert success is True
+        assert path == ""
+        assert ffmpeg_args[ffmpeg_args.index("-segment_time") + 1] == "1800"
+        assert ffmpeg_args[-1] == "/tmp/recordings/test/out_part%03d.ts"
+
+
+class TestStreamMonitorProbe:
+    def _make_monitor(self) -> StreamMonitor:
+        return TestStreamMonitorQuality()._make_monitor("best")
+
+    def test_check_live_keeps_probe_results(self):
+        monitor = self._make_monitor()
+        probe = {"live": True, "metadata": {"id": "1"}, "url": "https://x/y.m3u8"}
+        with (
+            patch("stream_monitor.live_status.is_live", return_value=None),
+            patch("stream_monitor.probe_stream", return_value=probe) as probe_stream,
+        ):
+            assert monitor.check_live() is True
+        probe_stream.assert_called_once_with("https://twitch.tv/teststreamer", "best")
+        assert monitor.stream_metadata == {"id": "1"}
+        assert monitor.resolved_url == "https://x/y.m3u8"
+        assert monitor.live_since is not None
+
+    def test_check_live_uses_batched_status(self):
+        monitor = self._make_monitor()
+        with (
+            patch("stream_monitor.live_status.is_live", return_value=False),
+            patch("stream_monitor.probe_stream") as probe_stream,
+        ):
+            assert monitor.check_live() is False
+        probe_stream.assert_not_called()
+
+    def test_reconnect_check_is_fresh_and_keeps_pending_config(self):
+        monitor = self._make_monitor()
+        monitor.reload_pending = True
+        with (
+            patch("stream_monitor.live_status.is_live", return_value=True),
+            patch("stream_monitor.live_status.check_now", return_value=False),
+            patch.object(monitor, "_load_configuration") as load_configuration,
+        ):
+            assert monitor.check_reconnect() is False
+        load_configuration.assert_not_called()
+        assert monitor.reload_pending
+
+
+class TestStreamMonitorSession:
+    def _make_monitor(self, tmp_path) -> StreamMonitor:
+        monitor = TestStreamMonitorQuality()._make_monitor("best")
+        monitor.config["video"] = {"reconnect_timeout": "60", "reconnect_interval": "1"}
+        monitor.running = True
+        monitor.polling = MagicMock()
+        monitor._get_output_path = lambda: str(tmp_path / "out.ts")
+        monitor._attach_metadata = MagicMock()
+        return monitor
+
+    def _download(self, monitor, recorded):
+        """download_video stand-in recording one connection per entry of `recorded`."""
+        connections = iter(recorded)
+
+        def download(path, segments=None):
+            data = next(connections)
+            with open(path, "wb") as f:
+                f.write(data)
+            monitor.first_byte_latency = 0.1 if data else None
+            return False, ""
+
+        return download
+
+    def test_reconnect_joins_parts_and_processes_once(self, tmp_path):
+        monitor = self._make_monitor(tmp_path)
+        monitor.download_video = self._download(monitor, [b"first", b"second", b""])
+
+        def concat(command, **kwargs):
+            open(command[-1], "wb").close()
+            return MagicMock(returncode=0)
+
+        with (
+            patch.object(
+                monitor, "check_reconnect", side_effect=[True, True, False, False]
+            ),
+            patch("stream_monitor.time.sleep"),
+            patch("stream_monitor.time.monotonic", side_effect=count(0, 20)),
+            patch("stream_monitor.subprocess.run", side_effect=concat) as run,
+            patch("stream_monitor.processor.process") as process,
+        ):
+            monitor.record_stream()
+
+        concat_list = run.call_args.args[0][run.call_args.args[0].index("-i") + 1]
+        assert concat_list == str(tmp_path / "out.concat.txt")
+        process.assert_called_once()
+        path, name, streamer_config, duration = process.call_args.args
+        assert (path, name, streamer_config) == (
+            str(tmp_path / "out.ts"),
+            "teststreamer",
+            monitor.config,
+        )
+        assert duration > 0
+        assert sorted(os.listdir(tmp_path)) == ["out.ts"]
+
+    def test_no_reconnect_when_nothing_was_recorded(self, tmp_path):
+        monitor = self._make_monitor(tmp_path)
+        monitor.download_video = self._download(monitor, [b""])
+
+        with (
+            patch.object(monitor, "check_reconnect") as check_reconnect,
+            patch("stream_monitor.processor.process") as process,
+        ):
+            monitor.record_stream()
+
+        check_reconnect.assert_not_called()
+        process.assert_not_called()
+
+    def test_reconnect_does_not_wait_for_the_live_clipper(self, tmp_path):
+        monitor = self._make_monitor(tmp_path)
+        monitor.download_video = self._download(monitor, [b"first", b""])
+        clippers = []
+        events = []
+
+        def make_clipper(path, name, streamer_config):
+            clipper = MagicMock()
+            clipper.join.side_effect = lambda: events.append(("join", path))
+            clippers.append(clipper)
+            return clipper
+
+        def check_reconnect():
+            events.append(("reconnect", None))
+            return len(events) == 1
+
+        with (
+            patch("stream_monitor.live_clipping_enabled", return_value=True),
+            patch("stream_monitor.LiveClipper.from_config", side_effect=make_clipper),
+            patch.object(monitor, "check_reconnect", side_effect=check_reconnect),
+            patch("stream_monitor.time.sleep"),
+            patch("stream_monitor.time.monotonic", side_effect=count(0, 20)),
+            patch("stream_monitor.processor.process"),
+        ):
+            monitor.record_stream()
+
+        # Both clippers are joined only once the session is over
+        names = [event for event, _ in events]
+        assert names[0] == "reconnect"
+        assert names[-2:] == ["join", "join"]
+        assert "join" not in names[:-2]
+        assert all(clipper.stop.called for clipper in clippers)
@@ -0,0 +1,88 @@
+import os
+import sys
+from unittest.mock import MagicMock
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from recorder import build_streamlink_command
+from streamlink_backend import StreamlinkBackend
+
+
+class TestStreamlinkBackend:
+    """Test cases for the streamlink API backend"""
+
+    def test_parse_flags(self):
+        """Test CLI flags are split into plugin and session options"""
+        plugin_options, session_options = StreamlinkBackend._parse_flags(
+            "twitch", ["--twitch-disable-ads", "--hls-live-edge=6", "ignored"]
+        )
+        assert plugin_options == {"disable-ads": True}
+        assert session_options == {"hls-live-edge": 6}
+
+    def test_parse_flags_with_separate_values(self):
+        """Test values after a space are typed values, not switches"""
+        plugin_options, session_options = StreamlinkBackend._parse_flags(
+            "twitch",
+            [
+                "--stream-timeout 60.5",
+                "--twitch-low-latency",
+                "--http-header 'User-Agent=Py AutoVod'",
+                "--hls-live-edge 3",
+            ],
+        )
+        assert plugin_options == {"low-latency": True}
+        assert session_options == {
+            "stream-timeout": 60.5,
+            "http-header": "User-Agent=Py AutoVod",
+            "hls-live-edge": 3,
+        }
+
+    def test_flags_mean_the_same_to_both_backends(self):
+        """Test the API backend reads flags the way the streamlink CLI does"""
+        argparser = pytest.importorskip("streamlink_cli.argparser")
+        flags = ["--stream-timeout 60.5", "--hls-live-edge=3", "--twitch-low-latency"]
+
+        command = build_streamlink_command("twitch.tv/someone", "best", flags)
+        args, unknown = argparser.build_parser().parse_known_args(command[1:])
+        plugin_options, session_options = StreamlinkBackend._parse_flags(
+            "twitch", flags
+        )
+
+        assert session_options == {
+            "stream-timeout": args.stream_timeout,
+            "hls-live-edge": args.hls_live_edge,
+        }
+        # Plugin arguments are only registered once the CLI resolved the plugin
+        assert unknown == ["--twitch-low-latency"]
+        assert plugin_options == {"low-latency": True}
+
+    def test_select_uses_quality_fallbacks(self):
+        """Test the first available quality in the fallback list is used"""
+        best = MagicMock()
+        streams = {"720p": MagicMock(), "best": best}
+        assert StreamlinkBackend._select(streams, "1080p60, best") is best
+        assert StreamlinkBackend._select(streams, "480p") is None
+
+    def test_disabled_backend_is_unavailable(self):
+        """Test the CLI stays in use unless the API backend is enabled"""
+        assert StreamlinkBackend(enabled=False).available is False
+
+    def test_sessions_are_reused_per_platform(self):
+        """Test one session is kept per platform"""
+        pytest.importorskip("streamlink")
+        backend = StreamlinkBackend(enabled=True)
+        assert backend._session(None) is backend._session(None)
+
+    def test_session_options_do_not_leak_between_flag_sets(self):
+        """Test streamers with different options get their own session"""
+        pytest.importorskip("streamlink")
+        backend = StreamlinkBackend(enabled=True)
+        tuned = backend._session(None, {"hls-live-edge": 6})
+        plain = backend._session(None)
+
+        assert tuned is not plain
+        assert tuned is backend._session(None, {"hls-live-edge": 6})
+        assert tuned.get_option("hls-live-edge") == 6
+        assert plain.get_option("hls-live-edge") != 6
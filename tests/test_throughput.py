@@ -0,0 +1,45 @@
+import os
+import sys
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from throughput import ThroughputTracker
+
+
+class TestThroughputTracker:
+    """Test cases for the per-recording throughput tracker"""
+
+    def test_sample_reports_speed_per_streamer(self):
+        """Test speeds are computed per active recording"""
+        tracker = ThroughputTracker()
+        with patch("throughput.time.monotonic", side_effect=[0.0, 2.0]):
+            tracker.start("alpha")
+            tracker.start("beta")
+            tracker.update("alpha", 4_000_000)
+            tracker.add("beta", 1_000_000)
+            tracker.sample()
+            tracker.update("alpha", 6_000_000)
+            total, speeds = tracker.sample()
+
+        assert total == 7_000_000
+        assert speeds == {"alpha": 1_000_000, "beta": 0}
+
+    def test_finished_recordings_keep_their_bytes(self):
+        """Test the total includes recordings that already ended"""
+        tracker = ThroughputTracker()
+        tracker.start("alpha")
+        tracker.update("alpha", 500)
+        tracker.finish("alpha")
+
+        total, speeds = tracker.sample()
+        assert total == 500
+        assert speeds == {}
+        assert tracker.active_count() == 0
+
+    def test_updates_for_inactive_streamers_are_ignored(self):
+        """Test late reports after a recording ended are dropped"""
+        tracker = ThroughputTracker()
+        tracker.update("ghost", 100)
+        tracker.add("ghost", 100)
+        assert tracker.total_bytes() == 0
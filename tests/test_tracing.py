@@ -0,0 +1,68 @@
+import json
+import pstats
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import tracing
+from tracing import Profiler, Trace
+
+
+def _spans(trace: Trace) -> dict[str, dict]:
+    with open(trace.path) as f:
+        return {span["name"]: span for span in map(json.loads, f)}
+
+
+class TestTracing:
+    def test_spans_form_a_tree(self, tmp_path):
+        trace = Trace(str(tmp_path / "video.trace.jsonl"), streamer="streamer")
+        with tracing.activate(trace):
+            with tracing.span("encode", video="video.mp4"):
+                with tracing.span("subprocess", command="ffmpeg") as span:
+                    span.set(returncode=0)
+
+        spans = _spans(trace)
+        assert spans["subprocess"]["parent"] == spans["encode"]["span"]
+        assert spans["subprocess"]["attributes"] == {
+            "command": "ffmpeg",
+            "returncode": 0,
+        }
+        # The root span carries the trace's attributes
+        assert spans["encode"]["parent"] is None
+        assert spans["encode"]["attributes"]["streamer"] == "streamer"
+        assert spans["encode"]["duration"] >= spans["subprocess"]["duration"]
+
+    def test_failed_span_records_the_error(self, tmp_path):
+        trace = Trace(str(tmp_path / "video.trace.jsonl"))
+        with tracing.activate(trace), pytest.raises(RuntimeError):
+            with tracing.span("rank"):
+                raise RuntimeError("boom")
+
+        assert _spans(trace)["rank"]["status"] == "error"
+
+    def test_no_spans_outside_a_trace(self):
+        with tracing.span("encode") as span:
+            assert span is None
+
+    def test_wrapped_functions_join_the_trace_in_pool_threads(self, tmp_path):
+        trace = Trace(str(tmp_path / "video.trace.jsonl"))
+
+        def request(index):
+            with tracing.span(f"llm_request_{index}"):
+                pass
+
+        with tracing.activate(trace), tracing.span("rank"):
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                list(executor.map(tracing.wrap(request), range(2)))
+
+        spans = _spans(trace)
+        for index in range(2):
+            assert spans[f"llm_request_{index}"]["parent"] == spans["rank"]["span"]
+
+
+def test_cprofile_writes_stats(tmp_path):
+    base = str(tmp_path / "video.encode")
+    with Profiler("cprofile").profile(base):
+        sum(range(1000))
+
+    assert pstats.Stats(f"{base}.prof").total_calls > 0
@@ -0,0 +1,85 @@
+import importlib.util
+import os
+import wave
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from artifact_cache import ArtifactCache
+
+
+@pytest.fixture
+def transcription(tmp_path, monkeypatch):
+    """The real transcription module, conftest replaces it for other tests."""
+    for name in ("torch", "librosa", "faster_whisper"):
+        pytest.importorskip(name)
+    path = os.path.join(os.path.dirname(__file__), "..", "src", "transcription.py")
+    spec = importlib.util.spec_from_file_location("real_transcription", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    monkeypatch.setattr(
+        module, "artifact_cache", ArtifactCache(str(tmp_path / "cache"))
+    )
+    return module
+
+
+class TestCacheKey:
+    def test_settings_that_change_the_output_miss_the_cache(
+        self, transcription, tmp_path, monkeypatch
+    ):
+        video = tmp_path / "video.ts"
+        video.write_bytes(b"video")
+        key = transcription.cache_key(str(video), "cpu")
+        assert transcription.cache_key(str(video), "cpu") == key
+
+        assert transcription.cache_key(str(video), "cuda") != key
+        monkeypatch.setattr(transcription, "compute_type", "int8")
+        assert transcription.cache_key(str(video), "cpu") != key
+        monkeypatch.setattr(transcription, "compute_type", "")
+        monkeypatch.setattr(transcription, "block_seconds", 120)
+        assert transcription.cache_key(str(video), "cpu") != key
+
+
+class FakeModel:
+    """Finds a 0.4 second segment every 0.4 seconds of whatever it is given."""
+
+    def transcribe(self, block, language=None):
+        length = len(block) / 16000
+        starts = np.arange(0, length - 0.4 + 1e-9, 0.4)
+        segments = [
+            SimpleNamespace(start=start, end=start + 0.4, text="word")
+            for start in starts
+        ]
+        return segments, None
+
+
+class TestTranscribeWithFeatures:
+    def test_overlapping_blocks_keep_each_segment_once(
+        self, transcription, tmp_path, monkeypatch
+    ):
+        with wave.open(str(tmp_path / "vod.wav"), "wb") as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(16000)
+            f.writeframes(np.zeros(40000, dtype="<i2").tobytes())
+        monkeypatch.setattr(transcription, "transcription_engine", "faster-whisper")
+        monkeypatch.setattr(transcription, "block_seconds", 1)
+        monkeypatch.setattr(transcription, "block_overlap", 0.5)
+
+        segments = transcription.transcribe_with_features(
+            FakeModel(), str(tmp_path / "vod.wav"), "cpu", min_duration=0, offset=60
+        )
+
+        # The segment crossing each boundary is kept whole, once
+        assert [round(s["start"], 1) for s in segments] == [
+            60.0,
+            60.4,
+            60.8,
+            61.4,
+            61.8,
+        ]
+        assert all(
+            later["start"] >= earlier["end"] - 1e-9
+            for earlier, later in zip(segments, segments[1:])
+        )
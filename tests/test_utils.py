@@ -1,12 +1,11 @@
 import os
 import sys
-import tempfile
 from unittest.mock import patch
 
 # Add src to path to import utils
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
 
-from utils import determine_source, is_docker, get_size, load_config, StreamPlatform
+from utils import determine_source, is_docker, load_config, StreamPlatform
 
 
 class TestDetermineSource:
@@ -83,44 +82,6 @@ class TestIsDocker:
             assert result is True
 
 
-class TestGetSize:
-    """Test cases for get_size function"""
-
-    def test_get_size_empty_directory(self):
-        """Test get_size with empty directory"""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            size = get_size(tmpdir)
-            assert size == 0.0
-
-    def test_get_size_with_file(self):
-        """Test get_size with a file"""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            # Create a test file with 1MB of data
-            test_file = os.path.join(tmpdir, "test.txt")
-            with open(test_file, "wb") as f:
-                f.write(b"0" * 1_000_000)
-
-            size = get_size(tmpdir)
-            assert 0.9 < size < 1.1  # Allow small margin for exact size
-
-    def test_get_size_nonexistent_path(self):
-        """Test get_size with nonexistent path"""
-        result = get_size("/nonexistent/path")
-        assert result == 0.0
-
-    def test_get_size_multiple_files(self):
-        """Test get_size with multiple files"""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            # Create 3 files with 500KB each
-            for i in range(3):
-                test_file = os.path.join(tmpdir, f"test{i}.txt")
-                with open(test_file, "wb") as f:
-                    f.write(b"0" * 500_000)
-
-            size = get_size(tmpdir)
-            assert 1.4 < size < 1.6  # ~1.5 MB
-
-
 class TestLoadConfig:
     """Test cases for load_config function"""
 
@@ -135,6 +96,22 @@ class TestLoadConfig:
         config = load_config("nonexistent_config_file")
         assert config is None
 
+    def test_load_config_is_cached_until_modified(self, tmp_path, monkeypatch):
+        """Test that unchanged files are not parsed again"""
+        monkeypatch.chdir(tmp_path)
+        path = tmp_path / "cached.ini"
+        path.write_text("[source]\nstream_source = twitch\n")
+        os.utime(path, ns=(1_000_000_000, 1_000_000_000))
+
+        first = load_config("cached")
+        assert load_config("cached") is first
+
+        path.write_text("[source]\nstream_source = kick\n")
+        os.utime(path, ns=(2_000_000_000, 2_000_000_000))
+        reloaded = load_config("cached")
+        assert reloaded is not first
+        assert reloaded.get("source", "stream_source") == "kick"
+
     def test_load_config_returns_configparser(self):
         """Test that load_config returns ConfigParser object"""
         import configparser
@@ -142,3 +119,40 @@ class TestLoadConfig:
         config = load_config("default")
         if config is not None:
             assert isinstance(config, configparser.ConfigParser)
+
+
+class TestProbeStream:
+    """Test cases for probe_stream function"""
+
+    def test_probe_live_stream(self):
+        """Test that one streamlink call returns metadata and the stream URL"""
+        import subprocess
+        import json
+        from utils import probe_stream
+
+        payload = {
+            "type": "hls",
+            "url": "https://example.com/live.m3u8",
+            "metadata": {"id": "123", "title": "hello"},
+        }
+        completed = subprocess.CompletedProcess([], 0, stdout=json.dumps(payload))
+        with patch("utils.subprocess.run", return_value=completed) as run:
+            probe = probe_stream("twitch.tv/someone", "720p,best")
+
+        assert run.call_args[0][0] == [
+            "streamlink",
+            "--json",
+            "twitch.tv/someone",
+            "720p,best",
+        ]
+        assert probe["url"] == "https://example.com/live.m3u8"
+        assert probe["metadata"]["id"] == "123"
+
+    def test_probe_offline_stream(self):
+        """Test that an offline stream returns None"""
+        import subprocess
+        from utils import probe_stream
+
+        error = subprocess.CalledProcessError(1, ["streamlink"])
+        with patch("utils.subprocess.run", side_effect=error):
+            assert probe_stream("twitch.tv/someone") is None